@@ -1,208 +1,137 @@
-import sqlite3
+import os
+import sys
+import time
 from pathlib import Path
-import pandas as pd
 import altair as alt
+import pandas as pd
 import streamlit as st
-import re
-
-STATE_MAP = {
-    "WA":"Western Australia","NSW":"New South Wales","VIC":"Victoria","QLD":"Queensland",
-    "SA":"South Australia","TAS":"Tasmania","NT":"Northern Territory","ACT":"ACT"
-}
-
-def extract_state(loc: str) -> str:
-    s = str(loc)
-    m = re.search(r",\s*([A-Z]{2,3})\b", s)  # e.g. ", WA"
-    if m:
-        return STATE_MAP.get(m.group(1), m.group(1))
-    # heuristics if no code present
-    ls = s.lower()
-    if "perth" in ls: return "Western Australia"
-    if "sydney" in ls: return "New South Wales"
-    if "melbourne" in ls: return "Victoria"
-    if "brisbane" in ls: return "Queensland"
-    return ""
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.common import queries as q  # noqa: E402
+from src.common.db import DB_PATH, init_db  # noqa: E402
+from src.common.metrics import Metrics  # noqa: E402
 
-DB_PATH = Path(__file__).resolve().parents[1] / "data" / "jobs.db"
+t_start = time.perf_counter()
+# timings for this render: ?debug=1 in the URL or DASHBOARD_DEBUG=1
+debug = os.getenv("DASHBOARD_DEBUG", "0") == "1" or st.query_params.get("debug") == "1"
+render = Metrics("render")
 
 st.set_page_config(page_title="Job Market Tracker — AU", page_icon="📈", layout="wide")
 st.title("📈 Job Market Tracker — AU (MVP)")
 st.caption("Skills frequency and salary distribution from ingested job ads")
 
-@st.cache_data
-def load_tables():
-    if not DB_PATH.exists():
-        st.error("Database not found. Run `python src/setup_db.py` and `python src/extractors/load_sample.py`.")
+@st.cache_resource
+def migrate_once():
+    init_db()
+
+@st.cache_data(max_entries=int(os.getenv("DASHBOARD_CACHE_ENTRIES", "512")), show_spinner=False)
+def cached(backend: str, version: int, query: str, *args, _conn=None, _miss=None, **kwargs):
+    # one entry per backend x data version x query x filters; any write bumps the version
+    # (db.data_version / the Parquet manifest), so results from before an ETL run stop
+    # being hit and fall out of the LRU
+    if _miss is not None:
+        _miss.append(query)  # only runs on a cache miss
+    return getattr(q, query)(_conn, *args, **kwargs)
+
+# 1) CONNECT (cleaning, de-duplication and aggregation all run in SQL; see src/common/queries.py)
+if os.getenv("DASHBOARD_BACKEND", "sqlite") == "parquet":
+    # same chart functions over the Parquet export (src/common/columnar.py)
+    from src.common import columnar as q  # noqa: E402
+    if not (q.PARQUET_DIR / q.MANIFEST).exists():
+        st.error("No Parquet export found. Run `python -m src.export_parquet`.")
         st.stop()
-    conn = sqlite3.connect(DB_PATH)
-    jobs = pd.read_sql_query("SELECT * FROM jobs", conn)
-    skills = pd.read_sql_query("SELECT * FROM skills", conn)
-    conn.close()
-    return jobs, skills
-
-jobs, skills = load_tables()
-# 1) LOAD → WORKING COPY
-df = jobs.copy()
-
-# After loading df from SQLite (keep your code above this)
-df["job_url"] = df.get("url")
-if "redirect_url" in df.columns:
-    df["job_url"] = df["job_url"].fillna(df["redirect_url"])
-
-# 2) CLEAN (make the raw data reliable)
-# 2a. dates
-df["posted_date"] = pd.to_datetime(df["posted_date"], errors="coerce")
-# 2b. numbers (and fix values like 175 -> 175000)
-for col in ["salary_min", "salary_max", "salary_avg"]:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
-    df.loc[df[col] < 1000, col] = df[col] * 1000
-
-# 2c. normalize text (locations come messy)
-def canonical_city(loc: str) -> str:
-    s = str(loc).lower()
-    # Sydney
-    if any(k in s for k in ["sydney","nsw","liverpool plains","denistone west","chippendale","chatswood west","parramatta","blue haven","baulkham hills","arndell park","banksia","alexandria","north sydney","macquarie park","surry hills","ultimo","the rocks"]):
-        return "NSW"
-    # Melbourne
-    if any(k in s for k in ["melbourne","vic","highpoint city","geelong","bundoora","alphington","cheltenham","st kilda","ballarat","docklands","richmond","hawthorn","cbd vic","west melbourne"]):
-        return "VIC"
-    # Perth
-    if any(k in s for k in ["perth","barton","innaloo","jandakot","wa","west perth","osborne park","joondalup","welshpool"]):
-        return "WA"
-    # Brisbane
-    if any(k in s for k in ["brisbane","bray park","qld","fortitude valley","south brisbane","milton","toowong"]):
-        return "QLD"
-    # SA
-    if any(k in s for k in ["adelaide","adelaide Cbd","ethelton","gepps cross"]):
-        return "SA"
-    # Tasmania
-    if any(k in s for k in ["circular head","hobart","smithton"]):
-        return "TAS"
-    # ACT
-    if any(k in s for k in ["canberra","canberra cbd"]):
-        return "ACT"
-    # NT
-    if any(k in s for k in ["darwin"]):
-        return "Northen Territory"
-    # Fallback: first token before comma
-    return s.split(",")[0].strip().title()
-
-df["city_clean"] = df["location"].apply(canonical_city)
-
-
-
-
-
-# 2d. de-duplicate likely repeats
-df = df.sort_values(["posted_date","company","title"], na_position="last").drop_duplicates(
-    subset=["title","company","city_clean","posted_date"], keep="first"
-)
-
-# 3) DERIVE (columns that make filtering/charts easier)
-role_hint = df["title"].str.extract(r"(Analyst|Scientist|Engineer)", expand=False)
-df["role_bucket"] = role_hint.fillna("Other")
-
-# 4) FILTER UI (build options from *clean* columns)
+elif not DB_PATH.exists():
+    st.error("Database not found. Run `python -m src.setup_db` and `python -m src.extractors.load_sample`.")
+    st.stop()
+else:
+    migrate_once()
+conn = q.connect()
+version = q.data_version(conn)
+
+def run(query, *args, **kwargs):
+    miss = []
+    with render.timer(f"query.{query}"):
+        out = cached(q.__name__, version, query, *args, _conn=conn, _miss=miss, **kwargs)
+    render.count("cache_misses" if miss else "cache_hits")
+    return out
+
+# 2) FILTER UI (options come from the *clean* columns)
+opts = run("filter_options")
 col1, col2, col3 = st.columns(3)
 with col1:
-    cities = ["All"] + sorted([c for c in df["city_clean"].dropna().unique() if str(c).lower() != "australia"])
+    cities = ["All"] + [c for c in opts["city_clean"] if str(c).lower() != "australia"]
     city = st.selectbox("City", cities, index=0)
 with col2:
-    sources = ["All"] + sorted([s for s in df["source"].dropna().unique().tolist() if s.lower() != "sample"])
+    sources = ["All"] + [s for s in opts["source"] if s.lower() != "sample"]
     source = st.selectbox("Source", sources, index=0)
 with col3:
-    roles = ["All"] + sorted(df["role_bucket"].dropna().unique().tolist())
+    roles = ["All"] + opts["role_bucket"]
     role = st.selectbox("Role (bucket)", roles, index=0, key="role_select_v2")
-    kw   = st.text_input("Keyword (optional)", "", key="kw_filter_v1")
-
-
+    kw   = st.text_input("Keyword (optional)", "", key="kw_filter_v1",
+                         help='Full-text over title, company, location and description; "quotes" for a phrase. '
+                              'Archived postings are not searched, nor descriptions that maintenance '
+                              'compressed (src.maintain --compress-after)')
 
+# keyword goes through the FTS5 index (words match as prefixes, all must match)
+filters = q.Filters(city=city, source=source, role=role, keyword=kw.strip())
 
 
+# 3) CHARTS/TABLES (each query returns just the aggregate it plots; cached per filters + data version)
+if filters.keyword:
+    with st.expander("Best keyword matches"):
+        st.dataframe(run("search", filters.keyword, filters, limit=20), use_container_width=True, hide_index=True)
 
-# 4b) APPLY filters
-view = df.copy()
-if city != "All":
-    view = view[view["city_clean"] == city]   # exact match
-if source != "All":
-    view = view[view["source"] == source]
-# Role filter
-if role != "All":
-    view = view[view["role_bucket"] == role]
-
-# Keyword filter (title/company/location; case-insensitive)
-if kw:
-    mask = (
-        view["title"].str.contains(kw, case=False, na=False)
-        | view["company"].str.contains(kw, case=False, na=False)
-        | view.get("location", pd.Series("", index=view.index)).astype(str).str.contains(kw, case=False, na=False)
-    )
-    view = view[mask]
-
-
-# 5) CHARTS/TABLES (use `view`, not `df`)
 st.subheader("Skills frequency")
-skills_view = skills.merge(view[["id"]], left_on="job_id", right_on="id", how="inner")
-top = skills_view["skill"].value_counts().rename_axis("skill").reset_index(name="count")
+top = run("skill_counts", filters)
 if top.empty:
     st.info("No skills extracted for current filters.")
 else:
-    st.altair_chart(
-        alt.Chart(top).mark_bar().encode(
-            x=alt.X("count:Q", title="Mentions"),
-            y=alt.Y("skill:N", sort="-x", title="Skill")
-        ).properties(height=400),
-        use_container_width=True
-    )
+    with render.timer("chart.skills", len(top)):
+        st.altair_chart(
+            alt.Chart(top).mark_bar().encode(
+                x=alt.X("count:Q", title="Mentions"),
+                y=alt.Y("skill:N", sort="-x", title="Skill")
+            ).properties(height=400),
+            use_container_width=True
+        )
 ## SALARY DISTRIBUTION $$
 st.subheader("Salary distribution (AUD)")
-sal = view[["salary_avg","salary_min","salary_max"]].melt(value_name="salary", var_name="kind").dropna()
+sal = run("salary_histogram", filters, bins=30)
 if sal.empty:
     st.info("No salary data available.")
 else:
-    st.altair_chart(
-        alt.Chart(sal).mark_bar().encode(
-            x=alt.X("salary:Q", bin=alt.Bin(maxbins=30), title="Salary (AUD)"),
-            y=alt.Y("count()", title="Jobs")
-        ).properties(height=300),
-        use_container_width=True
-    )
+    with render.timer("chart.salary", len(sal)):
+        st.altair_chart(
+            alt.Chart(sal).mark_bar().encode(
+                x=alt.X("bin_start:Q", title="Salary (AUD)"),
+                x2="bin_end:Q",
+                y=alt.Y("jobs:Q", title="Jobs")
+            ).properties(height=300),
+            use_container_width=True
+        )
 
 ## Listing By State ##
 st.subheader("Listings by state")
-state_counts = (
-    view.assign(state=view["location"].apply(extract_state))
-        .loc[lambda x: x["state"].ne("")]
-        .groupby("state", as_index=False)["id"].count()
-        .rename(columns={"id":"listings"})
-        .sort_values("listings", ascending=False)
-)
+state_counts = run("state_counts", filters)
 if state_counts.empty:
     st.info("No state info available.")
 else:
-    st.altair_chart(
-        alt.Chart(state_counts).mark_bar().encode(
-            x=alt.X("listings:Q", title="Listings"),
-            y=alt.Y("state:N", sort="-x", title="State")
-        ).properties(height=320),
-        use_container_width=True
-    )
+    with render.timer("chart.states", len(state_counts)):
+        st.altair_chart(
+            alt.Chart(state_counts).mark_bar().encode(
+                x=alt.X("listings:Q", title="Listings"),
+                y=alt.Y("state:N", sort="-x", title="State")
+            ).properties(height=320),
+            use_container_width=True
+        )
 
 ## TIME TREND BY STATE ##
 st.subheader("Weekly listings by state")
-if "posted_date" in view.columns:
-    trend = (
-        view.assign(
-            state=view["location"].apply(extract_state),
-            week=view["posted_date"].dt.to_period("W").dt.start_time
-        ).loc[lambda x: x["state"].ne("")]
-         .groupby(["week","state"], as_index=False)["id"].count()
-         .rename(columns={"id":"listings"})
-    )
-    if trend.empty:
-        st.info("No dated listings available.")
-    else:
+trend = run("weekly_trend", filters)
+if trend.empty:
+    st.info("No dated listings available.")
+else:
+    with render.timer("chart.trend", len(trend)):
         st.altair_chart(
             alt.Chart(trend).mark_line().encode(
                 x=alt.X("week:T", title="Week"),
@@ -212,9 +141,63 @@ if "posted_date" in view.columns:
             use_container_width=True
         )
 
-
+## JOB LISTINGS ##
+# keyset-paged straight from SQLite (queries.job_page): each page is one index walk from the
+# previous page's last (value, id), and descriptions are read for the visible rows only
+if hasattr(q, "job_page"):
+    st.subheader("Job listings")
+    SORTS = {"Newest": ("date", True), "Oldest": ("date", False),
+             "Highest salary": ("salary", True), "Lowest salary": ("salary", False)}
+    PAGE_SIZE = 25
+    sort_label = st.radio("Sort by", list(SORTS), horizontal=True, key="listing_sort_v1")
+    sort, descending = SORTS[sort_label]
+    if st.session_state.get("listing_key") != (filters, sort_label):  # new filters/sort: back to page 1
+        st.session_state.listing_key = (filters, sort_label)
+        st.session_state.listing_cursors = [None]
+    cursors = st.session_state.listing_cursors
+    page = run("job_page", filters, sort, descending, cursors[-1], limit=PAGE_SIZE + 1)
+    more, page = len(page) > PAGE_SIZE, page.head(PAGE_SIZE)
+    if page.empty:
+        st.info("No postings " + ("with a salary " if sort == "salary" else "") + "for current filters.")
+    else:
+        with render.timer("chart.listings", len(page)):
+            details = run("job_details", tuple(page["id"]), ("id", "url", "description")).set_index("id")
+            page["url"] = page["id"].map(details["url"])
+            page["description"] = page["id"].map(details["description"]).fillna("").str.slice(0, 200)
+            picked = st.dataframe(
+                page.drop(columns=["id", "sort_value"]), hide_index=True, use_container_width=True,
+                on_select="rerun", selection_mode="single-row", key="listing_table_v1",
+                column_config={"posted_date": "Posted", "city_clean": "City", "role_bucket": "Role",
+                               "salary_min": st.column_config.NumberColumn("Salary from", format="$%d"),
+                               "salary_max": st.column_config.NumberColumn("Salary to", format="$%d"),
+                               "url": st.column_config.LinkColumn("Link", display_text="open")})
+            rows = picked.selection.rows if picked else []
+            if rows:
+                job = page.iloc[rows[0]]
+                with st.expander(f"{job['title']} — {job['company'] or 'unknown company'}", expanded=True):
+                    st.write(details.at[job["id"], "description"] or "No description.")
+        nav1, nav2, nav3 = st.columns([1, 1, 4])
+        nav1.button("← Previous", disabled=len(cursors) == 1, on_click=cursors.pop, key="listing_prev_v1")
+        nav2.button("Next →", disabled=not more, on_click=cursors.append, key="listing_next_v1",
+                    args=((page["sort_value"].iloc[-1].item(), page["id"].iloc[-1]),))
+        nav3.caption(f"Page {len(cursors)}")
 
 st.divider()
-st.write("Rows after filters:", len(view))
-st.write("Median salary by city", view.groupby("city_clean")["salary_avg"].median().dropna().sort_values(ascending=False))
-
+st.write("Rows after filters:", run("row_count", filters))
+term = st.text_input("Count postings mentioning a term (e.g. a skill not in skills.yml)", "", key="term_count_v1")
+if term.strip():
+    st.write(f"Postings mentioning “{term.strip()}”:", run("term_count", term, filters))
+st.write("Median salary by city", run("median_salary_by_city", filters).set_index("city_clean")["median_salary"])
+
+if debug:
+    with st.expander("Debug: timings for this render", expanded=True):
+        d = render.to_dict()
+        st.write(f"Render {(time.perf_counter() - t_start) * 1000:.0f} ms • data version {version} • "
+                 f"{d['counters'].get('cache_hits', 0)} cache hits, {d['counters'].get('cache_misses', 0)} misses")
+        st.dataframe(pd.DataFrame([{"stage": k, "ms": round(v["seconds"] * 1000, 1), "calls": v["calls"],
+                                    "rows": v["rows"]} for k, v in d["stages"].items()]).sort_values("ms", ascending=False),
+                     hide_index=True)
+        if hasattr(q, "recent_runs"):  # the runs table lives in jobs.db only
+            st.caption("Recent ETL runs")
+            st.dataframe(q.recent_runs(conn, limit=10), hide_index=True)  # uncached: runs don't bump the version
+conn.close()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Parallel raw-cache backfill (src/extractors/parallel.py): throughput by worker count.
+
+Fills a throwaway raw cache with synthetic Adzuna pages, backfills a fresh jobs.db from it
+at each worker count and checks every run produced the same jobs/skills as the first.
+Parsing, cleaning, skill matching and MinHash scale with workers; the writer's commits (plus
+the final FTS rebuild and near-duplicate pass) do not, so speed-up tops out near
+elapsed / writer-busy time.
+
+    python -m scripts.bench_backfill --rows 100000 --workers 1 2 4 8
+    python -m scripts.bench_backfill --rows 1000000 --workers 1 4 8 16
+"""
+import argparse, hashlib, os, random, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from scripts.stub_adzuna import fake_result  # noqa: E402
+from src.common.db import connect  # noqa: E402
+from src.common.rawcache import RawCache  # noqa: E402
+from src.extractors import parallel  # noqa: E402
+
+QUERIES = ["data analyst", "data engineer", "data scientist", "bi developer", "analytics engineer"]
+SKILLS = "python sql tableau excel airflow dbt spark aws azure snowflake".split()
+FILLER = ("we are looking for an experienced analyst to join our growing team you will work with "
+          "stakeholders across the business to deliver insights reporting and data products in a "
+          "collaborative hybrid environment with flexible hours and great benefits apply now").split()
+
+
+def fill(cache_path, rows, per_page=50):
+    rng = random.Random(5)
+    cache = RawCache(cache_path)
+    per_query = rows // len(QUERIES)
+    for q in QUERIES:
+        for page in range(1, per_query // per_page + 1):
+            results = [fake_result(q, "", (page - 1) * per_page + i) for i in range(per_page)]
+            for r in results:
+                r["description"] = " ".join(rng.choices(FILLER, k=75) + rng.sample(SKILLS, 4))
+            cache.put(("au", q, None), page, {"count": per_query, "results": results}, "2025-08-01")
+    cache.close()
+
+
+def digest(db):
+    h = hashlib.sha1()
+    with connect("read", db) as conn:
+        for sql in ("SELECT * FROM jobs ORDER BY id", "SELECT * FROM job_skills ORDER BY 1, 2"):
+            for row in conn.execute(sql):
+                h.update(repr(row).encode())
+    return h.hexdigest()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument("--chunk", type=int, default=50, help="cached pages per task")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / "raw.db"
+        t0 = time.perf_counter()
+        fill(cache_path, args.rows)
+        print(f"cache: {args.rows:,} postings in {time.perf_counter() - t0:.1f}s • {os.cpu_count()} CPUs")
+        base = first = None
+        for w in sorted(set(args.workers)):
+            db = Path(tmp) / f"jobs_{w}.db"
+            t0 = time.perf_counter()
+            with connect(path=db) as conn:
+                res = parallel.backfill_cache(conn, cache_path, workers=w, chunk_pages=args.chunk)
+            s = time.perf_counter() - t0
+            base = base or s
+            same = "" if first is None else (" • same rows" if digest(db) == first else " • ROWS DIFFER")
+            first = first or digest(db)
+            print(f"{w:>3} workers: {s:6.1f}s • {res['read'] / s:8,.0f} postings/s • "
+                  f"x{base / s:.2f} vs {min(args.workers)} worker(s) • single writer busy "
+                  f"{res['write_s']:.1f}s{same}")
+
+
+if __name__ == "__main__":
+    main()
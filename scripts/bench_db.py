@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Rows/sec of the old per-row INSERT OR REPLACE path vs the chunked single-transaction upsert.
+
+    python -m scripts.bench_db --rows 100000
+"""
+import argparse, random, sqlite3, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.common.db import _m1_base, connect, init_db, insert_skills, upsert_jobs  # noqa: E402
+from src.common.models import Job  # noqa: E402
+
+
+def synthetic_jobs(n, rng):
+    for i in range(n):
+        smin = rng.choice([None, rng.randint(60, 150) * 1000])
+        yield Job(id=str(5_000_000_000 + i), title=f"Data Analyst {i % 300}", company=f"Company {i % 997}",
+                  location=rng.choice(["Perth, Perth Region", "Sydney, New South Wales", "Melbourne, Victoria"]),
+                  source="adzuna", posted_date=f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                  description="python sql tableau stakeholders reporting " * 20,
+                  url=f"https://example.invalid/{i}", salary_min=smin,
+                  salary_max=smin + 20_000 if smin else None, salary_avg=smin + 10_000 if smin else None,
+                  currency="AUD")
+
+
+def legacy_upsert(path, jobs, hits):
+    # previous db.upsert_jobs + insert_skills: default pragmas, one execute per job, a connection each
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    cur = conn.cursor()
+    for j in jobs:
+        cur.execute(
+            '''INSERT OR REPLACE INTO jobs
+               (id,title,company,location,source,posted_date,description,url,
+                salary_min,salary_max,salary_avg,currency)
+               VALUES (?,?,?,?,?,?,?,?,?,?,?,?)''',
+            (j.id, j.title, j.company, j.location, j.source, j.posted_date, j.description, j.url,
+             j.salary_min, j.salary_max, j.salary_avg, j.currency))
+    conn.commit()
+    conn.close()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.executemany('INSERT INTO skills (job_id, skill) VALUES (?,?)', [(h["job_id"], h["skill"]) for h in hits])
+    conn.commit()
+    conn.close()
+
+
+def bulk_upsert(path, jobs, hits):
+    with connect(path=path) as conn:
+        upsert_jobs(jobs, conn)
+        insert_skills(hits, conn)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+    jobs = list(synthetic_jobs(args.rows, random.Random(3)))
+    hits = [{"job_id": j.id, "skill": s} for j in jobs for s in ("python", "sql", "tableau")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fn in [("legacy", legacy_upsert), ("bulk", bulk_upsert)]:
+            path = Path(tmp) / f"{name}.db"
+            with connect("default", path) as conn:
+                # the legacy path writes the original schema (skills is a view after migration 2)
+                _m1_base(conn) if name == "legacy" else init_db(conn)
+            for label in ("insert", "re-upsert"):
+                t0 = time.perf_counter()
+                fn(path, jobs, hits if label == "insert" else [])
+                dt = time.perf_counter() - t0
+                print(f"{name:>7} {label:>9}: {len(jobs):,} rows in {dt:.2f}s • {len(jobs) / dt:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Serial requests.get vs the pooled concurrent fetcher, both against the local stub server.
+
+    python -m scripts.bench_fetch --queries 40 --pages 4 --latency-ms 40
+"""
+import argparse, sys, time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from scripts.stub_adzuna import serve  # noqa: E402
+from src.common.fetch import AdzunaFetcher  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=40)
+    ap.add_argument("--pages", type=int, default=4)
+    ap.add_argument("--per-query", type=int, default=180, help="results available per query (180 = 3.6 pages)")
+    ap.add_argument("--latency-ms", type=float, default=40)
+    ap.add_argument("--error-rate", type=float, default=0.02)
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--rate-per-min", type=float, default=60_000, help="token bucket rate (stub has no quota)")
+    args = ap.parse_args()
+
+    srv, base = serve(0, args.per_query, args.latency_ms, args.error_rate)
+    targets = [("au", f"query {i}", None) for i in range(args.queries)]
+
+    t0, pages = time.perf_counter(), 0
+    for _, q, _ in targets:
+        for p in range(1, args.pages + 1):
+            r = requests.get(base.format(country="au", page=p),
+                             params={"what": q, "results_per_page": 50}, timeout=20)
+            if r.status_code == 429:
+                continue
+            pages += 1
+    serial = time.perf_counter() - t0
+    print(f"serial   : {pages} pages in {serial:.2f}s • {pages / serial:.1f} pages/s")
+
+    f = AdzunaFetcher("id", "key", base=base, workers=args.workers, rate_per_min=args.rate_per_min,
+                      burst=args.workers, backoff=0.01)
+    for _ in f.fetch_all(targets, args.pages):
+        pass
+    print(f"pooled   : {f.stats}")
+    srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Load time and peak RSS: the old `SELECT * FROM jobs` into pandas vs the Parquet export.
+
+Each loader runs in a fresh interpreter so its peak RSS is its own.
+
+    python -m scripts.bench_parquet --rows 100000
+"""
+import argparse, json, random, resource, subprocess, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def load(mode, db, root):
+    import pandas as pd
+    from src.common import columnar
+
+    if mode == "sqlite":  # what the Dashboard's load_tables() did
+        import sqlite3
+        conn = sqlite3.connect(db)
+        jobs = pd.read_sql_query("SELECT * FROM jobs", conn)
+        skills = pd.read_sql_query("SELECT * FROM skills", conn)
+        conn.close()
+        return len(jobs), len(skills)
+    if mode == "parquet-all":
+        jobs = columnar.read_jobs([f.name for f in columnar.JOBS_SCHEMA], root=root, include_dups=True)
+        return len(jobs), columnar.dataset("skills", root).count_rows()
+    snap = columnar.Snapshot(root)  # Dashboard backend: projected columns, non-dup rows
+    return len(snap.jobs), len(snap.skills)
+
+
+def build(rows, db, root):
+    from scripts.bench_db import synthetic_jobs
+    from src.common.columnar import export
+    from src.common.db import connect, init_db, set_job_skills, upsert_jobs
+
+    jobs = list(synthetic_jobs(rows, random.Random(3)))
+    with connect(path=db) as conn:
+        init_db(conn)
+        upsert_jobs(jobs, conn)
+        set_job_skills(((j.id, ["python", "sql", "tableau"]) for j in jobs), "bench", conn)
+    with connect("read", db) as conn:
+        t0 = time.perf_counter()
+        export(conn, root)
+        print(json.dumps({"s": time.perf_counter() - t0}))
+
+
+def child(mode, db, root):
+    t0 = time.perf_counter()
+    rows = load(mode, db, root)
+    print(json.dumps({"s": time.perf_counter() - t0, "rows": rows,
+                      "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--child", nargs=3, metavar=("MODE", "DB", "DIR"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        mode, db, root = args.child
+        return build(args.rows, Path(db), Path(root)) if mode == "build" else child(mode, db, root)
+
+    def run(mode, db, root):
+        # the parent stays small: a child's peak RSS starts from its parent's on Linux
+        out = subprocess.run([sys.executable, "-m", "scripts.bench_parquet", "--rows", str(args.rows),
+                              "--child", mode, str(db), str(root)],
+                             capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parents[1])
+        return json.loads(out.stdout)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, root = Path(tmp) / "jobs.db", Path(tmp) / "parquet"
+        print(f"export: {args.rows:,} rows in {run('build', db, root)['s']:.2f}s")
+        for mode in ("sqlite", "parquet-all", "parquet"):
+            r = run(mode, db, root)
+            print(f"{mode:>12}: {r['s']:.2f}s • peak RSS {r['rss_mb']:.0f} MB • {r['rows'][0]:,} jobs, {r['rows'][1]:,} skills")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark over synthetic postings (scripts/synth_adzuna.py), one size at a time.
+
+Stages: fetch (pooled fetcher against the local stub), parse, skill extraction, MinHash
+signatures, DB writes (the ingest path: upsert + skills + signatures per batch), near-duplicate
+clustering, and every Dashboard query with no filter, a city filter and a keyword. Each size
+runs in a fresh process, so its peak RSS is its own.
+
+Results are appended as JSON lines (one per stage) tagged with the git commit, and compared
+with the latest earlier commit's numbers for the same stage and size:
+
+    python -m scripts.bench_pipeline                        # 10k and 100k rows
+    python -m scripts.bench_pipeline --rows 10000 100000 1000000 --out data/bench_results.jsonl
+    python -m scripts.bench_pipeline --rows 10000 --only parse skills db_write
+"""
+import argparse, json, os, platform, resource, subprocess, sys, tempfile, time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+STAGES = ["generate", "fetch", "parse", "skills", "minhash", "db_write", "near_dups", "queries"]
+QUERIES = ["filter_options", "row_count", "skill_counts", "salary_histogram", "state_counts", "weekly_trend",
+           "median_salary_by_city", "search", "term_count"]
+
+
+def timed(fn, repeat=1):
+    """Best-of-`repeat` seconds, plus the last result."""
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def run_size(rows, only, fetch_rows, batch):
+    """All stages at one size; yields result dicts."""
+    from scripts.stub_adzuna import serve
+    from scripts.synth_adzuna import QUERIES as TERMS, Synth
+    from src.common import neardup, queries as q
+    from src.common.db import connect, init_db, set_job_skills, text_hash, upsert_jobs
+    from src.common.fetch import AdzunaFetcher
+    from src.common.skills import get_matcher
+    from src.extractors.etl_adzuna import parse_records
+
+    want = lambda stage: not only or stage in only  # noqa: E731
+    synth = Synth()
+    s, pages = timed(lambda: list(synth.pages(rows)))
+    yield {"stage": "generate", "n": rows, "seconds": s}
+
+    if want("fetch"):
+        n = min(rows, fetch_rows)
+        per_query = -(-n // len(TERMS))
+        srv, base = serve(0, per_query, latency_ms=0, result=synth.result)
+        f = AdzunaFetcher("id", "key", base=base, workers=8, rate_per_min=1e9, burst=8, backoff=0.01)
+        s, got = timed(lambda: sum(len(p["results"]) for _, _, p in
+                                   f.fetch_all([("au", t, None) for t in TERMS], -(-per_query // 50))))
+        srv.shutdown()
+        yield {"stage": "fetch", "n": got, "seconds": s, "p95_ms": f.stats.summary().get("p95_ms")}
+
+    s, recs = timed(lambda: [r for _, _, p in pages for r in parse_records(p)])
+    if want("parse"):
+        yield {"stage": "parse", "n": len(recs), "seconds": s}
+    texts = [f"{r.title} {r.description}" for r in recs]
+    matcher = get_matcher()
+    s, skills = timed(lambda: matcher.match_many(texts))
+    if want("skills"):
+        yield {"stage": "skills", "n": len(texts), "seconds": s}
+    s, sigs = timed(lambda: neardup.signatures(neardup.job_text(r.title, r.description) for r in recs))
+    if want("minhash"):
+        yield {"stage": "minhash", "n": len(recs), "seconds": s}
+    if not {"db_write", "near_dups", "queries"} & set(only or STAGES):
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "jobs.db"
+        with connect(path=db) as conn:
+            init_db(conn)
+            conn.commit()
+
+            def write():
+                for lo in range(0, len(recs), batch):  # what pipeline.DbSink does per batch
+                    chunk = recs[lo:lo + batch]
+                    with conn:
+                        upsert_jobs(chunk, conn)
+                        set_job_skills(zip((r.id for r in chunk), skills[lo:lo + batch]), matcher.version, conn)
+                        neardup.store_signatures(conn, [r.id for r in chunk],
+                                                 [text_hash(r.title, r.description) for r in chunk], sigs[lo:lo + batch])
+            s, _ = timed(write)
+            yield {"stage": "db_write", "n": len(recs), "seconds": s,
+                   "db_mb": round(db.stat().st_size / 2**20, 1)}
+            with conn:
+                s, res = timed(lambda: neardup.recluster(conn))
+            if want("near_dups"):
+                yield {"stage": "near_dups", "n": res["jobs"], "seconds": s, "near_dups": res["near_dups"]}
+
+        if want("queries"):
+            rconn = q.connect(db)
+            filters = {"all": q.Filters(), "city": q.Filters(city="Sydney"), "keyword": q.Filters(keyword="python")}
+            for name in QUERIES:
+                fn = getattr(q, name)
+                for label, f in filters.items():
+                    if name == "filter_options":
+                        if label != "all":
+                            continue
+                        call = lambda: fn(rconn)  # noqa: E731
+                    elif name == "search":
+                        call = lambda: fn(rconn, "data engineer", f, limit=20)  # noqa: E731
+                    elif name == "term_count":
+                        call = lambda: fn(rconn, "stakeholders", f)  # noqa: E731
+                    else:
+                        call = lambda: fn(rconn, f)  # noqa: E731
+                    s, _ = timed(call, repeat=3)
+                    yield {"stage": f"query.{name}.{label}", "n": rows, "seconds": s}
+            rconn.close()
+
+
+def git_rev():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return rev, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def compare(results, out, threshold):
+    """Print each stage next to the latest result for the same stage/size from another commit."""
+    if not out.exists():
+        return
+    current = results[0]["commit"] if results else None
+    prev = {}
+    for line in out.read_text().splitlines():
+        r = json.loads(line)
+        if r.get("commit") != current:
+            prev[(r["stage"], r["rows"])] = r
+    for r in results:
+        p = prev.get((r["stage"], r["rows"]))
+        if not p or not p["seconds"]:
+            continue
+        change = r["seconds"] / p["seconds"] - 1
+        flag = "  REGRESSION" if change > threshold and r["seconds"] > 0.005 else ""
+        print(f"  {r['stage']:<36} {r['rows']:>9,}  {p['seconds']:8.3f}s → {r['seconds']:8.3f}s "
+              f"({change:+.0%} vs {p['commit']}){flag}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--only", nargs="+", choices=STAGES, help="stages to run (default: all)")
+    ap.add_argument("--fetch-rows", type=int, default=20_000, help="cap on postings fetched over HTTP")
+    ap.add_argument("--batch", type=int, default=500, help="rows per write transaction, as in the ETL")
+    ap.add_argument("--out", type=Path, default=ROOT / "data" / "bench_results.jsonl")
+    ap.add_argument("--threshold", type=float, default=0.15, help="slowdown reported as a regression")
+    ap.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        for r in run_size(args.child, args.only, args.fetch_rows, args.batch):
+            print(json.dumps(r), flush=True)
+        print(json.dumps({"stage": "peak_rss", "n": args.child, "seconds": 0,
+                          "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)}))
+        return
+
+    commit, dirty = git_rev()
+    meta = {"commit": commit, "dirty": dirty, "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(), "cpus": os.cpu_count()}
+    results = []
+    for rows in args.rows:
+        cmd = [sys.executable, "-m", "scripts.bench_pipeline", "--child", str(rows), "--fetch-rows",
+               str(args.fetch_rows), "--batch", str(args.batch)] + (["--only", *args.only] if args.only else [])
+        proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode:
+            sys.exit(f"{rows:,} rows failed:\n{proc.stderr}")
+        print(f"{rows:,} rows")
+        for line in proc.stdout.splitlines():
+            r = json.loads(line)
+            r = {**meta, "rows": rows, **r}
+            if r["seconds"]:
+                r["per_s"] = round(r["n"] / r["seconds"])
+            results.append(r)
+            extra = f"{r['rss_mb']:,} MB" if "rss_mb" in r else f"{r['seconds']:8.3f}s" + (
+                f"  {r['per_s']:>10,}/s" if not r["stage"].startswith("query.") else "")
+            print(f"  {r['stage']:<36} {extra}")
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    print(f"vs earlier commits ({args.out}):")
+    compare(results, args.out, args.threshold)
+    with open(args.out, "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in results)
+
+
+if __name__ == "__main__":
+    main()
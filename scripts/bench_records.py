@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Parse Adzuna pages into pydantic Jobs (etl_adzuna.parse) vs JobRecords (parse_records).
+
+Reports jobs/s for parsing alone and for parse + db.job_row (what upsert_jobs does per row),
+and the memory the parsed records hold per 100k jobs.
+
+    python -m scripts.bench_records --rows 100000
+"""
+import argparse, gc, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from scripts.stub_adzuna import fake_result  # noqa: E402
+from src.common.db import job_rows  # noqa: E402
+from src.extractors.etl_adzuna import parse, parse_records  # noqa: E402
+
+
+def pages(rows, per_page=50):
+    out = []
+    for lo in range(0, rows, per_page):
+        results = [fake_result("data analyst", "", n) for n in range(lo, min(lo + per_page, rows))]
+        for r in results:
+            r["salary_currency"] = "AUD"
+            r["description"] = r["description"] * 8  # Adzuna snippets run to ~500 characters
+        out.append({"count": rows, "results": results})
+    return out
+
+
+def timed(fn, payloads):
+    gc.collect()
+    t0 = time.perf_counter()
+    out = [j for p in payloads for j in fn(p)]
+    return out, time.perf_counter() - t0
+
+
+def held_mb(fn, payloads):
+    """Bytes allocated by parsing that are still alive while the records are (strings shared
+    with the payload excluded, as both paths share them)."""
+    gc.collect()
+    tracemalloc.start()
+    out = [j for p in payloads for j in fn(p)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, current / 1024 / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+    payloads = pages(args.rows)
+    per = 100_000 / args.rows
+    for name, fn in (("pydantic Job", parse), ("JobRecord", parse_records)):
+        jobs, s = timed(fn, payloads)
+        rows_s = time.perf_counter()
+        rows = list(job_rows(jobs))
+        rows_s = time.perf_counter() - rows_s
+        del jobs, rows
+        _, mb = held_mb(fn, payloads)
+        print(f"{name:>13}: parse {args.rows / s:9,.0f} jobs/s • parse + job_row {args.rows / (s + rows_s):8,.0f} jobs/s"
+              f" • {mb * per:6.1f} MB held per 100k")
+
+
+if __name__ == "__main__":
+    main()
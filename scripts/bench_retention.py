@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Retention (src/common/retention.py) on a synthetic multi-year jobs.db.
+
+Builds a DB with --years of postings, times the Dashboard queries, archives everything older
+than --retain-days, compresses descriptions older than --compress-days, compacts, and times
+the queries again. The rollup-backed answers (row counts, weekly trend, listings by state,
+median salaries) must be identical before and after, and again after a full rollup rebuild.
+
+    python -m scripts.bench_retention --rows 100000 --years 3
+"""
+import argparse, sys, tempfile, time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from scripts.synth_adzuna import Synth, SynthConfig  # noqa: E402
+from src.common import neardup, queries as q, retention  # noqa: E402
+from src.common.columnar import dataset  # noqa: E402
+from src.common.db import connect, init_db, reflag_all, set_job_skills, text_hash, upsert_jobs  # noqa: E402
+from src.common.skills import get_matcher  # noqa: E402
+from src.extractors.etl_adzuna import parse_records  # noqa: E402
+
+ROLLUP = ["row_count", "weekly_trend", "state_counts", "median_salary_by_city"]
+SCANS = ["skill_counts", "salary_histogram"]
+
+
+def answers(conn, f):
+    return {name: getattr(q, name)(conn, f) for name in ROLLUP}
+
+
+def same(a, b):
+    return all(a[k] == b[k] if isinstance(a[k], int) else a[k].equals(b[k]) for k in a)
+
+
+def timings(db, filters):
+    conn = q.connect(db)
+    out = {}
+    for name in ROLLUP + SCANS:
+        best = float("inf")
+        for _ in range(3):
+            t0 = time.perf_counter()
+            for f in filters:
+                getattr(q, name)(conn, f)
+            best = min(best, time.perf_counter() - t0)
+        out[name] = best * 1000
+    conn.close()
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--years", type=int, default=3)
+    ap.add_argument("--retain-days", type=int, default=365)
+    ap.add_argument("--compress-days", type=int, default=90)
+    args = ap.parse_args()
+
+    synth = Synth(SynthConfig(days=365 * args.years))
+    end = synth.cfg.end
+    filters = [q.Filters(), q.Filters(city="Sydney"), q.Filters(role="Data Engineer")]
+    matcher = get_matcher()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "jobs.db"
+        t0 = time.perf_counter()
+        with connect(path=db) as conn:
+            init_db(conn)
+            for _, _, page in synth.pages(args.rows, per_page=500):
+                recs = parse_records(page)
+                upsert_jobs(recs, conn)
+                set_job_skills(zip((r.id for r in recs), matcher.match_many(f"{r.title} {r.description}" for r in recs)),
+                               matcher.version, conn)
+                neardup.store_signatures(conn, [r.id for r in recs], [text_hash(r.title, r.description) for r in recs],
+                                         neardup.signatures(neardup.job_text(r.title, r.description) for r in recs))
+            neardup.recluster(conn)
+        print(f"Built {args.rows:,} jobs over {args.years} year(s) in {time.perf_counter() - t0:.1f}s")
+
+        before_ms = timings(db, filters)
+        with connect(path=db) as conn:
+            size0 = retention.sizes(conn)
+            want = [answers(conn, f) for f in filters]
+            t0 = time.perf_counter()
+            res = retention.archive(conn, (end - timedelta(days=args.retain_days)).isoformat(), Path(tmp) / "archive")
+            conn.commit()
+            t_archive = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            comp = retention.compress_descriptions(conn, (end - timedelta(days=args.compress_days)).isoformat())
+            conn.commit()
+            t_compress = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            retention.compact(conn)
+            t_compact = time.perf_counter() - t0
+            size1 = retention.sizes(conn)
+            kept = [answers(conn, f) for f in filters]
+            reflag_all(conn)
+            rebuilt = [answers(conn, f) for f in filters]
+            left = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        after_ms = timings(db, filters)
+        archived = dataset("jobs", Path(tmp) / "archive").count_rows()
+
+    print(f"archive {t_archive:.1f}s ({res['jobs']:,} jobs, {len(res['months'])} months; {archived:,} rows in Parquet, "
+          f"{left:,} left) • compress {t_compress:.1f}s ({comp['jobs']:,} descriptions, "
+          f"{comp['raw_bytes'] / 2**20:.1f} → {comp['compressed_bytes'] / 2**20:.1f} MB) • compact {t_compact:.1f}s")
+    print(f"jobs.db {size0['db_mb'] + size0['wal_mb']:.1f} MB → {size1['db_mb'] + size1['wal_mb']:.1f} MB")
+    print(f"rollup answers unchanged: {all(map(same, want, kept))} • after rebuild_rollups: {all(map(same, want, rebuilt))}")
+    print(f"{'query (ms, 3 filters)':<24} {'full history':>12} {'retained':>10}")
+    for name in ROLLUP + SCANS:
+        print(f"{name:<24} {before_ms[name]:12.1f} {after_ms[name]:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
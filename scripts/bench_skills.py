@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Throughput of the compiled skill matcher vs the old reload-and-scan extract_skills.
+
+    python -m scripts.bench_skills --texts 1000 10000 100000 --skills 20 500 5000
+"""
+import argparse, random, string, sys, tempfile, time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.common.skills import SkillMatcher  # noqa: E402
+
+WORDS = ("data analyst engineer team role stakeholders reporting business insights build pipelines "
+         "experience strong modelling dashboards cloud platform senior junior hybrid office").split()
+
+
+def legacy_extract(text, yml):
+    # verbatim copy of the previous implementation: YAML parse + substring scan on every call
+    text = (text or "").lower()
+    skills = yaml.safe_load(yml.read_text())["skills"]
+    hits = []
+    for s in skills:
+        if s.lower() in text:
+            hits.append(s.lower())
+    return hits
+
+
+def make_taxonomy(n, rng):
+    base = yaml.safe_load((Path(__file__).resolve().parents[1] / "config" / "skills.yml").read_text())["skills"]
+    out = list(base[:n])
+    while len(out) < n:
+        w = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        out.append(w if rng.random() < 0.7 else f"{w} {rng.choice(WORDS)}")
+    return list(dict.fromkeys(out))
+
+
+def make_texts(n, skills, rng):
+    texts = []
+    for _ in range(n):
+        words = rng.choices(WORDS, k=rng.randint(60, 160))
+        for s in rng.sample(skills, k=min(len(skills), rng.randint(1, 6))):
+            words.insert(rng.randrange(len(words)), s)
+        texts.append(" ".join(words))
+    return texts
+
+
+def rate(fn, texts):
+    t0 = time.perf_counter()
+    fn(texts)
+    return len(texts) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--texts", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--skills", type=int, nargs="+", default=[20, 500, 5_000])
+    ap.add_argument("--legacy-cap", type=int, default=500,
+                    help="legacy path is timed on at most this many texts and reported as texts/sec")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'skills':>7} {'texts':>8} {'legacy/s':>12} {'compiled/s':>12} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        yml = Path(tmp) / "skills.yml"
+        for n_sk in args.skills:
+            skills = make_taxonomy(n_sk, rng)
+            yml.write_text(yaml.safe_dump({"skills": skills}))
+            t0 = time.perf_counter()
+            matcher = SkillMatcher.from_yaml(yml)
+            compile_ms = (time.perf_counter() - t0) * 1000
+            corpus = make_texts(max(args.texts), skills, rng)
+            for n in args.texts:
+                texts = corpus[:n]
+                legacy = rate(lambda ts: [legacy_extract(t, yml) for t in ts], texts[:args.legacy_cap])
+                fast = rate(matcher.match_many, texts)
+                print(f"{n_sk:>7} {n:>8} {legacy:>12,.0f} {fast:>12,.0f} {fast / legacy:>8.1f}x")
+            print(f"{'':>7} compile: {compile_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Adzuna search endpoint, for exercising the fetcher offline.
+
+    python -m scripts.stub_adzuna --port 8765 --per-query 180 --latency-ms 40 --error-rate 0.05
+    python -m scripts.stub_adzuna --synthetic --per-query 20000   # realistic postings (scripts/synth_adzuna.py)
+    base = "http://127.0.0.1:8765/v1/api/jobs/{country}/search/{page}"
+"""
+import argparse, hashlib, json, random, threading, time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CITIES = ["Perth, Perth Region", "Sydney, New South Wales", "Melbourne, Victoria",
+          "Brisbane, Queensland", "Adelaide, South Australia", "Hobart, Tasmania"]
+
+
+def fake_result(query: str, where: str, n: int) -> dict:
+    h = int(hashlib.md5(f"{query}|{where}|{n}".encode()).hexdigest()[:8], 16)
+    smin = 60_000 + (h % 80) * 1_000
+    return {
+        "id": str(4_000_000_000 + h % 1_000_000_000),
+        "title": f"{query.title()} {n}",
+        "company": {"display_name": f"Company {h % 97}"},
+        "location": {"display_name": where or CITIES[h % len(CITIES)]},
+        "created": f"2025-08-{1 + h % 28:02d}T00:00:00Z",
+        "description": f"{query} role using python, sql and tableau. Posting {n}.",
+        "redirect_url": f"https://example.invalid/{h}",
+        "salary_min": smin, "salary_max": smin + 20_000,
+        "category": {"label": "IT Jobs"},
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_handler(per_query: int, latency_ms: float, error_rate: float, result=fake_result):
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    @lru_cache(maxsize=64)
+    def by_date(query: str, where: str) -> list:
+        return sorted((result(query, where, i) for i in range(per_query)), key=lambda r: r["created"], reverse=True)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            with lock:
+                fail = rng.random() < error_rate
+            if fail:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            u = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(u.query).items()}
+            page = int(u.path.rstrip("/").rsplit("/", 1)[-1])
+            size = int(q.get("results_per_page", 50))
+            lo, hi = (page - 1) * size, min(page * size, per_query)
+            what, where = q.get("what", ""), q.get("where", "")
+            if q.get("sort_by") == "date":
+                results = by_date(what, where)[lo:hi]
+            else:  # only build the requested page
+                results = [result(what, where, i) for i in range(lo, hi)]
+            body = json.dumps({"count": per_query, "results": results}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def serve(port: int = 0, per_query: int = 180, latency_ms: float = 40, error_rate: float = 0.0,
+          result=fake_result):
+    """Start the stub on a daemon thread; returns (server, base_url_template).
+
+    result(query, where, n) builds the n-th posting of a search (default: fake_result).
+    """
+    srv = _Server(("127.0.0.1", port), make_handler(per_query, latency_ms, error_rate, result))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/v1/api/jobs/{{country}}/search/{{page}}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--per-query", type=int, default=180)
+    ap.add_argument("--latency-ms", type=float, default=40)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--synthetic", action="store_true", help="serve scripts/synth_adzuna.py postings")
+    a = ap.parse_args()
+    result = fake_result
+    if a.synthetic:
+        from scripts.synth_adzuna import Synth
+        result = Synth().result
+    srv, base = serve(a.port, a.per_query, a.latency_ms, a.error_rate, result)
+    print(f"stub Adzuna at {base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Synthetic Adzuna search results with a known shape, for benchmarks and offline runs.
+
+Posting n is a pure function of (seed, n), so any slice can be generated on its own (the
+stub server serves pages straight from it). Knobs: city mix, skills per job and how skewed
+the taxonomy is, salary level/spread per role, share without salary or in "k" shorthand,
+and the share of exact reposts (same ad, new id) and near-duplicate reposts (tweaked title
+and a few edited words).
+
+    python -m scripts.synth_adzuna --postings 100000 --out /tmp/synth.jsonl     # one page per line
+    python -m scripts.synth_adzuna --postings 100000 --cache /tmp/raw_cache.db  # for replay/backfill
+    python -m scripts.stub_adzuna --synthetic                                   # served over HTTP
+"""
+import argparse, json, math, random, sys, zlib
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.common.skills import SKILLS_YML  # noqa: E402
+
+CITIES = {  # Adzuna display name -> share of postings
+    "Sydney, New South Wales": 0.28, "Surry Hills, Sydney": 0.04, "Melbourne, Victoria": 0.22,
+    "Brisbane, Queensland": 0.12, "Perth, Perth Region": 0.09, "Adelaide, South Australia": 0.06,
+    "Canberra, ACT": 0.06, "Hobart, Tasmania": 0.02, "Darwin, Northern Territory": 0.01,
+    "Newcastle, NSW - Warabrook": 0.02, "Australia": 0.08,
+}
+ROLES = {  # title -> median advertised salary (AUD)
+    "Data Analyst": 95_000, "Data Engineer": 135_000, "Data Scientist": 130_000, "BI Developer": 110_000,
+    "Analytics Engineer": 125_000, "Machine Learning Engineer": 150_000, "Reporting Analyst": 85_000,
+    "Business Analyst": 105_000,
+}
+SENIORITY = {"": 1.0, "Senior ": 1.25, "Junior ": 0.75, "Lead ": 1.4, "Graduate ": 0.65}
+QUERIES = ["data analyst", "data engineer", "data scientist", "bi developer", "analytics engineer"]
+FILLER = ("we are looking for an experienced professional to join our growing team you will work "
+          "closely with stakeholders across the business to deliver insights reporting and data "
+          "products in a collaborative hybrid environment with flexible hours career development "
+          "and great benefits apply now to be part of an award winning organisation").split()
+TWEAKS = ["{} - Contract", "{} (Hybrid)", "{} | Immediate Start", "{} - 6 Month Contract"]
+
+
+@dataclass
+class SynthConfig:
+    seed: int = 0
+    cities: Dict[str, float] = field(default_factory=lambda: dict(CITIES))
+    skills_per_job: float = 4.0  # mean distinct skills mentioned per posting
+    skill_skew: float = 1.1  # Zipf exponent over the taxonomy order (python, sql, ... most common)
+    alias_share: float = 0.1  # skill mentions spelt as an alias from skills.yml
+    salary_share: float = 0.6  # postings with a salary at all
+    salary_sigma: float = 0.2  # log-normal spread around the role median
+    shorthand_share: float = 0.02  # salaries written as 95 for 95,000
+    dup_share: float = 0.05  # exact reposts of an earlier posting under a new id
+    near_dup_share: float = 0.05  # reposts with a tweaked title and a few words changed
+    description_words: int = 90
+    end: date = date(2025, 8, 31)
+    days: int = 180
+
+
+class Synth:
+    def __init__(self, cfg: Optional[SynthConfig] = None):
+        self.cfg = cfg = cfg or SynthConfig()
+        tax = yaml.safe_load(SKILLS_YML.read_text()) or {}
+        self.skills = list(tax.get("skills") or [])
+        self.aliases: Dict[str, List[str]] = {}
+        for alias, canon in (tax.get("aliases") or {}).items():
+            self.aliases.setdefault(canon, []).append(alias)
+        self.skill_w = [1 / (i + 1) ** cfg.skill_skew for i in range(len(self.skills))]
+        self.city_names, self.city_w = list(cfg.cities), list(cfg.cities.values())
+        self.roles = list(ROLES)
+
+    def _rng(self, n: int) -> random.Random:
+        return random.Random(self.cfg.seed * 1_000_003 + n)
+
+    def posting(self, n: int) -> dict:
+        """The n-th posting, as one item of an Adzuna `results` list."""
+        cfg, rng = self.cfg, self._rng(n)
+        kind = rng.random()
+        if n and kind < cfg.dup_share + cfg.near_dup_share:
+            base = self.posting(rng.randrange(max(0, n - 5_000), n))
+            base["id"] = str(6_000_000_000 + n)
+            base["redirect_url"] = f"https://example.invalid/ad/{n}"
+            if kind >= cfg.dup_share:  # near-duplicate: agency repost a few days later
+                base["title"] = rng.choice(TWEAKS).format(base["title"])
+                words = base["description"].split()
+                for _ in range(2):
+                    words[rng.randrange(len(words))] = rng.choice(FILLER)
+                base["description"] = " ".join(words)
+                created = date.fromisoformat(base["created"][:10]) + timedelta(days=rng.randint(1, 7))
+                base["created"] = f"{min(created, cfg.end).isoformat()}T00:00:00Z"
+            return base
+
+        role = rng.choice(self.roles)
+        level = rng.choices(list(SENIORITY), weights=[5, 3, 1, 1, 1])[0]
+        k = max(1, min(len(self.skills), round(rng.gauss(cfg.skills_per_job, 1.5))))
+        picked = set()
+        while len(picked) < k:
+            picked.add(rng.choices(self.skills, weights=self.skill_w)[0])
+        words = rng.choices(FILLER, k=cfg.description_words)
+        for s in picked:
+            if s in self.aliases and rng.random() < cfg.alias_share:
+                s = rng.choice(self.aliases[s])
+            words.insert(rng.randrange(len(words) + 1), s + ",")
+        item = {
+            "id": str(6_000_000_000 + n),
+            "title": f"{level}{role}",
+            "company": {"display_name": f"Company {int(rng.paretovariate(1.2)) % 5000}"},
+            "location": {"display_name": rng.choices(self.city_names, weights=self.city_w)[0]},
+            "created": f"{(cfg.end - timedelta(days=rng.randrange(cfg.days))).isoformat()}T00:00:00Z",
+            "description": " ".join(words),
+            "redirect_url": f"https://example.invalid/ad/{n}",
+            "category": {"label": "IT Jobs"},
+            "contract_time": rng.choice(["full_time", "full_time", "contract", "part_time"]),
+        }
+        if rng.random() < cfg.salary_share:
+            mid = ROLES[role] * SENIORITY[level] * math.exp(rng.gauss(0, cfg.salary_sigma))
+            smin, smax = round(mid * 0.9, -3), round(mid * 1.1, -3)
+            if rng.random() < cfg.shorthand_share:
+                smin, smax = smin // 1000, smax // 1000
+            item.update(salary_min=smin, salary_max=smax, salary_currency="AUD",
+                        salary_is_predicted=str(int(rng.random() < 0.3)))
+        return item
+
+    def result(self, query: str, where: str, n: int) -> dict:
+        """stub_adzuna result hook: the n-th posting of `query`'s own stream."""
+        return self.posting((zlib.crc32(f"{query}|{where}".encode()) % 4096) * 10_000_000 + n)
+
+    def pages(self, total: int, per_page: int = 50, queries: List[str] = QUERIES
+              ) -> Iterator[Tuple[Tuple[str, str, Optional[str]], int, dict]]:
+        """`total` postings split evenly over `queries`, as (target, page, payload) like fetch_all."""
+        per_query = -(-total // len(queries))
+        for qi, q in enumerate(queries):
+            lo, hi = qi * per_query, min((qi + 1) * per_query, total)
+            for p, start in enumerate(range(lo, hi, per_page), 1):
+                yield (("au", q, None), p,
+                       {"count": hi - lo, "results": [self.posting(n) for n in range(start, min(start + per_page, hi))]})
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--postings", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--dup-share", type=float, default=SynthConfig.dup_share)
+    ap.add_argument("--near-dup-share", type=float, default=SynthConfig.near_dup_share)
+    ap.add_argument("--salary-share", type=float, default=SynthConfig.salary_share)
+    ap.add_argument("--skills-per-job", type=float, default=SynthConfig.skills_per_job)
+    out = ap.add_mutually_exclusive_group(required=True)
+    out.add_argument("--out", type=Path, help="JSON lines, one page payload per line")
+    out.add_argument("--cache", type=Path, help="raw cache file (src/common/rawcache.py)")
+    args = ap.parse_args()
+
+    synth = Synth(SynthConfig(seed=args.seed, dup_share=args.dup_share, near_dup_share=args.near_dup_share,
+                              salary_share=args.salary_share, skills_per_job=args.skills_per_job))
+    pages = synth.pages(args.postings)
+    if args.cache:
+        from src.common.rawcache import RawCache
+        cache = RawCache(args.cache)
+        for target, page, payload in pages:
+            cache.put(target, page, payload, synth.cfg.end.isoformat())
+        cache.close()
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for target, page, payload in pages:
+                f.write(json.dumps({"query": target[1], "page": page, **payload}) + "\n")
+    print(f"Wrote {args.postings:,} synthetic postings → {args.out or args.cache}")
+
+
+if __name__ == "__main__":
+    main()
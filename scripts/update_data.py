@@ -1,6 +1,14 @@
 #!/usr/bin/env python3
-import os, sys, csv, requests, datetime as dt
-from urllib.parse import urlencode
+import os, sys, math, datetime as dt
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.common.db import DB_PATH, connect
+from src.common.fetch import AdzunaFetcher
+from src.common.metrics import Metrics, profiled
+from src.common.rawcache import RawCache
+from src.common.skills import get_matcher
+from src.extractors import pipeline as pl
 
 APP_ID  = os.getenv("ADZUNA_APP_ID")
 APP_KEY = os.getenv("ADZUNA_APP_KEY")
@@ -15,129 +23,52 @@ QUERIES = [q.strip() for q in raw.split(",") if q.strip()]
 
 MAX_PER = int(os.getenv("ADZUNA_MAX_RESULTS", "200"))
 PAGE_SZ = 50
-
-def fetch(term: str, page: int):
-    params = {
-        "app_id": APP_ID,
-        "app_key": APP_KEY,
-        "what": term,
-        "results_per_page": PAGE_SZ,
-        "content-type": "application/json",
-    }
-    url = f"https://api.adzuna.com/v1/api/jobs/{COUNTRY}/search/{page}?{urlencode(params)}"
-    r = requests.get(url, timeout=30)
-    r.raise_for_status()
-    return r.json().get("results", [])
-
-now = dt.datetime.utcnow().strftime("%Y%m%d")
-os.makedirs("data", exist_ok=True)
-path = f"data/adzuna_{COUNTRY}_{now}.csv"
-
-fields = [
-    "id","title","company","location","created","category","contract_time",
-    "salary_is_predicted","salary_min","salary_max","redirect_url","search_term"
-]
-
-seen, total = set(), 0
-with open(path, "w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=fields)
-    w.writeheader()
-
-    for term in QUERIES:
-        got, page = 0, 1
-        while got < MAX_PER:
-            results = fetch(term, page)
-            if not results:
-                break
-            for j in results:
-                jid = j.get("id")
-                if not jid or jid in seen:
-                    continue
-                seen.add(jid)
-                w.writerow({
-                    "id": jid,
-                    "title": j.get("title"),
-                    "company": (j.get("company") or {}).get("display_name"),
-                    "location": (j.get("location") or {}).get("display_name"),
-                    "created": j.get("created"),
-                    "category": (j.get("category") or {}).get("label"),
-                    "contract_time": j.get("contract_time"),
-                    "salary_is_predicted": j.get("salary_is_predicted"),
-                    "salary_min": j.get("salary_min"),
-                    "salary_max": j.get("salary_max"),
-                    "redirect_url": j.get("redirect_url"),
-                    "search_term": term,
-                })
-                got += 1
-                total += 1
-                if got >= MAX_PER:
-                    break
-            page += 1
-
-print(f"Saved {total} rows from {len(QUERIES)} term(s) -> {path}")
-
-
-from sqlite_utils import Database
-import re
+BATCH   = int(os.getenv("ADZUNA_BATCH", "500"))       # rows per committed write
+EXPORT  = os.getenv("ADZUNA_EXPORT", "csv").lower()   # csv | jsonl | none
+# newest-first paging that stops at already-seen postings and resumes interrupted runs
+INCREMENTAL = os.getenv("ADZUNA_INCREMENTAL", "0").lower() in ("1", "true", "yes")
+# raw page responses go to data/raw_cache.db (RAW_CACHE) for offline replay unless disabled
+CACHE = os.getenv("ADZUNA_CACHE", "1").lower() in ("1", "true", "yes")
+# refresh the month-partitioned Parquet snapshot (data/parquet, changed months only) afterwards
+PARQUET = os.getenv("ADZUNA_PARQUET", "0").lower() in ("1", "true", "yes")
+# stage timings go to the runs table; also to this file (JSON, or Prometheus text for *.prom)
+METRICS_OUT = os.getenv("ADZUNA_METRICS_OUT")
+PROFILE = os.getenv("ADZUNA_PROFILE")  # cProfile dump path
+
+fetcher = AdzunaFetcher(APP_ID, APP_KEY, results_per_page=PAGE_SZ, timeout=30,
+                        workers=int(os.getenv("ADZUNA_WORKERS", "8")))
 
 now = dt.datetime.utcnow().strftime("%Y%m%d")
 os.makedirs("data", exist_ok=True)
-csv_path = f"data/adzuna_{COUNTRY}_{now}.csv"
-
-fields = [
-    "id","title","company","location","created","category","contract_time",
-    "salary_is_predicted","salary_min","salary_max","redirect_url","search_term","role_bucket"
-]
-
-role_rx = re.compile(r"(analyst|scientist|engineer)", re.I)
-def bucket(title):
-    m = role_rx.search(title or "")
-    if not m: return "Other"
-    t = m.group(1).lower()
-    return {"analyst":"Analyst","scientist":"Scientist","engineer":"Engineer"}[t]
-
-seen = set()
-records = []  # will also go to SQLite
-
-for term in QUERIES:
-    got, page = 0, 1
-    while got < MAX_PER:
-        results = fetch(term, page)
-        if not results: break
-        for j in results:
-            jid = j.get("id")
-            if not jid or jid in seen:
-                continue
-            seen.add(jid)
-            rec = {
-                "id": jid,
-                "title": j.get("title"),
-                "company": (j.get("company") or {}).get("display_name"),
-                "location": (j.get("location") or {}).get("display_name"),
-                "created": j.get("created"),
-                "category": (j.get("category") or {}).get("label"),
-                "contract_time": j.get("contract_time"),
-                "salary_is_predicted": j.get("salary_is_predicted"),
-                "salary_min": j.get("salary_min"),
-                "salary_max": j.get("salary_max"),
-                "redirect_url": j.get("redirect_url"),
-                "search_term": term,
-                "role_bucket": bucket(j.get("title")),
-            }
-            records.append(rec)
-            got += 1
-            if got >= MAX_PER: break
-        page += 1
-
-# Write CSV (optional but handy)
-with open(csv_path, "w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=fields); w.writeheader(); w.writerows(records)
-
-# Upsert into SQLite
-db = Database("data/jobs.db")
-tbl = db["jobs"]
-tbl.upsert_all(records, pk="id", alter=True)
-tbl.create_index(["created"], if_not_exists=True)
-tbl.create_index(["role_bucket"], if_not_exists=True)
-
-print(f"Saved {len(records)} rows → {csv_path} and upserted into data/jobs.db")
\ No newline at end of file
+out_path = f"data/adzuna_{COUNTRY}_{now}.{EXPORT}"
+
+# fetch -> parse -> dedup -> normalise -> sinks; each batch is written and committed as it arrives,
+# so memory stays flat and an interrupted run keeps everything already written
+targets = [(COUNTRY, term, None) for term in QUERIES]
+exports = {"csv": pl.CsvSink, "jsonl": pl.JsonlSink}
+cache = RawCache() if CACHE else None
+metrics = Metrics("update_data", queries=QUERIES, max_per_term=MAX_PER, incremental=INCREMENTAL)
+with profiled(PROFILE), connect() as conn:
+    total, db_sink, sync = pl.ingest(
+        conn, fetcher, targets, math.ceil(MAX_PER / PAGE_SZ), batch_size=BATCH, max_per_term=MAX_PER,
+        exports=[exports[EXPORT](out_path)] if EXPORT in exports else [], incremental=INCREMENTAL,
+        matcher=get_matcher(), cache=cache, metrics=metrics)
+    if PARQUET:
+        from src.common.columnar import PARQUET_DIR, export
+        with metrics.timer("parquet_export"):
+            res = export(conn, PARQUET_DIR)
+        print(f"Parquet: rewrote {len(res['written'])} month(s) → {PARQUET_DIR}")
+    metrics.record(conn)
+if cache is not None:
+    cache.evict()
+    cache.close()
+if METRICS_OUT:
+    metrics.write(METRICS_OUT)
+
+print(f"Fetched {fetcher.stats}" + (f" • stopped early on {sync.stopped_early} target(s)" if sync else ""))
+for t, err in fetcher.stats.failed.items():
+    print(f"  ! {t}: {err}")
+dest = f"{out_path} and " if EXPORT in ("csv", "jsonl") else ""
+print(f"Saved {total} rows from {len(QUERIES)} term(s) → {dest}{DB_PATH} "
+      f"({db_sink.jobs} jobs upserted, {db_sink.skill_links} skill links)")
+print(metrics.summary())
@@ -0,0 +1,56 @@
+import argparse
+import os
+import time
+from src.common.db import connect, init_db, refresh_derived
+from src.common.metrics import Metrics
+from src.extractors import parallel
+
+def main():
+    ap = argparse.ArgumentParser(description="Recompute cleaned/derived job columns for rows already in the DB, "
+                                             "or rebuild jobs/skills in parallel from the raw cache or a new skills.yml")
+    ap.add_argument("--batch", type=int, default=5000)
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--from-cache", action="store_true",
+                      help="replay cached raw pages (like extractors.replay) across --workers processes")
+    mode.add_argument("--skills", action="store_true",
+                      help="re-extract skills (stale rows, or every row with --all) across --workers processes")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk", type=int, default=None,
+                    help="work per task: cached pages (default 50) or jobs (default --batch)")
+    ap.add_argument("--cache", default=None, help="cache file (default: RAW_CACHE or data/raw_cache.db)")
+    ap.add_argument("--since", help="--from-cache: only pages fetched on/after this date (YYYY-MM-DD)")
+    ap.add_argument("--until", help="--from-cache: only pages fetched on/before this date (YYYY-MM-DD)")
+    ap.add_argument("--query", help="--from-cache: only this search term")
+    ap.add_argument("--all", action="store_true", help="--skills: re-scan every job, not just stale ones")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    with connect() as conn:
+        if args.from_cache:
+            m = Metrics("backfill_cache", workers=args.workers, since=args.since, until=args.until, query=args.query)
+            res = parallel.backfill_cache(conn, args.cache, since=args.since, until=args.until, query=args.query,
+                                          workers=args.workers, chunk_pages=args.chunk or 50)
+            m.count("jobs", res["jobs"])
+            m.set("pages", res["pages"])
+            m.set("near_dups", res["near_dups"]["near_dups"])
+            m.record(conn)
+            print(f"Backfilled {res['jobs']:,} jobs from {res['pages']:,} cached pages "
+                  f"({res['read']:,} postings, {res['rate']:,.0f}/s on {args.workers} workers) • "
+                  f"{res['near_dups']['near_dups']} near-duplicates in {time.perf_counter() - t0:.1f}s")
+            return
+        if args.skills:
+            m = Metrics("backfill_skills", workers=args.workers, rescan_all=args.all)
+            res = parallel.backfill_skills(conn, rescan_all=args.all, workers=args.workers,
+                                           chunk_jobs=args.chunk or args.batch)
+            m.count("jobs", res["jobs"])
+            m.set("skill_links", res["links"])
+            m.record(conn)
+            print(f"Re-extracted {res['jobs']:,} jobs • {res['links']:,} skill links (taxonomy {res['version']}) "
+                  f"• {res['rate']:,.0f}/s on {args.workers} workers in {time.perf_counter() - t0:.1f}s")
+            return
+        init_db(conn)
+        n = refresh_derived(conn, chunk_size=args.batch)
+    print(f"Backfilled derived columns for {n} jobs in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
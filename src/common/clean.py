@@ -0,0 +1,48 @@
+import hashlib
+import re
+from datetime import date
+from typing import Optional
+
+from src.common.locations import LocationNormaliser, get_normaliser
+
+_ROLE_RX = re.compile(r"(Analyst|Scientist|Engineer)")
+
+def role_bucket(title: Optional[str]) -> str:
+    m = _ROLE_RX.search(title or "")
+    return m.group(1) if m else "Other"
+
+def fix_salary(v: Optional[float]) -> Optional[float]:
+    # shorthand salaries: 175 -> 175,000; whole dollars, which SQLite stores as small integers
+    if v is None:
+        return None
+    return float(round(v * 1000 if v < 1000 else v))
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+def day_number(posted_date: Optional[str]) -> Optional[int]:
+    """Days since 1970-01-01 for an ISO date (or timestamp), None if it isn't one."""
+    try:
+        return date.fromisoformat(posted_date[:10]).toordinal() - _EPOCH
+    except (TypeError, ValueError):
+        return None
+
+def day_date(day: Optional[int]) -> Optional[str]:
+    """The ISO date of a day_number (the same as db.DAY_SQL)."""
+    return None if day is None else date.fromordinal(day + _EPOCH).isoformat()
+
+# columns computed once at write time (see db.upsert_jobs) so readers never re-clean
+DERIVED_COLUMNS = ("city_clean", "state", "role_bucket",
+                   "salary_min_clean", "salary_max_clean", "salary_avg_clean", "dedup_key")
+
+def dedup_key(title, company, city, posted_date) -> str:
+    raw = "\x1f".join("" if v is None else str(v) for v in (title, company, city, posted_date))
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+def derive(title, company, location, posted_date, salary_min, salary_max, salary_avg,
+           locations: Optional[LocationNormaliser] = None) -> tuple:
+    """Values for DERIVED_COLUMNS, in order. Pass `locations` (get_normaliser()) when deriving
+    many rows, so locations.yml is checked for changes once rather than per row."""
+    city, state = (locations or get_normaliser()).resolve(location)
+    return (city, state, role_bucket(title),
+            fix_salary(salary_min), fix_salary(salary_max), fix_salary(salary_avg),
+            dedup_key(title, company, city, posted_date))
@@ -0,0 +1,271 @@
+"""Month-partitioned Parquet snapshots of jobs.db, and a Dashboard backend that reads them.
+
+Layout: <dir>/jobs/posted_month=YYYY-MM/part-0.parquet (and skills/ alike, partitioned by the
+job's month; 'unknown' when undated). Low-cardinality text columns are dictionary-encoded.
+A manifest of per-month signatures lets export() rewrite only months that are new or changed.
+
+The query functions mirror src/common/queries.py, so the Dashboard can use this module in its
+place (DASHBOARD_BACKEND=parquet). They load only the columns the charts need, non-dup rows
+only, memory-mapped; the keyword filter matches title/company/location (descriptions are
+read only by term_count).
+"""
+import json
+import os
+import re
+import shutil
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from src.common.clean import day_number
+from src.common.db import TEXT_SQL, job_columns
+from src.common.queries import Filters  # noqa: F401  (re-exported for the Dashboard)
+
+PARQUET_DIR = Path(os.getenv("PARQUET_DIR") or Path(__file__).resolve().parents[2] / "data" / "parquet")
+MANIFEST = "_manifest.json"
+NO_DATE = "unknown"
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+JOBS_SCHEMA = pa.schema([
+    ("id", pa.string()), ("title", pa.string()), ("company", pa.string()), ("location", pa.string()),
+    ("source", _DICT), ("posted_date", pa.date32()), ("description", pa.string()), ("url", pa.string()),
+    ("salary_min", pa.float64()), ("salary_max", pa.float64()), ("salary_avg", pa.float64()),
+    ("currency", _DICT), ("city_clean", _DICT), ("state", _DICT), ("role_bucket", _DICT),
+    ("salary_min_clean", pa.float64()), ("salary_max_clean", pa.float64()), ("salary_avg_clean", pa.float64()),
+    ("dedup_key", pa.string()), ("cluster_id", pa.string()), ("is_dup", pa.int8()),
+])
+SKILLS_SCHEMA = pa.schema([("job_id", pa.string()), ("skill", _DICT)])
+PARTITIONING = ds.partitioning(pa.schema([("posted_month", pa.string())]), flavor="hive")
+
+MONTH_SQL = f"COALESCE(substr({TEXT_SQL['posted_date']}, 1, 7), '{NO_DATE}')"
+
+
+# ---- export -----------------------------------------------------------------------------------
+
+def _signatures(conn) -> Dict[str, List[int]]:
+    """Per month: [row count, sum of per-row crc32 over every exported column + skills_version]."""
+    conn.create_function("crc32", 1, lambda s: zlib.crc32(s.encode()), deterministic=True)
+    row = " || '|' || ".join(f"COALESCE(CAST({TEXT_SQL.get(c, c)} AS TEXT), '')"
+                             for c in [*(f.name for f in JOBS_SCHEMA if f.name != "description"),
+                                       "text_hash", "skills_version"])
+    return {m: [n, sig] for m, n, sig in
+            conn.execute(f"SELECT {MONTH_SQL} AS m, COUNT(*), SUM(crc32({row})) FROM jobs GROUP BY m")}
+
+
+def _month_where(month: str) -> tuple:
+    if month == NO_DATE:
+        return "posted_day IS NULL", ()
+    y, m = map(int, month.split("-"))
+    return "posted_day >= ? AND posted_day < ?", (day_number(f"{month}-01"), day_number(f"{y + m // 12}-{m % 12 + 1:02d}-01"))
+
+
+def _table(cursor, schema: pa.Schema) -> pa.Table:
+    rows = cursor.fetchall()
+    cols = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, col in zip(schema, cols):
+        if field.type == pa.date32():
+            ts = pc.strptime(pa.array(col, pa.string()), format="%Y-%m-%d", unit="s", error_is_null=True)
+            arrays.append(ts.cast(pa.date32()))
+        else:
+            arrays.append(pa.array(col, field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _write(table: pa.Table, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def export(conn, out: Path = PARQUET_DIR, full: bool = False) -> Dict[str, list]:
+    """Write months that are new or changed since the last export (all of them with full=True)."""
+    out = Path(out)
+    manifest_path = out / MANIFEST
+    old = {} if full or not manifest_path.exists() else json.loads(manifest_path.read_text())
+    sigs = _signatures(conn)
+    written = [m for m in sorted(sigs) if old.get(m) != sigs[m]]
+    for m in written:
+        where, params = _month_where(m)
+        cols = job_columns(f.name for f in JOBS_SCHEMA)
+        jobs = _table(conn.execute(f"SELECT {cols} FROM jobs WHERE {where} ORDER BY posted_day, id", params),
+                      JOBS_SCHEMA)
+        skills = _table(conn.execute(
+            f"""SELECT js.job_id, d.name FROM job_skills js JOIN skill_dict d ON d.id = js.skill_id
+                WHERE js.job_id IN (SELECT id FROM jobs WHERE {where}) ORDER BY js.job_id""", params),
+            SKILLS_SCHEMA)
+        _write(jobs, out / "jobs" / f"posted_month={m}" / "part-0.parquet")
+        _write(skills, out / "skills" / f"posted_month={m}" / "part-0.parquet")
+    removed = [m for m in old if m not in sigs]
+    for m in removed:
+        for name in ("jobs", "skills"):
+            shutil.rmtree(out / name / f"posted_month={m}", ignore_errors=True)
+    # manifest last: an interrupted export just rewrites the same months next time
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(sigs, indent=1, sort_keys=True))
+    os.replace(tmp, manifest_path)
+    return {"written": written, "removed": removed, "unchanged": [m for m in sigs if m not in written]}
+
+
+# ---- read -------------------------------------------------------------------------------------
+
+def dataset(name: str, root: Path = PARQUET_DIR) -> ds.Dataset:
+    """pyarrow dataset over jobs/ or skills/ (hive partitions on posted_month, memory-mapped)."""
+    return ds.dataset(Path(root) / name, format="parquet", partitioning=PARTITIONING,
+                      filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+
+def _jobs_table(columns: List[str], since: Optional[str], root: Path, include_dups: bool = False) -> pa.Table:
+    filt = None if include_dups else ds.field("is_dup") == 0
+    if since:
+        month = (ds.field("posted_month") >= since) & (ds.field("posted_month") != NO_DATE)
+        filt = month if filt is None else filt & month
+    return dataset("jobs", root).to_table(columns=columns, filter=filt)
+
+
+def read_jobs(columns: List[str], since: Optional[str] = None, root: Path = PARQUET_DIR,
+              include_dups: bool = False) -> pd.DataFrame:
+    """Just `columns` of jobs, pruned to partitions >= `since` (YYYY-MM) when given."""
+    return _jobs_table(columns, since, root, include_dups).to_pandas()
+
+
+class Snapshot:
+    """The non-dup rows and skills the Dashboard charts need, loaded once per export."""
+
+    COLUMNS = ["id", "title", "company", "location", "source", "posted_date", "city_clean", "state",
+               "role_bucket", "salary_min_clean", "salary_max_clean", "salary_avg_clean"]
+
+    def __init__(self, root: Path = PARQUET_DIR, since: Optional[str] = None):
+        self.root, self.since = Path(root), since
+        self.version = (self.root / MANIFEST).stat().st_mtime_ns
+        jobs = _jobs_table(self.COLUMNS, since, root)
+        filt = ds.field("posted_month") >= since if since else None
+        skills = dataset("skills", root).to_table(columns=["job_id", "skill"], filter=filt)
+        skills = skills.filter(pc.is_in(skills["job_id"], value_set=jobs["id"]))  # drop dups' skills
+        self.jobs = jobs.to_pandas().rename(
+            columns=lambda c: c.replace("_clean", "") if c.startswith("salary_") else c)
+        self.skills = skills.to_pandas()
+        # position of each skill's job in self.jobs, so filters become a boolean gather
+        self.skills["row"] = pd.Index(self.jobs["id"]).get_indexer(self.skills["job_id"])
+
+    def close(self):
+        pass
+
+
+def data_version(snap: Snapshot) -> int:
+    """Changes with every export (the manifest is rewritten last), like db.data_version."""
+    return snap.version
+
+
+_cache: Dict[tuple, tuple] = {}
+
+
+def connect(root: Path = PARQUET_DIR, since: Optional[str] = os.getenv("PARQUET_SINCE")) -> Snapshot:
+    """Snapshot of the export at `root`, reloaded only when a new export rewrites the manifest."""
+    root = Path(root)
+    mtime = (root / MANIFEST).stat().st_mtime_ns
+    cached = _cache.get((root, since))
+    if cached is None or cached[0] != mtime:
+        cached = _cache[(root, since)] = (mtime, Snapshot(root, since))
+    return cached[1]
+
+
+# ---- Dashboard queries (same names, arguments and result columns as src/common/queries.py) ----
+
+_TERM_RX = re.compile(r'"([^"]*)"?|(\S+)')
+
+
+def _terms(text: str) -> List[str]:
+    return [(phrase or word.strip('*"')).lower() for phrase, word in _TERM_RX.findall(text or "")
+            if (phrase or word.strip('*"')).strip()]
+
+
+def _view(s: Snapshot, f: Filters) -> pd.DataFrame:
+    df, mask = s.jobs, pd.Series(True, index=s.jobs.index)
+    for col, val in (("city_clean", f.city), ("source", f.source), ("role_bucket", f.role)):
+        if val != "All":
+            mask &= df[col] == val
+    terms = _terms(f.keyword)
+    if terms:
+        text = (df["title"].fillna("") + " " + df["company"].fillna("") + " " + df["location"].fillna("")).str.lower()
+        for t in terms:
+            mask &= text.str.contains(t, regex=False)
+    return df[mask]
+
+
+def filter_options(s: Snapshot) -> Dict[str, List[str]]:
+    return {col: sorted(s.jobs[col].dropna().unique().tolist()) for col in ("city_clean", "source", "role_bucket")}
+
+
+def row_count(s: Snapshot, f: Filters) -> int:
+    return len(_view(s, f))
+
+
+def skill_counts(s: Snapshot, f: Filters) -> pd.DataFrame:
+    keep = np.zeros(len(s.jobs), dtype=bool)
+    keep[_view(s, f).index] = True
+    hits = s.skills.loc[keep[s.skills["row"].to_numpy()], "skill"].astype(str)
+    out = hits.value_counts().rename_axis("skill").reset_index(name="count")
+    return out.sort_values(["count", "skill"], ascending=[False, True], ignore_index=True)
+
+
+def salary_histogram(s: Snapshot, f: Filters, bins: int = 30) -> pd.DataFrame:
+    v = _view(s, f)
+    vals = pd.concat([v["salary_avg"], v["salary_min"], v["salary_max"]]).dropna()
+    if vals.empty:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "jobs"])
+    lo, hi = vals.min(), vals.max()
+    width = (hi - lo) / bins or 1.0
+    b = ((vals - lo) // width).astype(int).clip(upper=bins - 1)
+    df = b.value_counts().sort_index().rename_axis("b").reset_index(name="jobs")
+    df["bin_start"] = lo + df["b"] * width
+    df["bin_end"] = df["bin_start"] + width
+    return df[["bin_start", "bin_end", "jobs"]]
+
+
+def state_counts(s: Snapshot, f: Filters) -> pd.DataFrame:
+    v = _view(s, f)
+    v = v[v["state"].astype(str) != ""]
+    out = v["state"].astype(str).value_counts().rename_axis("state").reset_index(name="listings")
+    return out.sort_values("listings", ascending=False, ignore_index=True, kind="stable")
+
+
+def weekly_trend(s: Snapshot, f: Filters) -> pd.DataFrame:
+    v = _view(s, f)
+    v = v[(v["state"].astype(str) != "") & v["posted_date"].notna()]
+    week = pd.to_datetime(v["posted_date"]).dt.to_period("W").dt.start_time
+    out = v.assign(week=week, state=v["state"].astype(str)).groupby(["week", "state"]).size()
+    return out.reset_index(name="listings").sort_values("week", ignore_index=True, kind="stable")
+
+
+def median_salary_by_city(s: Snapshot, f: Filters) -> pd.DataFrame:
+    v = _view(s, f).dropna(subset=["salary_avg"])
+    out = v.groupby(v["city_clean"].astype(object), dropna=False)["salary_avg"].median()
+    return out.rename("median_salary").reset_index().sort_values("median_salary", ascending=False, ignore_index=True)
+
+
+def search(s: Snapshot, text: str, f: Filters = Filters(), limit: int = 50) -> pd.DataFrame:
+    """Keyword matches (title/company/location), unranked; no descriptions in the snapshot."""
+    v = _view(s, Filters(f.city, f.source, f.role, text))
+    return v[["id", "title", "company", "location"]].head(limit).assign(snippet="", score=float("nan"))
+
+
+def term_count(s: Snapshot, term: str, f: Filters = Filters()) -> int:
+    """Postings mentioning `term` in title or description; reads the description column on demand."""
+    phrase = term.replace('"', "").strip().lower()
+    if not phrase:
+        return 0
+    ids = set(_view(s, f)["id"])
+    text = read_jobs(["id", "title", "description"], s.since, s.root)
+    text = text[text["id"].isin(ids)]
+    rx = r"(?<![a-z0-9])" + re.escape(phrase) + r"(?![a-z0-9])"
+    return int((text["title"].fillna("") + " " + text["description"].fillna("")).str.lower().str.contains(rx).sum())
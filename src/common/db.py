@@ -1,19 +1,141 @@
+import hashlib
+import os
 import sqlite3
+import zlib
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
-from src.common.models import Job
+from typing import Iterable, Iterator, List, Optional, Tuple
+from src.common.clean import DERIVED_COLUMNS, day_date, day_number, derive
+from src.common.locations import LocationNormaliser, get_normaliser
+from src.common.models import AnyJob
 
-DB_PATH = Path(__file__).resolve().parents[2] / "data" / "jobs.db"
+DB_PATH = Path(os.getenv("JOBS_DB") or Path(__file__).resolve().parents[2] / "data" / "jobs.db")
 
-def get_conn():
-    conn = sqlite3.connect(DB_PATH)
+# per-workload connection tuning; "ingest" trades a little durability (NORMAL is still
+# crash-safe under WAL, it only skips the fsync per commit) for bulk write speed
+PRAGMAS = {
+    "default": {},
+    "ingest": {"synchronous": "NORMAL", "cache_size": -64_000, "temp_store": "MEMORY",
+               "mmap_size": 256 * 1024 * 1024},
+    "read": {"cache_size": -32_000, "temp_store": "MEMORY", "mmap_size": 256 * 1024 * 1024},
+}
+
+CHUNK_SIZE = 5_000
+
+# a Job's fields, and the jobs table migration 1 created
+JOB_COLUMNS = ("id", "title", "company", "location", "source", "posted_date", "description", "url",
+               "salary_min", "salary_max", "salary_avg", "currency")
+
+# source/currency as small ints from lookup tables (column -> (name, table))
+ENUM_COLUMNS = {"source_id": ("source", "sources"), "currency_id": ("currency", "currencies")}
+
+# what job_row() builds (no DB access, so worker processes can build rows too): dates as day
+# numbers, and the source/currency names last, which upsert_rows swaps for their ids (only the
+# writer can assign new ones)
+WRITE_COLUMNS = (("id", "title", "company", "location", "posted_day", "description", "url", "salary_min",
+                  "salary_max", "salary_avg", "text_hash") + DERIVED_COLUMNS + tuple(n for n, _ in ENUM_COLUMNS.values()))
+UPSERT_COLUMNS = WRITE_COLUMNS[:-len(ENUM_COLUMNS)] + tuple(ENUM_COLUMNS)
+
+# a changed title/description clears skills_version so reextract_skills picks the row up again
+UPSERT_JOBS_SQL = (
+    f"INSERT INTO jobs ({','.join(UPSERT_COLUMNS)}) VALUES ({','.join('?' * len(UPSERT_COLUMNS))}) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    "skills_version = CASE WHEN jobs.text_hash IS excluded.text_hash THEN jobs.skills_version END, "
+    + ", ".join(f"{c}=excluded.{c}" for c in UPSERT_COLUMNS if c != "id")
+)
+
+# every column the Dashboard's live queries read (queries.BASE_SQL), in one covering index so
+# they never touch the rows and their descriptions; city and then role filters seek into it
+FACET_COLUMNS = ("is_dup", "city_clean", "role_bucket", "source_id", "state", "posted_day",
+                 "salary_min_clean", "salary_max_clean", "salary_avg_clean", "id")
+
+# Dashboard job listings (queries.job_page): one index per sort key, walked in order from a
+# (value, id) cursor, carrying the filter and display columns so skipping non-matching rows
+# never reads a row and a page reads just its own
+LISTING_COLUMNS = ("id", "city_clean", "role_bucket", "source_id", "state", "salary_min_clean", "salary_max_clean")
+LISTING_INDEXES = {"idx_jobs_by_day": "posted_day", "idx_jobs_by_salary": "salary_avg_clean"}
+
+# Monday of the posting's week as a day number, matching pandas' to_period("W").start_time
+# (1970-01-01 was a Thursday); DAY_SQL turns a day number into its ISO date
+WEEK_DAY_SQL = "(posted_day - (posted_day + 3) % 7)"
+DAY_SQL = "date({} * 86400, 'unixepoch')"
+
+# jobs stores dates as day numbers and sources/currencies as ids (migration 17); readers that
+# show or export them select these, e.g. via job_columns()
+TEXT_SQL = {"posted_date": DAY_SQL.format("posted_day"),
+            "source": "(SELECT name FROM sources WHERE id = source_id)",
+            "currency": "(SELECT name FROM currencies WHERE id = currency_id)"}
+
+# rollup_weekly / rollup_salary grain; '' stands in for NULL so the keys can be primary keys
+ROLLUP_DIMS = ("week", "city_clean", "state", "role_bucket", "source")
+_ROLLUP_KEY = (f"COALESCE({DAY_SQL.format(WEEK_DAY_SQL)}, ''), COALESCE(city_clean, ''), COALESCE(state, ''), "
+               f"COALESCE(role_bucket, ''), COALESCE({TEXT_SQL['source']}, '')")
+SALARY_BUCKET = 1000  # AUD width of the rollup salary histogram (bucket b covers b*width ± width/2)
+
+# a job's full description, whether it is still in jobs or was moved to job_descriptions
+# compressed (retention.compress_descriptions); use in place of `description` when reading jobs
+DESCRIPTION_SQL = "COALESCE(description, inflate((SELECT z FROM job_descriptions WHERE job_id = jobs.id)))"
+
+def deflate(text: Optional[str]) -> Optional[bytes]:
+    return None if text is None else zlib.compress(text.encode(), 9)
+
+def inflate(blob: Optional[bytes]) -> Optional[str]:
+    return None if blob is None else zlib.decompress(blob).decode()
+
+def get_conn(path: Optional[Path] = None, workload: str = "default"):
+    conn = sqlite3.connect(path or DB_PATH)
+    conn.create_function("inflate", 1, inflate, deterministic=True)
     conn.execute("PRAGMA journal_mode=WAL;")
+    for k, v in PRAGMAS[workload].items():
+        conn.execute(f"PRAGMA {k}={v};")
     return conn
 
-def init_db():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
+@contextmanager
+def connect(workload: str = "ingest", path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    """One connection for a whole run; everything inside the block commits as a single transaction."""
+    conn = get_conn(path, workload)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def job_columns(columns: Iterable[str]) -> str:
+    """SELECT list over jobs for these column names: TEXT_SQL for the typed ones, and descriptions
+    wherever they are kept (DESCRIPTION_SQL)."""
+    return ", ".join(f"{DESCRIPTION_SQL} AS description" if col == "description"
+                     else f"{TEXT_SQL[col]} AS {col}" if col in TEXT_SQL else col for col in columns)
+
+@contextmanager
+def _maybe_conn(conn: Optional[sqlite3.Connection]):
+    # helpers reuse the caller's connection/transaction, or open (and commit) their own
+    if conn is not None:
+        yield conn
+    else:
+        with connect() as own:
+            yield own
+
+def _chunks(it: Iterable, size: int) -> Iterator[list]:
+    it = iter(it)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+def text_hash(title: Optional[str], description: Optional[str]) -> str:
+    return hashlib.sha1(f"{title or ''}\n{description or ''}".encode()).hexdigest()[:16]
+
+def _columns(c: sqlite3.Connection, table: str) -> List[str]:
+    return [r[1] for r in c.execute(f"PRAGMA table_info({table})")]
+
+def _has_table(c: sqlite3.Connection, name: str) -> bool:
+    return c.execute("SELECT 1 FROM sqlite_master WHERE name=?", (name,)).fetchone() is not None
+
+def _add_column(c: sqlite3.Connection, table: str, column: str, decl: str):
+    if column not in _columns(c, table):
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def _m1_base(c):
+    c.execute(
         '''CREATE TABLE IF NOT EXISTS jobs (
             id TEXT PRIMARY KEY,
             title TEXT,
@@ -29,34 +151,546 @@ def init_db():
             currency TEXT
         );'''
     )
-    cur.execute(
+    # a jobs table that sqlite_utils created (old scripts/update_data.py) lacks some of these
+    for col in JOB_COLUMNS[1:]:
+        _add_column(c, "jobs", col, "REAL" if col.startswith("salary_") else "TEXT")
+    c.execute(
         '''CREATE TABLE IF NOT EXISTS skills (
             job_id TEXT,
             skill TEXT
         );'''
     )
-    conn.commit()
-    conn.close()
-
-def upsert_jobs(jobs: Iterable[Job]):
-    conn = get_conn()
-    cur = conn.cursor()
-    for j in jobs:
-        cur.execute(
-            '''INSERT OR REPLACE INTO jobs
-               (id,title,company,location,source,posted_date,description,url,
-                salary_min,salary_max,salary_avg,currency)
-               VALUES (?,?,?,?,?,?,?,?,?,?,?,?)''',
-            (j.id, j.title, j.company, j.location, j.source, j.posted_date, j.description, j.url,
-             j.salary_min, j.salary_max, j.salary_avg, j.currency)
-        )
-    conn.commit()
-    conn.close()
-
-def insert_skills(hits: Iterable[dict]):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.executemany('INSERT INTO skills (job_id, skill) VALUES (?,?)',
-                    [(h["job_id"], h["skill"]) for h in hits])
-    conn.commit()
-    conn.close()
+
+def _m2_job_skills(c):
+    # skills(job_id, skill) had no key and collected a duplicate row per re-ingest;
+    # replace it with a dictionary + keyed link table and keep `skills` as a view for readers
+    c.execute("CREATE TABLE IF NOT EXISTS skill_dict (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    c.execute(
+        '''CREATE TABLE IF NOT EXISTS job_skills (
+            job_id TEXT NOT NULL,
+            skill_id INTEGER NOT NULL REFERENCES skill_dict(id),
+            PRIMARY KEY (job_id, skill_id)
+        ) WITHOUT ROWID'''
+    )
+    c.execute("CREATE INDEX IF NOT EXISTS idx_job_skills_skill ON job_skills(skill_id)")
+    legacy = c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='skills'").fetchone()
+    if legacy:
+        c.execute("INSERT OR IGNORE INTO skill_dict (name) SELECT DISTINCT lower(skill) FROM skills WHERE skill IS NOT NULL")
+        c.execute('''INSERT OR IGNORE INTO job_skills (job_id, skill_id)
+                     SELECT DISTINCT s.job_id, d.id FROM skills s JOIN skill_dict d ON d.name = lower(s.skill)
+                     WHERE s.job_id IS NOT NULL''')
+        c.execute("DROP TABLE skills")
+    c.execute('''CREATE VIEW IF NOT EXISTS skills AS
+                 SELECT js.job_id, d.name AS skill FROM job_skills js JOIN skill_dict d ON d.id = js.skill_id''')
+    _add_column(c, "jobs", "text_hash", "TEXT")
+    _add_column(c, "jobs", "skills_version", "TEXT")
+    c.create_function("text_hash", 2, text_hash, deterministic=True)
+    c.execute("UPDATE jobs SET text_hash = text_hash(title, description) WHERE text_hash IS NULL")
+
+def _m3_filter_indexes(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_source ON jobs(source)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_posted_date ON jobs(posted_date)")
+
+def _m4_derived_columns(c):
+    for col in DERIVED_COLUMNS:
+        _add_column(c, "jobs", col, "REAL" if col.startswith("salary_") else "TEXT")
+    _add_column(c, "jobs", "is_dup", "INTEGER NOT NULL DEFAULT 0")
+    for col in ("city_clean", "state", "role_bucket", "dedup_key", "is_dup"):
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_jobs_{col} ON jobs({col})")
+    refresh_derived(c)
+
+def _m5_location_table(c):
+    # city_clean/state now come from config/locations.yml (cities instead of state codes)
+    refresh_derived(c)
+
+def _m6_sync_state(c):
+    # one checkpoint per incremental-sync target (extractors/sync.py); location '' = nationwide
+    c.execute(
+        '''CREATE TABLE IF NOT EXISTS sync_state (
+            country TEXT NOT NULL,
+            query TEXT NOT NULL,
+            location TEXT NOT NULL DEFAULT '',
+            status TEXT,
+            last_page INTEGER NOT NULL DEFAULT 0,
+            newest_created TEXT,
+            run_newest_created TEXT,
+            started_at TEXT,
+            last_run TEXT,
+            PRIMARY KEY (country, query, location)
+        )'''
+    )
+
+FTS_COLUMNS = ("title", "company", "location", "description")
+
+def _m7_jobs_fts(c):
+    # external-content FTS5 index over the searchable text (queries.search / Filters.keyword);
+    # triggers keep it in step with jobs, and only fire when one of the indexed columns changes
+    cols = ", ".join(FTS_COLUMNS)
+    c.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+                     {cols}, content='jobs', content_rowid='rowid',
+                     tokenize='unicode61 remove_diacritics 2')""")
+    _fts_triggers(c)
+    c.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+def _fts_triggers(c):
+    cols = ", ".join(FTS_COLUMNS)
+    new = ", ".join(f"new.{col}" for col in FTS_COLUMNS)
+    old = ", ".join(f"old.{col}" for col in FTS_COLUMNS)
+    changed = " OR ".join(f"old.{col} IS NOT new.{col}" for col in FTS_COLUMNS)
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs BEGIN
+                     INSERT INTO jobs_fts (rowid, {cols}) VALUES (new.rowid, {new}); END""")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs BEGIN
+                     INSERT INTO jobs_fts (jobs_fts, rowid, {cols}) VALUES ('delete', old.rowid, {old}); END""")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS jobs_fts_au AFTER UPDATE OF {cols} ON jobs WHEN {changed} BEGIN
+                     INSERT INTO jobs_fts (jobs_fts, rowid, {cols}) VALUES ('delete', old.rowid, {old});
+                     INSERT INTO jobs_fts (rowid, {cols}) VALUES (new.rowid, {new}); END""")
+
+def suspend_fts(c: sqlite3.Connection):
+    """Stop per-row jobs_fts maintenance for a bulk load; resume_fts() re-indexes in one pass.
+    If the load dies in between, the next init_db() notices the missing triggers and resumes."""
+    for t in ("ai", "ad", "au"):
+        c.execute(f"DROP TRIGGER IF EXISTS jobs_fts_{t}")
+
+def resume_fts(c: sqlite3.Connection):
+    _fts_triggers(c)
+    c.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+def _rollup_tables(c, prefix: str):
+    dims = ", ".join(f"{d} TEXT NOT NULL" for d in ROLLUP_DIMS)
+    key = ", ".join(ROLLUP_DIMS)
+    c.execute(f"""CREATE TABLE IF NOT EXISTS {prefix}_weekly (
+                    {dims}, listings INTEGER NOT NULL, salary_n INTEGER NOT NULL, salary_sum REAL NOT NULL,
+                    PRIMARY KEY ({key})) WITHOUT ROWID""")
+    c.execute(f"""CREATE TABLE IF NOT EXISTS {prefix}_salary (
+                    {dims}, bucket INTEGER NOT NULL, n INTEGER NOT NULL,
+                    PRIMARY KEY ({key}, bucket)) WITHOUT ROWID""")
+
+def _m8_rollups(c):
+    # pre-aggregated (week x city x state x role x source) counts and salary histograms for the
+    # Dashboard; maintained by upsert_jobs/refresh_derived for just the rows they touch. They
+    # are keyed on the typed columns, so migration 13 fills them
+    _rollup_tables(c, "rollup")
+
+def _m9_near_dups(c):
+    # MinHash signatures (src/common/neardup.py) and the near-duplicate cluster each job falls in;
+    # near_dup marks every member but the first, and is folded into is_dup
+    c.execute(
+        '''CREATE TABLE IF NOT EXISTS job_minhash (
+            job_id TEXT PRIMARY KEY,
+            text_hash TEXT,
+            version TEXT NOT NULL,
+            sig BLOB NOT NULL
+        ) WITHOUT ROWID'''
+    )
+    _add_column(c, "jobs", "cluster_id", "TEXT")
+    _add_column(c, "jobs", "near_dup", "INTEGER NOT NULL DEFAULT 0")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_cluster_id ON jobs(cluster_id)")
+
+def _m10_meta(c):
+    # small key/value table; data_version is bumped by every write helper below so readers
+    # (the Dashboard's caches) can tell when anything they show may have changed
+    c.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value) WITHOUT ROWID")
+    c.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', 0)")
+
+def _m11_runs(c):
+    # one row per ETL/replay/backfill run: stage timings and counters (src/common/metrics.py)
+    c.execute(
+        '''CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            rows INTEGER,
+            metrics TEXT NOT NULL
+        )'''
+    )
+
+def _m12_retention(c):
+    # src/common/retention.py: what archived jobs contributed to the rollups (added back by
+    # rebuild_rollups), the ids already archived (never re-ingested) and descriptions moved
+    # out of jobs, zlib-compressed
+    _rollup_tables(c, "archived")
+    c.execute("CREATE TABLE IF NOT EXISTS archived_jobs (id TEXT PRIMARY KEY, posted_date TEXT) WITHOUT ROWID")
+    c.execute("CREATE TABLE IF NOT EXISTS job_descriptions (job_id TEXT PRIMARY KEY, z BLOB NOT NULL) WITHOUT ROWID")
+
+def _fill_typed(c):
+    # posted_day and the ENUM_COLUMNS ids, from the text columns
+    c.create_function("day_number", 1, day_number, deterministic=True)
+    c.execute("UPDATE jobs SET posted_day = day_number(posted_date)")
+    for col, (src, table) in ENUM_COLUMNS.items():
+        c.execute(f"INSERT OR IGNORE INTO {table} (name) SELECT DISTINCT {src} FROM jobs WHERE {src} IS NOT NULL")
+        c.execute(f"UPDATE jobs SET {col} = (SELECT id FROM {table} WHERE name = jobs.{src})")
+
+def _m13_typed_facets(c):
+    # compact typed copies of the Dashboard's filter/group-by columns (day numbers, small-int
+    # source/currency ids, whole-dollar salaries) behind one covering index, which replaces the
+    # single-column ones; migration 17 drops the text columns
+    for table in ("sources", "currencies"):
+        c.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    for col in ("posted_day", *ENUM_COLUMNS):
+        _add_column(c, "jobs", col, "INTEGER")
+    _fill_typed(c)
+    for col in ("is_dup", "city_clean", "state", "role_bucket", "source"):
+        c.execute(f"DROP INDEX IF EXISTS idx_jobs_{col}")
+    refresh_derived(c)  # whole-dollar salaries, then is_dup and the rollups
+    c.execute(f"CREATE INDEX IF NOT EXISTS idx_jobs_facets ON jobs ({', '.join(FACET_COLUMNS)})")
+
+def _m14_listing_indexes(c):
+    for name, col in LISTING_INDEXES.items():
+        c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON jobs (is_dup, {col}, {', '.join(LISTING_COLUMNS)})")
+
+def _m15_lsh_buckets(c):
+    # neardup.recluster's LSH buckets, kept between runs so a run only revisits the buckets that
+    # new or changed signatures left or joined; bands holds the keys a signature is filed under,
+    # banded = 0 until it is (or when something near it changed)
+    c.execute(
+        '''CREATE TABLE IF NOT EXISTS job_lsh (
+            band INTEGER NOT NULL,
+            key INTEGER NOT NULL,
+            job_id TEXT NOT NULL,
+            PRIMARY KEY (band, key, job_id)
+        ) WITHOUT ROWID'''
+    )
+    _add_column(c, "job_minhash", "bands", "BLOB")
+    _add_column(c, "job_minhash", "banded", "INTEGER NOT NULL DEFAULT 0")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_job_minhash_unbanded ON job_minhash(job_id) WHERE banded = 0")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_near_dup ON jobs(near_dup) WHERE near_dup = 1")
+
+# raw Adzuna fields that the old sqlite_utils writer stored as columns of their own
+LEGACY_COLUMNS = ("created", "redirect_url", "category", "search_term", "contract_time", "salary_is_predicted")
+
+def _rebuild_jobs(c, keep: List[str]):
+    """Recreate jobs with just the `keep` columns, keeping rowids (jobs_fts, first-ingested order),
+    the indexes on those columns and the FTS triggers."""
+    info = {r[1]: r for r in c.execute("PRAGMA table_info(jobs)")}
+    defs = ", ".join(f"{col} {info[col][2]}" + (" NOT NULL" if info[col][3] else "")
+                     + (f" DEFAULT {info[col][4]}" if info[col][4] is not None else "")
+                     + (" PRIMARY KEY" if info[col][5] else "") for col in keep)
+    indexes = [sql for name, sql in c.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'jobs' AND sql IS NOT NULL")
+        if {r[2] for r in c.execute(f"PRAGMA index_info('{name}')")} <= set(keep)]
+    cols = ", ".join(keep)
+    suspend_fts(c)
+    c.execute(f"CREATE TABLE jobs_rebuilt ({defs})")
+    c.execute(f"INSERT INTO jobs_rebuilt (rowid, {cols}) SELECT rowid, {cols} FROM jobs")
+    c.execute("DROP TABLE jobs")
+    c.execute("ALTER TABLE jobs_rebuilt RENAME TO jobs")
+    for sql in indexes:
+        c.execute(sql)
+    resume_fts(c)
+
+def _m16_legacy_columns(c):
+    # jobs.db files once filled through sqlite_utils: their rows have created/redirect_url but
+    # no posted_date/url/source, so they had no dates, links or derived columns. Copy the
+    # values over, drop the raw columns and recompute everything derived from them
+    cols = _columns(c, "jobs")
+    legacy = [col for col in LEGACY_COLUMNS if col in cols]
+    if not legacy:
+        return
+    if "created" in legacy:
+        c.execute("UPDATE jobs SET posted_date = date(created) WHERE COALESCE(posted_date, '') = ''")
+    if "redirect_url" in legacy:
+        c.execute("UPDATE jobs SET url = redirect_url WHERE url IS NULL")
+    c.execute("UPDATE jobs SET source = 'adzuna' WHERE source IS NULL")
+    c.execute("UPDATE jobs SET salary_avg = (salary_min + salary_max) / 2.0 "
+              "WHERE salary_avg IS NULL AND salary_min AND salary_max")  # as etl_adzuna.parse_records
+    _fill_typed(c)
+    _rebuild_jobs(c, [col for col in cols if col not in legacy])
+    refresh_derived(c)  # then is_dup and the rollups
+
+def _m17_typed_only(c):
+    # jobs keeps only the typed posted_day/source_id/currency_id; readers get the text from TEXT_SQL.
+    # dedup_key is now built from the day number's date, which differs where the text wasn't one
+    odd = [r[0] for r in c.execute(
+        f"SELECT id FROM jobs WHERE COALESCE(posted_date, '') != COALESCE({TEXT_SQL['posted_date']}, '')")]
+    _rebuild_jobs(c, [col for col in _columns(c, "jobs") if col not in ("posted_date", "source", "currency")])
+    refresh_derived(c, odd)
+
+# schema history, applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [_m1_base, _m2_job_skills, _m3_filter_indexes, _m4_derived_columns,
+              _m5_location_table, _m6_sync_state, _m7_jobs_fts, _m8_rollups,
+              _m9_near_dups, _m10_meta, _m11_runs, _m12_retention, _m13_typed_facets,
+              _m14_listing_indexes, _m15_lsh_buckets, _m16_legacy_columns, _m17_typed_only]
+
+def migrate(c: sqlite3.Connection) -> int:
+    version = c.execute("PRAGMA user_version").fetchone()[0]
+    for i, step in enumerate(MIGRATIONS[version:], version + 1):
+        step(c)
+        c.execute(f"PRAGMA user_version={i}")
+    return len(MIGRATIONS)
+
+def init_db(conn: Optional[sqlite3.Connection] = None):
+    with _maybe_conn(conn) as c:
+        migrate(c)
+        if _has_table(c, "jobs_fts") and not _has_table(c, "jobs_fts_ai"):
+            resume_fts(c)  # an interrupted bulk load left the index suspended
+
+def _touch(c: sqlite3.Connection):
+    # one bump per write call, not per row; migrations before 10 write without the table
+    if _has_table(c, "meta"):
+        c.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+def unband(c: sqlite3.Connection, ids: List[str]):
+    """Have the next neardup.recluster() revisit these jobs, e.g. after their dedup_key moved."""
+    if ids and "banded" in _columns(c, "job_minhash"):  # migration 15
+        c.execute(f"UPDATE job_minhash SET banded = 0 WHERE job_id IN ({','.join('?' * len(ids))})", ids)
+
+def data_version(c: sqlite3.Connection) -> int:
+    """Changes whenever jobs, skills, dedup flags or clusters are written (0 before migration 10)."""
+    row = c.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone() if _has_table(c, "meta") else None
+    return row[0] if row else 0
+
+def job_row(j: AnyJob, locations: Optional[LocationNormaliser] = None) -> tuple:
+    day = day_number(j.posted_date)
+    return (j.id, j.title, j.company, j.location, day, j.description, j.url,
+            j.salary_min, j.salary_max, j.salary_avg, text_hash(j.title, j.description),
+            *derive(j.title, j.company, j.location, day_date(day), j.salary_min, j.salary_max, j.salary_avg,
+                    locations),
+            j.source, j.currency)
+
+def job_rows(jobs: Iterable[AnyJob], chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """job_row for many jobs, with one locations.yml freshness check per chunk."""
+    for chunk in _chunks(jobs, chunk_size):
+        locations = get_normaliser()
+        yield from (job_row(j, locations) for j in chunk)
+
+def _with_enums(c: sqlite3.Connection, rows: List[tuple]) -> List[tuple]:
+    """job_row tuples with their trailing source/currency names swapped for ENUM_COLUMNS ids,
+    i.e. UPSERT_COLUMNS order."""
+    n = len(ENUM_COLUMNS)
+    maps = [_ids(c, table, {r[at] for r in rows}) for at, (_, table) in enumerate(ENUM_COLUMNS.values(), -n)]
+    return [(*r[:-n], *(ids.get(v) for ids, v in zip(maps, r[-n:]))) for r in rows]
+
+def _stage_keys(c: sqlite3.Connection, keys: Iterable[str]):
+    # the dedup_key groups for the next set-based upkeep statement, in place of an IN list per 500 keys
+    c.execute("CREATE TEMP TABLE IF NOT EXISTS upkeep_keys (key TEXT PRIMARY KEY) WITHOUT ROWID")
+    c.execute("DELETE FROM upkeep_keys")
+    c.executemany("INSERT OR IGNORE INTO upkeep_keys VALUES (?)", ((k,) for k in keys if k is not None))
+
+def _mark_dups(c: sqlite3.Connection, keys: Iterable[str]):
+    # within each dedup_key group the first-ingested row is the one readers count,
+    # unless it is a near-duplicate of an earlier posting (set_clusters); only changed flags are written
+    _stage_keys(c, keys)
+    c.execute("""UPDATE jobs SET is_dup = d.dup
+                 FROM (SELECT rowid AS rid, (rowid != MIN(rowid) OVER (PARTITION BY dedup_key)) OR near_dup AS dup
+                       FROM jobs WHERE dedup_key IN (SELECT key FROM upkeep_keys)) AS d
+                 WHERE jobs.rowid = d.rid AND jobs.is_dup IS NOT d.dup""")
+
+def _roll(c: sqlite3.Connection, sign: int, keys: Optional[Iterable[str]] = None, prefix: str = "rollup"):
+    """Add (sign=1) or subtract (sign=-1) the non-dup rows of the given dedup_key groups
+    (default: every row) to the rollup tables (or the archived_* ones)."""
+    key = ", ".join(ROLLUP_DIMS)
+    bucket = f"CAST(ROUND(salary_avg_clean / {SALARY_BUCKET}.0) AS INTEGER)"
+    # +is_dup: keep the planner on idx_jobs_dedup_key rather than an is_dup-first listing index
+    rows = "FROM jobs WHERE +is_dup = 0"
+    if keys is not None:
+        _stage_keys(c, keys)
+        rows += " AND dedup_key IN (SELECT key FROM upkeep_keys)"
+    # one grouped pass over the rows (per bucket), which both rollup tables are summed from
+    c.execute(f"CREATE TEMP TABLE IF NOT EXISTS roll_delta ({key}, bucket, listings, salary_n, salary_sum)")
+    c.execute("DELETE FROM roll_delta")
+    c.execute(f"""INSERT INTO roll_delta SELECT {_ROLLUP_KEY}, {bucket}, COUNT(*), COUNT(salary_avg_clean),
+                                                TOTAL(salary_avg_clean) {rows} GROUP BY 1, 2, 3, 4, 5, 6""")
+    c.execute(f"""INSERT INTO {prefix}_weekly ({key}, listings, salary_n, salary_sum)
+                  SELECT {key}, {sign} * SUM(listings), {sign} * SUM(salary_n), {sign} * TOTAL(salary_sum)
+                  FROM roll_delta GROUP BY 1, 2, 3, 4, 5
+                  ON CONFLICT DO UPDATE SET listings = listings + excluded.listings,
+                      salary_n = salary_n + excluded.salary_n, salary_sum = salary_sum + excluded.salary_sum""")
+    c.execute(f"""INSERT INTO {prefix}_salary ({key}, bucket, n)
+                  SELECT {key}, bucket, {sign} * listings FROM roll_delta WHERE bucket IS NOT NULL
+                  ON CONFLICT DO UPDATE SET n = n + excluded.n""")
+    if sign < 0:
+        return
+    c.execute(f"DELETE FROM {prefix}_weekly WHERE listings = 0")
+    c.execute(f"DELETE FROM {prefix}_salary WHERE n = 0")
+
+def rebuild_rollups(c: sqlite3.Connection):
+    c.execute("DELETE FROM rollup_weekly")
+    c.execute("DELETE FROM rollup_salary")
+    _roll(c, 1)
+    if _has_table(c, "archived_weekly"):  # archived postings still count (migration 12)
+        key = ", ".join(ROLLUP_DIMS)
+        c.execute(f"""INSERT INTO rollup_weekly ({key}, listings, salary_n, salary_sum)
+                      SELECT {key}, listings, salary_n, salary_sum FROM archived_weekly WHERE true
+                      ON CONFLICT DO UPDATE SET listings = listings + excluded.listings,
+                          salary_n = salary_n + excluded.salary_n, salary_sum = salary_sum + excluded.salary_sum""")
+        c.execute(f"""INSERT INTO rollup_salary ({key}, bucket, n) SELECT {key}, bucket, n FROM archived_salary WHERE true
+                      ON CONFLICT DO UPDATE SET n = n + excluded.n""")
+
+def archived(c: sqlite3.Connection, ids: List[str]) -> set:
+    """The ids among `ids` that retention.archive() has moved out of jobs."""
+    if not ids or not _has_table(c, "archived_jobs"):
+        return set()
+    return {r[0] for r in c.execute(f"SELECT id FROM archived_jobs WHERE id IN ({','.join('?' * len(ids))})", ids)}
+
+def upsert_jobs(jobs: Iterable[AnyJob], conn: Optional[sqlite3.Connection] = None,
+                chunk_size: int = CHUNK_SIZE) -> int:
+    return upsert_rows(job_rows(jobs, chunk_size), conn, chunk_size)
+
+def upsert_rows(rows: Iterable[tuple], conn: Optional[sqlite3.Connection] = None,
+                chunk_size: int = CHUNK_SIZE, bulk: bool = False) -> int:
+    """upsert_jobs for rows already built by job_row (e.g. in a worker process); every write to
+    jobs goes through here.
+
+    The is_dup flags, rollups and jobs_fts are brought up to date once per call rather than per
+    row: each dedup_key group is subtracted from the rollups the first time the call touches it,
+    and flagged and added back at the end; the FTS triggers are off for the call, and each chunk's
+    new or changed text is (re)indexed in one statement.
+    bulk=True skips the is_dup/rollup upkeep; the caller runs reflag_all() once at the end.
+    Jobs already archived (retention.archive) are skipped: the rollups still count them.
+    """
+    n = 0
+    key_at = WRITE_COLUMNS.index("dedup_key")
+    fts_at = [WRITE_COLUMNS.index(col) for col in FTS_COLUMNS]
+    desc_at = WRITE_COLUMNS.index("description")
+    cols = ", ".join(FTS_COLUMNS)
+    with _maybe_conn(conn) as c:
+        fts = _has_table(c, "jobs_fts_ai")  # a caller's bulk load may have suspended it already
+        packed = _has_table(c, "job_descriptions")  # migration 12
+        if fts:
+            suspend_fts(c)
+        touched = set()
+        try:
+            for chunk in _chunks(rows, chunk_size):
+                gone = archived(c, [r[0] for r in chunk])
+                if gone:
+                    chunk = [r for r in chunk if r[0] not in gone]
+                    if not chunk:
+                        continue
+                chunk = _with_enums(c, chunk)
+                ids = [r[0] for r in chunk]
+                marks = ",".join("?" * len(chunk))
+                old = {r[0]: r[1:] for r in c.execute(
+                    f"SELECT id, dedup_key, rowid, {cols} FROM jobs WHERE id IN ({marks})", ids)}
+                # a job that changed dedup_key group without changing text keeps its signature
+                unband(c, [r[0] for r in chunk if r[0] in old and old[r[0]][0] != r[key_at]])
+                if not bulk:
+                    # every row whose values or is_dup can change lives in one of these groups
+                    fresh = {o[0] for o in old.values()} | {r[key_at] for r in chunk}
+                    fresh -= touched
+                    if fresh:
+                        _roll(c, -1, fresh)
+                        touched |= fresh
+                if fts:  # ids whose text is new or changed, once each
+                    changed = list(dict.fromkeys(r[0] for r in chunk if r[0] not in old
+                                                 or old[r[0]][2:] != tuple(r[at] for at in fts_at)))
+                    c.executemany(f"INSERT INTO jobs_fts (jobs_fts, rowid, {cols}) "
+                                  f"VALUES ('delete', {','.join('?' * (len(FTS_COLUMNS) + 1))})",
+                                  [old[i][1:] for i in changed if i in old])
+                c.executemany(UPSERT_JOBS_SQL, chunk)
+                # a re-fetched description replaces one retention.compress_descriptions() moved out
+                refetched = [r[0] for r in chunk if r[desc_at] is not None]
+                if packed and refetched:
+                    c.execute(f"DELETE FROM job_descriptions WHERE job_id IN ({','.join('?' * len(refetched))})",
+                              refetched)
+                if fts and changed:
+                    c.execute(f"INSERT INTO jobs_fts (rowid, {cols}) SELECT rowid, {cols} FROM jobs "
+                              f"WHERE id IN ({','.join('?' * len(changed))})", changed)
+                n += len(chunk)
+            if touched:
+                _mark_dups(c, touched)
+                _roll(c, 1, touched)
+        finally:
+            if fts:
+                _fts_triggers(c)
+        if n:
+            _touch(c)
+    return n
+
+def refresh_derived(c: sqlite3.Connection, ids: Optional[Iterable[str]] = None,
+                    chunk_size: int = CHUNK_SIZE) -> int:
+    """Recompute DERIVED_COLUMNS and is_dup for `ids` (default: every row), e.g. after the cleaning rules change."""
+    # before migration 13 the date is only in its text column
+    date = DAY_SQL.format("posted_day") if "posted_day" in _columns(c, "jobs") else "posted_date"
+    src = ("title", "company", "location", date, "salary_min", "salary_max", "salary_avg")
+    sets = ", ".join(f"{col}=?" for col in DERIVED_COLUMNS)
+    select = f"SELECT id, {','.join(src)}, dedup_key FROM jobs"
+
+    def batches():
+        if ids is not None:
+            for chunk in _chunks(ids, chunk_size):
+                yield c.execute(f"{select} WHERE id IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+            return
+        last = ""
+        while rows := c.execute(f"{select} WHERE id > ? ORDER BY id LIMIT ?", (last, chunk_size)).fetchall():
+            yield rows
+            last = rows[-1][0]
+
+    n = 0
+    for rows in batches():
+        locations = get_normaliser()
+        derived = [derive(*r[1:-1], locations) for r in rows]
+        unband(c, [r[0] for r, d in zip(rows, derived) if r[-1] != d[-1]])
+        keys = {r[-1] for r in rows} | {d[-1] for d in derived}
+        if ids is not None:
+            _roll(c, -1, keys)
+        c.executemany(f"UPDATE jobs SET {sets} WHERE id=?", [(*d, r[0]) for d, r in zip(derived, rows)])
+        if ids is not None:
+            _mark_dups(c, keys)
+            _roll(c, 1, keys)
+        n += len(rows)
+    if ids is None:
+        reflag_all(c)
+    elif n:
+        _touch(c)
+    return n
+
+def reflag_all(c: sqlite3.Connection):
+    """Recompute every is_dup flag and the rollups from scratch (full refresh_derived, bulk upsert_rows)."""
+    near = " OR near_dup" if "near_dup" in _columns(c, "jobs") else ""  # added by migration 9
+    c.execute(f"UPDATE jobs SET is_dup = (rowid NOT IN (SELECT MIN(rowid) FROM jobs GROUP BY dedup_key)){near}")
+    if _has_table(c, "rollup_weekly"):  # migrations before 8 run this without the rollup tables
+        rebuild_rollups(c)
+    _touch(c)
+
+def set_clusters(c: sqlite3.Connection, rows: Iterable[Tuple[str, Optional[str], int]],
+                 chunk_size: int = CHUNK_SIZE) -> int:
+    """Write (id, cluster_id, near_dup) assignments, then the is_dup flags and rollups they change."""
+    n = 0
+    for chunk in _chunks(rows, chunk_size):
+        keys = [r[0] for r in c.execute(f"SELECT dedup_key FROM jobs WHERE id IN ({','.join('?' * len(chunk))})",
+                                        [r[0] for r in chunk])]
+        _roll(c, -1, keys)
+        c.executemany("UPDATE jobs SET cluster_id=?, near_dup=? WHERE id=?", [(cid, nd, jid) for jid, cid, nd in chunk])
+        _mark_dups(c, keys)
+        _roll(c, 1, keys)
+        n += len(chunk)
+    if n:
+        _touch(c)
+    return n
+
+def _ids(c: sqlite3.Connection, table: str, names: Iterable[Optional[str]]) -> dict:
+    # name -> id in a (id INTEGER PRIMARY KEY, name UNIQUE) lookup table, adding new names
+    c.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(n,) for n in set(names) if n is not None])
+    return dict(c.execute(f"SELECT name, id FROM {table}"))
+
+def set_job_skills(items: Iterable[Tuple[str, List[str]]], version: Optional[str],
+                   conn: Optional[sqlite3.Connection] = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """Replace each job's skill set and stamp it with the taxonomy `version`; returns links written."""
+    n = touched = 0
+    with _maybe_conn(conn) as c:
+        for chunk in _chunks(items, chunk_size):
+            touched = 1
+            ids = _ids(c, "skill_dict", (s for _, skills in chunk for s in skills))
+            c.executemany("DELETE FROM job_skills WHERE job_id=?", [(jid,) for jid, _ in chunk])
+            links = {(jid, ids[s]) for jid, skills in chunk for s in skills}
+            c.executemany("INSERT INTO job_skills (job_id, skill_id) VALUES (?,?)", links)
+            c.executemany("UPDATE jobs SET skills_version=? WHERE id=?", [(version, jid) for jid, _ in chunk])
+            n += len(links)
+        if touched:
+            _touch(c)
+    return n
+
+def insert_skills(hits: Iterable[dict], conn: Optional[sqlite3.Connection] = None,
+                  chunk_size: int = CHUNK_SIZE) -> int:
+    """Add (job_id, skill) links; pairs already present are ignored."""
+    n = 0
+    with _maybe_conn(conn) as c:
+        for chunk in _chunks(((h["job_id"], h["skill"]) for h in hits), chunk_size):
+            ids = _ids(c, "skill_dict", (s for _, s in chunk))
+            cur = c.executemany("INSERT OR IGNORE INTO job_skills (job_id, skill_id) VALUES (?,?)",
+                                [(jid, ids[s]) for jid, s in chunk])
+            n += cur.rowcount
+        if n:
+            _touch(c)
+    return n
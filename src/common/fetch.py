@@ -0,0 +1,206 @@
+import os, random, threading, time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE = "https://api.adzuna.com/v1/api/jobs/{country}/search/{page}"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+LATENCIES = 10_000  # p50/p95 are over the most recent this many pages
+
+# (country, query, where) — `where` may be None for nationwide searches
+Target = Tuple[str, str, Optional[str]]
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/sec refilled up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate, self.capacity = rate, max(capacity, 1.0)
+        self._tokens, self._last = self.capacity, time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                need = (1 - self._tokens) / self.rate
+            time.sleep(need)
+            waited += need
+
+
+@dataclass
+class FetchStats:
+    pages: int = 0
+    results: int = 0
+    retries: int = 0
+    errors: int = 0
+    bytes: int = 0
+    failed: Dict[Target, str] = field(default_factory=dict)  # target -> the error that stopped its paging
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCIES))
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+
+    def _pct(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        xs = sorted(self.latencies)
+        return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "pages": self.pages, "results": self.results, "retries": self.retries, "errors": self.errors,
+            "bytes": self.bytes, "failed_targets": len(self.failed), "elapsed_s": round(self.elapsed, 3),
+            "pages_per_sec": round(self.pages / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(self._pct(0.50) * 1000, 1), "p95_ms": round(self._pct(0.95) * 1000, 1),
+        }
+
+    def __str__(self) -> str:
+        s = self.summary()
+        return (f"{s['pages']} pages ({s['results']} results) in {s['elapsed_s']}s • "
+                f"{s['pages_per_sec']} pages/s • p50 {s['p50_ms']}ms • p95 {s['p95_ms']}ms • "
+                f"{s['retries']} retries" + (f" • {len(self.failed)} target(s) failed" if self.failed else ""))
+
+
+class AdzunaFetcher:
+    """Pooled, rate-limited Adzuna search client.
+
+    `fetch_all` fans pages out across targets on a thread pool; each target keeps at most
+    `window` pages in flight and stops paging at the first short page, or at a page that still
+    fails after retries (stats.failed) while the other targets carry on.
+    """
+
+    def __init__(self, app_id: Optional[str] = None, app_key: Optional[str] = None, *,
+                 base: Optional[str] = None, results_per_page: int = 50, workers: int = 8, window: int = 2,
+                 rate_per_min: Optional[float] = None, burst: int = 5, max_retries: int = 4,
+                 backoff: float = 0.5, timeout: float = 20):
+        self.app_id = app_id or os.getenv("ADZUNA_APP_ID")
+        self.app_key = app_key or os.getenv("ADZUNA_APP_KEY")
+        # ADZUNA_BASE points the client at a stub server (scripts/stub_adzuna.py)
+        self.base = base or os.getenv("ADZUNA_BASE", BASE)
+        self.results_per_page = results_per_page
+        self.workers, self.window = max(1, workers), max(1, window)
+        self.max_retries, self.backoff, self.timeout = max_retries, backoff, timeout
+        # Adzuna's trial quota is 25 calls/minute; override with ADZUNA_RATE_PER_MIN
+        rate_per_min = rate_per_min or float(os.getenv("ADZUNA_RATE_PER_MIN", "25"))
+        self.bucket = TokenBucket(rate_per_min / 60.0, burst)
+        self.stats = FetchStats()
+        self._halted: set = set()
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def params(self, query: str, where: Optional[str], **extra) -> dict:
+        p = {"app_id": self.app_id, "app_key": self.app_key, "what": query,
+             "results_per_page": self.results_per_page, "content-type": "application/json"}
+        if where:
+            p["where"] = where
+        p.update({k: v for k, v in extra.items() if v is not None})
+        return p
+
+    def _count(self, **deltas):
+        with self._lock:
+            for k, v in deltas.items():
+                setattr(self.stats, k, getattr(self.stats, k) + v)
+
+    def fetch_page(self, country: str, query: str, where: Optional[str], page: int, **extra) -> dict:
+        url = self.base.format(country=country.lower(), page=page)
+        params = self.params(query, where, **extra)
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            t0 = time.perf_counter()
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+            try:
+                r = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    self._count(errors=1)
+                    raise
+            else:
+                if r.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                    if not r.ok:
+                        self._count(errors=1)
+                    r.raise_for_status()
+                    payload = r.json()
+                    with self._lock:
+                        self.stats.latencies.append(time.perf_counter() - t0)
+                        self.stats.pages += 1
+                        self.stats.bytes += len(r.content)
+                        self.stats.results += len(payload.get("results") or [])
+                    return payload
+                retry_after = r.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+            self._count(retries=1)
+            time.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    def halt(self, target: Target):
+        """Stop paging `target` after the page just yielded (called by the consumer of fetch_all)."""
+        self._halted.add(target)
+
+    def fetch_all(self, targets: Iterable[Target], max_pages: int, start_pages: Optional[Dict[Target, int]] = None,
+                  window: Optional[int] = None, **extra) -> Iterator[Tuple[Target, int, dict]]:
+        """Yield (target, page, payload) as pages complete, pages start..max_pages per target (start defaults to 1);
+        `window` overrides self.window for this call."""
+        window = max(1, window or self.window)
+        self.stats = FetchStats()
+        self._halted = set()
+        targets = list(targets)
+        next_page = {t: (start_pages or {}).get(t, 1) for t in targets}
+        stop_at: Dict[Target, int] = {}  # first short (or halted) page seen per target
+        inflight: Dict = {}
+
+        def submit(pool, t):
+            while (sum(1 for v in inflight.values() if v[0] == t) < window
+                   and next_page[t] <= min(max_pages, stop_at.get(t, max_pages))):
+                p = next_page[t]
+                next_page[t] += 1
+                inflight[pool.submit(self.fetch_page, *t, p, **extra)] = (t, p)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for t in targets:
+                submit(pool, t)
+            try:
+                while inflight:
+                    done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        t, p = inflight.pop(fut)
+                        if p > stop_at.get(t, max_pages):
+                            continue  # speculative page past the end of this target (or its failure)
+                        try:
+                            payload = fut.result()
+                        except (requests.RequestException, ValueError) as e:
+                            # not str(e): requests puts the URL, app_key included, in its messages
+                            r = getattr(e, "response", None)
+                            self.stats.failed[t] = f"page {p}: " + (f"HTTP {r.status_code}" if r is not None
+                                                                      else type(e).__name__)
+                            stop_at[t] = p - 1  # its earlier pages still arrive
+                            continue
+                        if len(payload.get("results") or []) < self.results_per_page:
+                            stop_at[t] = min(p, stop_at.get(t, p))
+                        yield t, p, payload
+                        if t in self._halted:
+                            self._halted.discard(t)
+                            stop_at[t] = min(p, stop_at.get(t, p))
+                        submit(pool, t)
+            finally:
+                for fut in inflight:
+                    fut.cancel()
+                self.stats.finished = time.perf_counter()
@@ -0,0 +1,102 @@
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import yaml
+
+from src.common.skills import trie_pattern
+
+LOCATIONS_YML = Path(__file__).resolve().parents[2] / "config" / "locations.yml"
+MEMO = 100_000  # distinct location strings kept resolved; the memo starts over past this
+UNMATCHED = 10_000  # unmatched strings kept as a sample
+
+
+class LocationNormaliser:
+    """Resolves Adzuna location strings to (city, state) from the config/locations.yml table.
+
+    All place names and state codes are compiled into one whole-word pattern. The first
+    place consistent with any explicit state wins the city; an explicit state wins the state.
+    """
+
+    def __init__(self, states: Dict[str, str], state_aliases: Dict[str, str], cities: Dict[str, dict]):
+        self.states = {k.upper(): v for k, v in states.items()}
+        self._state_terms = {k.lower(): k.upper() for k in self.states}
+        self._state_terms.update({k.lower(): v.upper() for k, v in (state_aliases or {}).items()})
+        self._places: Dict[str, Tuple[str, str]] = {}
+        for city, spec in cities.items():
+            code = spec["state"].upper()
+            for p in [city, *spec.get("places", [])]:
+                self._places.setdefault(str(p).lower(), (city, code))
+        terms = sorted(set(self._state_terms) | set(self._places), key=len, reverse=True)
+        self._rx = re.compile(r"(?<![a-z0-9])(" + trie_pattern(terms) + r")(?![a-z0-9])")
+        self._memo: Dict[Optional[str], Tuple[str, str]] = {}
+        self.unmatched: set = set()  # distinct strings seen that matched no place or state (the first UNMATCHED)
+
+    @classmethod
+    def from_yaml(cls, path: Path = LOCATIONS_YML) -> "LocationNormaliser":
+        cfg = yaml.safe_load(Path(path).read_text())
+        return cls(cfg["states"], cfg.get("state_aliases") or {}, cfg["cities"])
+
+    def _resolve(self, loc: Optional[str]) -> Tuple[Optional[str], str]:
+        if loc is None or loc != loc:  # None / NaN
+            return None, ""
+        s = str(loc).lower()
+        code, places = None, []
+        for term in self._rx.findall(s):
+            if term in self._places:
+                places.append(self._places[term])
+            elif code is None:
+                code = self._state_terms[term]
+        city = next((c for c, st in places if code is None or st == code), None)
+        if city is not None:
+            code = code or self._places[city.lower()][1]
+        else:
+            # fallback: first token before comma, as the old canonical_city did
+            city = s.split(",")[0].strip().title()
+            if code is None and len(self.unmatched) < UNMATCHED:
+                self.unmatched.add(loc)
+        return city, self.states.get(code, "") if code else ""
+
+    def resolve(self, loc: Optional[str]) -> Tuple[Optional[str], str]:
+        """(city, state label) for one location string; '' state when nothing matched."""
+        hit = self._memo.get(loc)
+        if hit is None:
+            if len(self._memo) >= MEMO:  # the scheduler's normaliser lives as long as the process
+                self._memo.clear()
+            hit = self._memo[loc] = self._resolve(loc)
+        return hit
+
+    def normalise(self, locations):
+        """Resolve a whole pandas Series at once (one lookup per distinct string) into a city/state frame."""
+        import pandas as pd
+
+        uniq = pd.unique(locations)
+        table = pd.DataFrame([self.resolve(u) for u in uniq], columns=["city", "state"], index=uniq)
+        codes = pd.Index(uniq).get_indexer(locations)
+        out = table.iloc[codes]
+        out.index = locations.index
+        return out
+
+    def report_unmatched(self, locations: Iterable[Optional[str]], top: int = 20):
+        """Most common strings in `locations` that matched no place or state."""
+        misses = Counter(loc for loc in locations if loc is not None and loc == loc and not self.resolve(loc)[1])
+        return misses.most_common(top)
+
+
+_cache: Dict[Path, tuple] = {}
+
+
+def get_normaliser(path: Path = LOCATIONS_YML) -> LocationNormaliser:
+    """Compiled normaliser for `path`, rebuilt only when the file's mtime changes."""
+    path = Path(path)
+    mtime = path.stat().st_mtime_ns
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, LocationNormaliser.from_yaml(path))
+        _cache[path] = cached
+    return cached[1]
+
+
+def resolve(loc: Optional[str]) -> Tuple[Optional[str], str]:
+    return get_normaliser().resolve(loc)
@@ -0,0 +1,133 @@
+"""Per-run stage timers and counters for ETL runs (and the Dashboard's debug panel).
+
+    m = Metrics("etl")
+    with m.timer("parse", rows=len(page)):
+        ...
+    m.count("jobs", n)
+    m.record(conn)          # one row in the runs table (db._m11_runs)
+    m.write("run.json")     # or "run.prom" for Prometheus text format (node_exporter textfile)
+
+Timers accumulate over a run, so a stage that runs once per batch reports its total time,
+how many times it ran and rows/s over the rows it was given.
+"""
+import cProfile
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+
+class Metrics:
+    def __init__(self, kind: str, **info):
+        self.kind, self.info = kind, info
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.t0 = time.perf_counter()
+        self.timers: Dict[str, Dict[str, float]] = {}  # stage -> {seconds, calls, rows}
+        self.counters: Dict[str, float] = {}
+        self.finished: Optional[float] = None
+
+    @contextmanager
+    def timer(self, stage: str, rows: int = 0) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - t0, rows)
+
+    def add_time(self, stage: str, seconds: float, rows: int = 0, calls: int = 1):
+        t = self.timers.setdefault(stage, {"seconds": 0.0, "calls": 0, "rows": 0})
+        t["seconds"] += seconds
+        t["calls"] += calls
+        t["rows"] += rows
+
+    def merge(self, other: "Metrics"):
+        """Add another Metrics' timers and counters to these (e.g. one built on a worker thread)."""
+        for name, t in other.timers.items():
+            self.add_time(name, t["seconds"], t["rows"], t["calls"])
+        for name, n in other.counters.items():
+            self.count(name, n)
+
+    def count(self, name: str, n: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name: str, value: float):
+        self.counters[name] = value
+
+    def fetch(self, stats):
+        """Fold in an AdzunaFetcher's FetchStats (HTTP latency, bytes, retries)."""
+        s = stats.summary()
+        self.add_time("fetch", s["elapsed_s"], s["results"], calls=s["pages"])
+        for k in ("pages", "results", "retries", "errors", "failed_targets", "bytes", "p50_ms", "p95_ms"):
+            self.set(f"fetch_{k}", s[k])
+
+    def finish(self) -> "Metrics":
+        self.finished = self.finished or time.perf_counter()
+        return self
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.t0
+
+    def to_dict(self) -> dict:
+        stages = {name: {**t, "seconds": round(t["seconds"], 4),
+                         "rows_per_s": round(t["rows"] / t["seconds"]) if t["rows"] and t["seconds"] else None}
+                  for name, t in self.timers.items()}
+        return {"kind": self.kind, "started_at": self.started_at, "seconds": round(self.seconds, 3),
+                "stages": stages, "counters": self.counters, "info": self.info}
+
+    def summary(self) -> str:
+        parts = []
+        for name, t in sorted(self.timers.items(), key=lambda kv: -kv[1]["seconds"]):
+            rate = f" ({t['rows'] / t['seconds']:,.0f}/s)" if t["rows"] and t["seconds"] else ""
+            parts.append(f"{name} {t['seconds']:.2f}s{rate}")
+        return f"{self.kind} {self.seconds:.2f}s: " + " • ".join(parts)
+
+    def to_prometheus(self, prefix: str = "jobs_etl") -> str:
+        kind = json.dumps(self.kind)
+        lines = [f"# TYPE {prefix}_run_seconds gauge", f"{prefix}_run_seconds{{kind={kind}}} {self.seconds:.6f}",
+                 f"# TYPE {prefix}_stage_seconds gauge", f"# TYPE {prefix}_stage_rows gauge",
+                 f"# TYPE {prefix}_stage_calls gauge"]
+        for name, t in self.timers.items():
+            labels = f"{{kind={kind},stage={json.dumps(name)}}}"
+            lines += [f"{prefix}_stage_seconds{labels} {t['seconds']:.6f}",
+                      f"{prefix}_stage_rows{labels} {t['rows']}", f"{prefix}_stage_calls{labels} {t['calls']}"]
+        lines.append(f"# TYPE {prefix}_counter gauge")
+        lines += [f"{prefix}_counter{{kind={kind},name={json.dumps(k)}}} {v}" for k, v in self.counters.items()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path):
+        """JSON, or Prometheus text format when the file ends in .prom."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        body = self.to_prometheus() if path.suffix == ".prom" else json.dumps(self.to_dict(), indent=2)
+        tmp = path.with_suffix(path.suffix + ".tmp")  # scrapers never see a half-written file
+        tmp.write_text(body)
+        tmp.replace(path)
+
+    def record(self, conn: sqlite3.Connection) -> Optional[int]:
+        """Insert this run into the runs table; returns its id."""
+        d = self.finish().to_dict()
+        with conn:
+            cur = conn.execute("INSERT INTO runs (kind, started_at, seconds, rows, metrics) VALUES (?,?,?,?,?)",
+                               (self.kind, self.started_at, d["seconds"], self.counters.get("jobs"), json.dumps(d)))
+        return cur.lastrowid
+
+
+@contextmanager
+def profiled(path: Optional[Path]) -> Iterator[None]:
+    """cProfile the block and dump pstats to `path` (no-op without a path); read with
+    `python -m pstats PATH` or snakeviz."""
+    if not path:
+        yield
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        prof.dump_stats(path)
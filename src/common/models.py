@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, NamedTuple, Optional, Union
 
 class Job(BaseModel):
     id: str
@@ -14,3 +14,47 @@ class Job(BaseModel):
     salary_max: Optional[float] = None
     salary_avg: Optional[float] = None
     currency: Optional[str] = None
+
+class JobRecord(NamedTuple):
+    """Job as a plain tuple for the ingest hot path: same fields, no per-row validation.
+
+    Build lists of them through validate_page(); convert with to_job() / from_job() at the edges.
+    """
+    id: str
+    title: str
+    company: Optional[str] = None
+    location: Optional[str] = None
+    source: str = "sample"
+    posted_date: Optional[str] = None
+    description: Optional[str] = None
+    url: Optional[str] = None
+    salary_min: Optional[float] = None
+    salary_max: Optional[float] = None
+    salary_avg: Optional[float] = None
+    currency: Optional[str] = None
+
+    def to_job(self) -> Job:
+        return Job(**self._asdict())
+
+    @classmethod
+    def from_job(cls, job: Job) -> "JobRecord":
+        return cls(**job.model_dump())
+
+AnyJob = Union[Job, JobRecord]  # what db.job_row / upsert_jobs accept
+
+_STR = (2, 3, 5, 6, 7, 11)  # optional text fields
+_NUM = (8, 9, 10)  # salaries
+
+def _valid(r: JobRecord) -> bool:
+    return (type(r[0]) is str and type(r[1]) is str and type(r[4]) is str
+            and all(r[i] is None or type(r[i]) is str for i in _STR)
+            and all(r[i] is None or type(r[i]) is float for i in _NUM))
+
+def validate_page(records: List[JobRecord]) -> List[JobRecord]:
+    """Job's type checks for a whole page in one pass. Rows that are already the right types
+    (all of them, for well-formed API pages) pass through untouched; the rest go through Job,
+    so they are coerced exactly as before (ints to floats, ...) or raise its ValidationError."""
+    for i, r in enumerate(records):
+        if not _valid(r):
+            records[i] = JobRecord.from_job(r.to_job())
+    return records
@@ -0,0 +1,316 @@
+"""Near-duplicate postings (agency reposts, tweaked titles) via MinHash + LSH banding.
+
+Each job's title+description is cut into word 3-shingles and summarised by a NUM_PERM-value
+MinHash signature, stored in job_minhash next to the job. recluster() splits every
+signature into BANDS bands of ROWS values; jobs that share a band are candidates. Each
+candidate is checked against the others in its bucket, or the next NEIGHBOURS in a big one
+(estimated Jaccard >= THRESHOLD, and titles sharing at least TITLE_THRESHOLD of their words, since
+Adzuna's truncated descriptions are often just the employer's blurb), so the work grows with
+jobs x bands, not jobs^2. Connected candidates form a cluster named
+after its earliest job; every later member is flagged near_dup, which db folds into is_dup,
+so the Dashboard, rollups and exports count each cluster once. The buckets are kept in job_lsh,
+so a run only revisits the ones that new or changed signatures touch.
+"""
+import re
+import sqlite3
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.common.db import DESCRIPTION_SQL, _chunks, set_clusters, unband
+
+NUM_PERM, BANDS, ROWS = 64, 16, 4  # P(candidate) ~ 1 - (1 - J^4)^16: 0.998 at J=0.8, 0.64 at 0.5, 0.01 at 0.2
+THRESHOLD = 0.8
+TITLE_THRESHOLD = 0.5
+SHINGLE = 3
+NEIGHBOURS = 8  # a big bucket (a shared employer blurb) is checked as overlapping windows, not all-pairs
+VERSION = f"w{SHINGLE}-p{NUM_PERM}-v1"  # stored with each signature; bump when shingling/hashing changes
+
+_rng = np.random.default_rng(20250801)
+_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)  # odd multipliers
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_WORD_RX = re.compile(r"[a-z0-9]+")
+_token_hash: Dict[str, int] = {}
+TOKEN_MEMO = 200_000  # distinct words kept hashed; the memo starts over past this
+
+
+def job_text(title: Optional[str], description: Optional[str]) -> str:
+    return f"{title or ''} {description or ''}"
+
+
+def _tokens(text: str) -> np.ndarray:
+    toks = _WORD_RX.findall((text or "").lower())
+    out = np.empty(len(toks), dtype=np.uint64)
+    if len(_token_hash) > TOKEN_MEMO:  # a long-running scheduler sees an open-ended vocabulary
+        _token_hash.clear()
+    for i, t in enumerate(toks):
+        h = _token_hash.get(t)
+        if h is None:
+            h = _token_hash[t] = zlib.crc32(t.encode())
+        out[i] = h
+    return out
+
+
+def _shingles(t: np.ndarray) -> np.ndarray:
+    if len(t) < SHINGLE:
+        return t if len(t) else np.zeros(1, dtype=np.uint64)
+    h = t[:len(t) - SHINGLE + 1].copy()
+    for k in range(1, SHINGLE):
+        h = h * _MIX + t[k:len(t) - SHINGLE + 1 + k]
+    return h
+
+
+def signatures(texts: Iterable[str], chunk: int = 1000) -> np.ndarray:
+    """(n, NUM_PERM) uint32 MinHash signatures; permutations are multiply-shift hashes."""
+    texts = list(texts)
+    out = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        for lo in range(0, len(texts), chunk):
+            sh = [_shingles(_tokens(t)) for t in texts[lo:lo + chunk]]
+            starts = np.cumsum([0] + [len(s) for s in sh[:-1]])
+            hv = (np.concatenate(sh)[:, None] * _A + _B) >> np.uint64(32)
+            out[lo:lo + len(sh)] = np.minimum.reduceat(hv, starts, axis=0)
+    return out
+
+
+def band_keys(sigs: np.ndarray) -> np.ndarray:
+    """(n, BANDS) uint64 bucket key of each band of each signature."""
+    out = np.empty((len(sigs), BANDS), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for b in range(BANDS):
+            band = sigs[:, b * ROWS:(b + 1) * ROWS].astype(np.uint64)
+            key = band[:, 0].copy()
+            for k in range(1, ROWS):
+                key = key * _MIX + band[:, k]
+            out[:, b] = key
+    return out
+
+
+def candidate_pairs(sigs: np.ndarray) -> np.ndarray:
+    """(m, 2) unique index pairs (i < j) sharing at least one band: every pair in a bucket of up to
+    NEIGHBOURS + 1 rows, and each row with the next NEIGHBOURS in a bigger one."""
+    n = len(sigs)
+    pairs = []
+    keys = band_keys(sigs)
+    for b in range(BANDS):
+        order = np.argsort(keys[:, b], kind="stable")  # by key, then row
+        ks = keys[order, b]
+        for d in range(1, NEIGHBOURS + 1):
+            same = ks[d:] == ks[:-d]
+            if not same.any():  # no bucket has more than d rows
+                break
+            pairs.append(np.stack([order[:-d][same], order[d:][same]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    flat = np.concatenate(pairs).astype(np.int64)
+    code = np.unique(flat[:, 0] * n + flat[:, 1])
+    return np.stack([code // n, code % n], axis=1)
+
+
+def similarity(sigs: np.ndarray, pairs: np.ndarray, chunk: int = 1_000_000) -> np.ndarray:
+    """Estimated Jaccard (share of equal MinHash values) for each pair."""
+    out = np.empty(len(pairs), dtype=np.float32)
+    for lo in range(0, len(pairs), chunk):
+        p = pairs[lo:lo + chunk]
+        out[lo:lo + len(p)] = (sigs[p[:, 0]] == sigs[p[:, 1]]).mean(axis=1)
+    return out
+
+
+def cluster_labels(n: int, edges: np.ndarray) -> np.ndarray:
+    """Connected components of `edges`; each row's label is the smallest index in its component."""
+    labels = np.arange(n)
+    if not len(edges):
+        return labels
+    i, j = edges[:, 0], edges[:, 1]
+    while True:
+        m = np.minimum(labels[i], labels[j])
+        before = labels.copy()
+        np.minimum.at(labels, i, m)
+        np.minimum.at(labels, j, m)
+        while not np.array_equal(labels, labels[labels]):  # pointer jumping
+            labels = labels[labels]
+        if np.array_equal(labels, before):
+            return labels
+
+
+def title_similarity(a: Optional[str], b: Optional[str]) -> float:
+    wa, wb = set(_WORD_RX.findall((a or "").lower())), set(_WORD_RX.findall((b or "").lower()))
+    return len(wa & wb) / len(wa | wb) if wa | wb else 1.0
+
+
+def clusters(sigs: np.ndarray, threshold: float = THRESHOLD, titles: Optional[List[str]] = None) -> Dict[str, object]:
+    """Cluster rows of `sigs` (earliest first); returns labels plus the candidate/edge counts."""
+    pairs = candidate_pairs(sigs)
+    edges = pairs[similarity(sigs, pairs) >= threshold]
+    if titles is not None and len(edges):
+        keep = [title_similarity(titles[i], titles[j]) >= TITLE_THRESHOLD for i, j in edges]
+        edges = edges[np.array(keep, dtype=bool)]
+    return {"labels": cluster_labels(len(sigs), edges), "candidates": len(pairs), "edges": len(edges)}
+
+
+# ---- jobs.db ----------------------------------------------------------------------------------
+
+def store_signatures(conn: sqlite3.Connection, ids: List[str], text_hashes: List[Optional[str]],
+                     sigs: np.ndarray):
+    # a new or different signature is (re)filed in job_lsh by the next recluster()
+    conn.executemany(
+        """INSERT INTO job_minhash (job_id, text_hash, version, sig) VALUES (?,?,?,?)
+           ON CONFLICT(job_id) DO UPDATE SET text_hash = excluded.text_hash, version = excluded.version,
+               sig = excluded.sig, banded = banded AND sig = excluded.sig""",
+        [(i, h, VERSION, s.tobytes()) for i, h, s in zip(ids, text_hashes, sigs)])
+
+
+def refresh_signatures(conn: sqlite3.Connection, chunk_size: int = 5000) -> int:
+    """Compute signatures for jobs that have none, or whose text or VERSION changed since."""
+    stale = [r[0] for r in conn.execute(
+        """SELECT j.id FROM jobs j LEFT JOIN job_minhash m ON m.job_id = j.id
+           WHERE m.job_id IS NULL OR m.text_hash IS NOT j.text_hash OR m.version != ?""", (VERSION,))]
+    for chunk in _chunks(stale, chunk_size):
+        rows = conn.execute(f"SELECT id, title, {DESCRIPTION_SQL}, text_hash FROM jobs WHERE id IN "
+                            f"({','.join('?' * len(chunk))})", chunk).fetchall()
+        sigs = signatures(job_text(t, d) for _, t, d, _ in rows)
+        store_signatures(conn, [r[0] for r in rows], [r[3] for r in rows], sigs)
+    return len(stale)
+
+
+def _stage(conn: sqlite3.Connection, table: str, rows: Iterable[tuple], cols: str = "id"):
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} ({cols}, PRIMARY KEY ({cols})) WITHOUT ROWID")
+    conn.execute(f"DELETE FROM {table}")
+    conn.executemany(f"INSERT OR IGNORE INTO {table} VALUES ({','.join('?' * len(cols.split(',')))})", rows)
+
+
+def _filed(rows: Iterable[tuple]) -> set:
+    """(band, key, job_id) for (job_id, bands) rows, as job_lsh holds them."""
+    return {(b, k, jid) for jid, bands in rows if bands
+            for b, k in enumerate(np.frombuffer(bands, dtype=np.int64).tolist())}
+
+
+def _members(conn: sqlite3.Connection, buckets: Iterable[tuple]) -> set:
+    """Ids filed in any of the (band, key) buckets."""
+    _stage(conn, "lsh_buckets", buckets, "band, key")
+    return {r[0] for r in conn.execute(
+        "SELECT DISTINCT l.job_id FROM lsh_buckets b JOIN job_lsh l ON l.band = b.band AND l.key = b.key")}
+
+
+def _refile(conn: sqlite3.Connection, rows: List[tuple], touched: Optional[set] = None, chunk_size: int = 5000):
+    """File (job_id, sig, bands) rows under their current band keys, adding every bucket they were
+    or are in to `touched`."""
+    for chunk in _chunks(rows, chunk_size):
+        sigs = np.frombuffer(b"".join(r[1] for r in chunk), dtype=np.uint32).reshape(len(chunk), NUM_PERM)
+        keys = band_keys(sigs).view(np.int64)
+        old = _filed((r[0], r[2]) for r in chunk)
+        new = {(b, k, r[0]) for r, row in zip(chunk, keys.tolist()) for b, k in enumerate(row)}
+        # in key order, so the inserts walk the job_lsh b-tree instead of jumping around it
+        conn.executemany("DELETE FROM job_lsh WHERE band = ? AND key = ? AND job_id = ?", sorted(old - new))
+        conn.executemany("INSERT OR IGNORE INTO job_lsh (band, key, job_id) VALUES (?,?,?)", sorted(new - old))
+        conn.executemany("UPDATE job_minhash SET bands = ?, banded = 1 WHERE job_id = ?",
+                         [(k.tobytes(), r[0]) for r, k in zip(chunk, keys)])
+        if touched is not None:
+            touched |= {(b, k) for b, k, _ in old | new}
+
+
+def forget(conn: sqlite3.Connection, ids: List[str]):
+    """Before these jobs are deleted (retention.archive): take them out of job_lsh and have the next
+    recluster() revisit their bucket neighbours, clusters and dedup_key groups."""
+    for chunk in _chunks(ids, 5000):
+        marks = ",".join("?" * len(chunk))
+        filed = _filed(conn.execute(f"SELECT job_id, bands FROM job_minhash WHERE job_id IN ({marks})", chunk))
+        near = _members(conn, {(b, k) for b, k, _ in filed})
+        near |= {r[0] for r in conn.execute(
+            f"""SELECT id FROM jobs WHERE cluster_id IN (SELECT cluster_id FROM jobs WHERE id IN ({marks}))
+                UNION SELECT id FROM jobs WHERE dedup_key IN (SELECT dedup_key FROM jobs WHERE id IN ({marks}))""",
+            chunk + chunk)}
+        conn.executemany("DELETE FROM job_lsh WHERE band = ? AND key = ? AND job_id = ?", filed)
+        unband(conn, sorted(near - set(chunk)))
+
+
+def _jobs(conn: sqlite3.Connection, where: str = "true") -> list:
+    # (rowid, id, dedup_key, cluster_id, near_dup, sig, key_first, title), earliest first
+    return conn.execute(
+        f"""SELECT j.rowid, j.id, j.dedup_key, j.cluster_id, j.near_dup, m.sig,
+                   j.rowid = (SELECT MIN(rowid) FROM jobs j2 WHERE j2.dedup_key = j.dedup_key) AS key_first, j.title
+            FROM jobs j JOIN job_minhash m ON m.job_id = j.id WHERE {where} ORDER BY j.rowid""").fetchall()
+
+
+def _sigs(rows: List[tuple]) -> np.ndarray:
+    return np.frombuffer(b"".join(r[5] for r in rows), dtype=np.uint32).reshape(len(rows), NUM_PERM)
+
+
+def _cluster(pool: List[tuple], threshold: float) -> Dict[str, object]:
+    if not pool:
+        return {"labels": np.empty(0, dtype=np.int64), "candidates": 0, "edges": 0}
+    return clusters(_sigs(pool), threshold, [r[7] for r in pool])
+
+
+def _neighbourhood(conn: sqlite3.Connection, touched: set, threshold: float):
+    """Grow `touched` until its clusters can be recomputed on their own (see recluster); returns its
+    rows, the clustered group-first rows (its own plus their bucket neighbours), which of those are
+    its own, and the clustering."""
+    core, frontier = set(), touched
+    while True:
+        # the frontier plus everything sharing a cluster or dedup_key group with it
+        _stage(conn, "recluster_ids", ((i,) for i in frontier))
+        core |= frontier | {r[0] for r in conn.execute(
+            """SELECT id FROM jobs WHERE cluster_id IN (SELECT cluster_id FROM jobs WHERE id IN recluster_ids)
+               UNION SELECT id FROM jobs WHERE dedup_key IN (SELECT dedup_key FROM jobs WHERE id IN recluster_ids)""")}
+        _stage(conn, "recluster_ids", ((i,) for i in core))
+        rows = _jobs(conn, "j.id IN recluster_ids")
+        firsts = [r for r in rows if r[6]]
+        # and every group-first job sharing a bucket with them, so their buckets pair up as in a full run
+        keys = band_keys(_sigs(firsts)).view(np.int64)
+        _stage(conn, "recluster_ids", ((i,) for i in _members(
+            conn, {(b, k) for row in keys.tolist() for b, k in enumerate(row)}) - core))
+        pool = sorted(firsts + [r for r in _jobs(conn, "j.id IN recluster_ids") if r[6]])
+        res = _cluster(pool, threshold)
+        inside = np.array([r[1] in core for r in pool], dtype=bool)
+        reaches = np.zeros(len(pool), dtype=bool)
+        np.logical_or.at(reaches, res["labels"], inside)
+        # a neighbour clustered with one of ours brings its own cluster and group in
+        frontier = {r[1] for r, lab, own in zip(pool, res["labels"], inside) if not own and reaches[lab]}
+        if not frontier:
+            return rows, pool, inside, res
+
+
+def recluster(conn: sqlite3.Connection, threshold: float = THRESHOLD, full: bool = False,
+              limit: Optional[int] = None) -> Dict[str, int]:
+    """Bring the near-duplicate clusters up to date and write only the assignments that changed.
+
+    Clustering runs over the first row of each exact dedup_key group; the group's other rows
+    (already is_dup) inherit its cluster_id. Only signatures that are new or changed (or that
+    forget()/db.unband() flagged) are refiled in job_lsh, and only the jobs in the buckets they
+    left or joined are reclustered, with their whole clusters and dedup_key groups and with every
+    job sharing a bucket with them; while a cluster reaches a job outside that set, the set grows
+    by that job's cluster and group. The result is what a run over every job would give.
+    full=True clusters every job in one pass, e.g. after changing the threshold.
+    limit: refile at most this many signatures, so one call stays short; the rest wait for the
+    next call ("pending"), and until then cluster as they did before they changed.
+    """
+    signed = refresh_signatures(conn)
+    dirty = conn.execute("SELECT job_id, sig, bands FROM job_minhash WHERE banded = 0 LIMIT ?",
+                         (-1 if full or limit is None else limit,)).fetchall()
+    # past a quarter of the jobs (the first run, a big backfill) one pass over everything is cheaper
+    full = full or len(dirty) * 4 > conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+    buckets = None if full else set()
+    _refile(conn, dirty, buckets)
+    if full:
+        rows = _jobs(conn)
+        pool = [r for r in rows if r[6]]
+        inside, res = np.ones(len(pool), dtype=bool), _cluster(pool, threshold)
+    else:
+        touched = _members(conn, buckets) | {r[0] for r in dirty}
+        rows, pool, inside, res = _neighbourhood(conn, touched, threshold)
+    labels = res["labels"]
+    by_key = {r[2]: (pool[labels[i]][1], int(labels[i] != i)) for i, r in enumerate(pool) if inside[i]}
+    changes = []
+    for _, jid, key, cid, near, _, first, _ in rows:
+        new_cid, new_near = by_key.get(key, (jid, 0))
+        new_near = new_near if first else 0
+        if (cid, near) != (new_cid, new_near):
+            changes.append((jid, new_cid, new_near))
+    set_clusters(conn, changes)
+    return {"signed": signed, "jobs": int(inside.sum()), "candidates": res["candidates"], "edges": res["edges"],
+            "clusters": len(set(labels[inside].tolist())), "changed": len(changes),
+            "near_dups": conn.execute("SELECT COUNT(*) FROM jobs WHERE near_dup = 1").fetchone()[0],
+            "pending": conn.execute("SELECT COUNT(*) FROM job_minhash WHERE banded = 0").fetchone()[0]}
@@ -0,0 +1,277 @@
+"""Parameterised read queries behind the Dashboard; each returns only what one chart needs."""
+import json
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.common.db import (DAY_SQL, SALARY_BUCKET, WEEK_DAY_SQL, data_version, get_conn,  # noqa: F401
+                           job_columns)
+
+# cleaned projection of jobs using the columns written at ingest, all of them in
+# idx_jobs_facets so scans never read the rows; is_dup marks all but one row per
+# (title, company, city, date)
+BASE_SQL = """
+dedup AS (
+    SELECT rowid, id, source_id, posted_day, city_clean, state, role_bucket,
+           salary_min_clean AS salary_min, salary_max_clean AS salary_max, salary_avg_clean AS salary_avg
+    FROM jobs WHERE is_dup = 0
+)"""
+
+
+_TERM_RX = re.compile(r'"([^"]*)"?|(\S+)')
+
+
+def fts_query(text: str, prefix: bool = True) -> str:
+    """Turn a search box string into a safe FTS5 MATCH expression (all terms must match).
+
+    Bare words match as prefixes ("analy" finds "analyst") unless prefix=False; "quoted text"
+    is an exact phrase. Everything is quoted, so FTS5 operators in user input are inert.
+    """
+    parts = []
+    for phrase, word in _TERM_RX.findall(text or ""):
+        if phrase.strip():
+            parts.append(f'"{phrase}"')
+        elif re.search(r"\w", word):
+            word = word.replace('"', "").rstrip("*")
+            parts.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(parts)
+
+
+# rowids of jobs whose title/company/location/description match (db._m7_jobs_fts)
+FTS_MATCH = "SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH {}"
+
+
+@dataclass(frozen=True)
+class Filters:
+    city: str = "All"
+    source: str = "All"
+    role: str = "All"
+    keyword: str = ""
+
+    def where(self, typed: bool = False) -> Tuple[str, Dict[str, str]]:
+        """WHERE over the rollups, or (typed=True) over BASE_SQL's columns."""
+        clauses, params = [], {}
+        if self.city != "All":
+            clauses.append("city_clean = :city"); params["city"] = self.city
+        if self.source != "All":
+            clauses.append("source_id = (SELECT id FROM sources WHERE name = :source)" if typed
+                           else "source = :source")
+            params["source"] = self.source
+        if self.role != "All":
+            clauses.append("role_bucket = :role"); params["role"] = self.role
+        kw = fts_query(self.keyword)
+        if kw:
+            clauses.append(f"rowid IN ({FTS_MATCH.format(':kw')})"); params["kw"] = kw
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def connect(path=None) -> sqlite3.Connection:
+    return get_conn(path, workload="read")
+
+
+def _view(f: Filters) -> Tuple[str, Dict[str, str]]:
+    where, params = f.where(typed=True)
+    return f"WITH {BASE_SQL}, view AS (SELECT * FROM dedup{where})", params
+
+
+def _df(conn, sql: str, params=None) -> pd.DataFrame:
+    return pd.read_sql_query(sql, conn, params=params or {})
+
+
+def filter_options(conn) -> Dict[str, List[str]]:
+    opts = {}
+    for col in ("city_clean", "source", "role_bucket"):
+        # every value with a counted posting has a rollup row, and the rollup is tiny next to jobs
+        rows = conn.execute(f"SELECT DISTINCT {col} FROM rollup_weekly WHERE {col} != '' ORDER BY 1")
+        opts[col] = [r[0] for r in rows]
+    return opts
+
+
+def _rollup_where(f: Filters, *extra: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """WHERE over the rollup tables for `f`, or None when a keyword forces a live query."""
+    if fts_query(f.keyword):
+        return None
+    where, params = Filters(f.city, f.source, f.role).where()
+    clauses = [where[len(" WHERE "):]] if where else []
+    clauses += extra
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def row_count(conn, f: Filters) -> int:
+    rollup = _rollup_where(f)
+    if rollup:
+        return conn.execute(f"SELECT COALESCE(SUM(listings), 0) FROM rollup_weekly{rollup[0]}", rollup[1]).fetchone()[0]
+    cte, params = _view(f)
+    return conn.execute(f"{cte} SELECT COUNT(*) FROM view", params).fetchone()[0]
+
+
+def skill_counts(conn, f: Filters) -> pd.DataFrame:
+    cte, params = _view(f)
+    return _df(conn, f"""{cte}
+        , counts AS (SELECT skill_id, COUNT(*) AS count FROM job_skills
+                     WHERE job_id IN (SELECT id FROM view) GROUP BY skill_id)
+        SELECT d.name AS skill, c.count FROM counts c JOIN skill_dict d ON d.id = c.skill_id
+        ORDER BY count DESC, skill""", params)
+
+
+def salary_histogram(conn, f: Filters, bins: int = 30) -> pd.DataFrame:
+    """Fixed-width bins over min/avg/max salaries pooled together; columns bin_start, bin_end, jobs."""
+    cte, params = _view(f)
+    vals = f"""{cte}, vals AS (
+            SELECT salary_avg AS v FROM view UNION ALL SELECT salary_min FROM view UNION ALL SELECT salary_max FROM view
+        ), clean AS (SELECT v FROM vals WHERE v IS NOT NULL)"""
+    lo, hi = conn.execute(f"{vals} SELECT MIN(v), MAX(v) FROM clean", params).fetchone()
+    if lo is None:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "jobs"])
+    width = (hi - lo) / bins or 1.0
+    df = _df(conn, f"""{vals}
+        SELECT MIN(CAST((v - :lo) / :w AS INTEGER), :last) AS b, COUNT(*) AS jobs
+        FROM clean GROUP BY b ORDER BY b""", {**params, "lo": lo, "w": width, "last": bins - 1})
+    df["bin_start"] = lo + df["b"] * width
+    df["bin_end"] = df["bin_start"] + width
+    return df[["bin_start", "bin_end", "jobs"]]
+
+
+def state_counts(conn, f: Filters) -> pd.DataFrame:
+    rollup = _rollup_where(f, "state != ''")
+    if rollup:
+        return _df(conn, f"""SELECT state, SUM(listings) AS listings FROM rollup_weekly{rollup[0]}
+            GROUP BY state ORDER BY listings DESC""", rollup[1])
+    cte, params = _view(f)
+    return _df(conn, f"""{cte}
+        SELECT state, COUNT(*) AS listings FROM view WHERE state != ''
+        GROUP BY state ORDER BY listings DESC""", params)
+
+
+def weekly_trend(conn, f: Filters) -> pd.DataFrame:
+    rollup = _rollup_where(f, "state != ''", "week != ''")
+    if rollup:
+        df = _df(conn, f"""SELECT week, state, SUM(listings) AS listings FROM rollup_weekly{rollup[0]}
+            GROUP BY week, state ORDER BY week""", rollup[1])
+    else:
+        cte, params = _view(f)
+        df = _df(conn, f"""{cte}
+            SELECT {DAY_SQL.format("wk")} AS week, state, listings FROM (
+                SELECT {WEEK_DAY_SQL} AS wk, state, COUNT(*) AS listings
+                FROM view WHERE state != '' AND posted_day IS NOT NULL
+                GROUP BY wk, state) ORDER BY week""", params)
+    df["week"] = pd.to_datetime(df["week"])
+    return df
+
+
+def salary_quantile(conn, f: Filters, q: float = 0.5, by: str = "city_clean") -> pd.DataFrame:
+    """Approximate salary quantile per `by` group from the rollup histograms, interpolated within
+    SALARY_BUCKET-wide buckets (so within a bucket's width of the exact value)."""
+    assert by in ("city_clean", "state", "role_bucket", "source", "week")
+    rollup = _rollup_where(f)
+    if rollup is None:
+        raise ValueError("salary_quantile reads rollups only; it can't apply a keyword filter")
+    # rank r = (n-1)q + 1 as in pandas' linear quantile; each order statistic is placed evenly
+    # within its histogram bucket, and r is interpolated between the two it falls between
+    return _df(conn, f"""WITH h AS (
+            SELECT {by} AS g, bucket, SUM(n) AS n FROM rollup_salary{rollup[0]} GROUP BY g, bucket
+        ), c AS (
+            SELECT g, bucket, n, SUM(n) OVER (PARTITION BY g ORDER BY bucket) AS cum FROM h WHERE n > 0
+        ), k AS (
+            SELECT g, CAST((MAX(cum) - 1) * :q AS INTEGER) + 1 AS k1,
+                   (MAX(cum) - 1) * :q - CAST((MAX(cum) - 1) * :q AS INTEGER) AS frac
+            FROM c GROUP BY g
+        ), v AS (
+            SELECT g, frac,
+                   (SELECT bucket - 0.5 + (k1 - (cum - n) - 0.5) / n FROM c
+                    WHERE c.g = k.g AND cum - n < k1 AND k1 <= cum) AS v1,
+                   (SELECT bucket - 0.5 + (k1 + 1 - (cum - n) - 0.5) / n FROM c
+                    WHERE c.g = k.g AND cum - n < k1 + 1 AND k1 + 1 <= cum) AS v2
+            FROM k
+        )
+        SELECT NULLIF(g, '') AS {by}, (v1 + frac * (COALESCE(v2, v1) - v1)) * {SALARY_BUCKET} AS salary
+        FROM v ORDER BY salary DESC""", {**rollup[1], "q": q})
+
+
+def median_salary_by_city(conn, f: Filters) -> pd.DataFrame:
+    if _rollup_where(f) is not None:
+        return salary_quantile(conn, f, 0.5).rename(columns={"salary": "median_salary"})
+    cte, params = _view(f)
+    return _df(conn, f"""{cte}, ranked AS (
+            SELECT city_clean, salary_avg,
+                   ROW_NUMBER() OVER (PARTITION BY city_clean ORDER BY salary_avg) AS rn,
+                   COUNT(*) OVER (PARTITION BY city_clean) AS n
+            FROM view WHERE salary_avg IS NOT NULL
+        )
+        SELECT city_clean, AVG(salary_avg) AS median_salary FROM ranked
+        WHERE rn IN ((n + 1) / 2, (n + 2) / 2)
+        GROUP BY city_clean ORDER BY median_salary DESC""", params)
+
+
+def job_details(conn, ids: Sequence[str], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Full rows (description included) for just the given ids, for detail views."""
+    cols = job_columns(columns or ["id", "title", "company", "location", "source", "posted_date",
+                                   "url", "salary_min", "salary_max", "description"])
+    marks = ",".join("?" * len(ids))
+    return _df(conn, f"SELECT {cols} FROM jobs WHERE id IN ({marks})", list(ids)) if ids else pd.DataFrame()
+
+
+# job_page sort keys (BASE_SQL columns); db.LISTING_INDEXES walks each in order, id breaking ties
+PAGE_SORTS = {"date": "posted_day", "salary": "salary_avg"}
+
+
+def job_page(conn, f: Filters, sort: str = "date", descending: bool = True, after: Optional[Tuple] = None,
+             limit: int = 25) -> pd.DataFrame:
+    """One page of postings in `sort` order, keyset-paged: pass the last row's (sort_value, id)
+    as `after` for the next page, so every page costs the same however deep it is. Postings with
+    no value to sort by are left out; descriptions are not read (job_details for the page's ids)."""
+    col = PAGE_SORTS[sort]
+    cte, params = _view(f)
+    op, order = ("<", "DESC") if descending else (">", "ASC")
+    keyset = f"AND ({col}, id) {op} (:after_value, :after_id)" if after else ""
+    if after:
+        params = {**params, "after_value": after[0], "after_id": after[1]}
+    return _df(conn, f"""{cte}, page AS (
+            SELECT rowid, id, {col} AS sort_value, city_clean, state, role_bucket, salary_min, salary_max
+            FROM view WHERE {col} IS NOT NULL {keyset} ORDER BY {col} {order}, id {order} LIMIT :limit)
+        SELECT p.id, {DAY_SQL.format("j.posted_day")} AS posted_date, j.title, j.company, j.location,
+               p.city_clean, p.state, p.role_bucket, p.salary_min, p.salary_max, p.sort_value
+        FROM page p JOIN jobs j ON j.rowid = p.rowid ORDER BY p.sort_value {order}, p.id {order}""",
+               {**params, "limit": limit})
+
+
+# bm25 column weights, in db.FTS_COLUMNS order: a hit in the title counts most
+FTS_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+
+def search(conn, text: str, f: Filters = Filters(), limit: int = 50) -> pd.DataFrame:
+    """Best-ranked postings for a search string (see fts_query), within the other filters."""
+    match = fts_query(text)
+    if not match:
+        return pd.DataFrame(columns=["id", "title", "company", "location", "snippet", "score"])
+    cte, params = _view(Filters(f.city, f.source, f.role))
+    w = ", ".join(map(str, FTS_WEIGHTS))
+    return _df(conn, f"""{cte}
+        SELECT j.id, j.title, j.company, j.location,
+               snippet(jobs_fts, 3, '[', ']', '…', 12) AS snippet, -bm25(jobs_fts, {w}) AS score
+        FROM jobs_fts JOIN view v ON v.rowid = jobs_fts.rowid JOIN jobs j ON j.rowid = v.rowid
+        WHERE jobs_fts MATCH :match
+        ORDER BY bm25(jobs_fts, {w}) LIMIT :limit""", {**params, "match": match, "limit": limit})
+
+
+def term_count(conn, term: str, f: Filters = Filters()) -> int:
+    """Postings that mention `term` as a whole phrase in title or description, from the index alone;
+    an ad-hoc skill count without re-scanning every description."""
+    phrase = term.replace('"', "").strip()
+    if not phrase:
+        return 0
+    cte, params = _view(f)
+    return conn.execute(f"{cte} SELECT COUNT(*) FROM view WHERE rowid IN ({FTS_MATCH.format(':term')})",
+                        {**params, "term": f'{{title description}}: "{phrase}"'}).fetchone()[0]
+
+
+def recent_runs(conn, limit: int = 10) -> pd.DataFrame:
+    """Latest ETL/replay/backfill runs (src/common/metrics.py), slowest stage first in `stages`."""
+    df = _df(conn, "SELECT id, kind, started_at, seconds, rows, metrics FROM runs ORDER BY id DESC LIMIT :n",
+             {"n": limit})
+    stages = [sorted(json.loads(m)["stages"].items(), key=lambda kv: -kv[1]["seconds"]) for m in df.pop("metrics")]
+    df["stages"] = [" • ".join(f"{k} {v['seconds']:.2f}s" for k, v in s) for s in stages]
+    return df
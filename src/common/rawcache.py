@@ -0,0 +1,157 @@
+"""On-disk cache of raw Adzuna page responses, for reprocessing without the API.
+
+Payloads are zlib-compressed JSON blobs keyed by their sha1, so a page that comes back
+unchanged is stored once however often it is fetched. Each fetch is indexed by
+(country, query, location, page, fetched_on). Lives in its own SQLite file (RAW_CACHE,
+default data/raw_cache.db) so jobs.db stays small; old entries expire after
+RAW_CACHE_TTL_DAYS and the oldest are evicted once blobs exceed RAW_CACHE_MAX_MB.
+"""
+import hashlib
+import json
+import os
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.common.db import get_conn
+from src.common.fetch import Target
+
+CACHE_PATH = Path(os.getenv("RAW_CACHE") or Path(__file__).resolve().parents[2] / "data" / "raw_cache.db")
+TTL_DAYS = int(os.getenv("RAW_CACHE_TTL_DAYS", "90"))
+MAX_MB = int(os.getenv("RAW_CACHE_MAX_MB", "512"))
+
+REPLAY_ORDER = "p.fetched_on DESC, p.country, p.query, p.location, p.page"
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS blobs (
+        digest TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        data BLOB NOT NULL
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS pages (
+        country TEXT NOT NULL,
+        query TEXT NOT NULL,
+        location TEXT NOT NULL DEFAULT '',
+        page INTEGER NOT NULL,
+        fetched_on TEXT NOT NULL,
+        digest TEXT NOT NULL REFERENCES blobs(digest),
+        PRIMARY KEY (country, query, location, page, fetched_on)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_pages_fetched ON pages(fetched_on)",
+    "CREATE INDEX IF NOT EXISTS idx_pages_digest ON pages(digest)",
+)
+
+
+def _encode(payload: dict) -> Tuple[str, bytes]:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha1(body).hexdigest(), zlib.compress(body, 6)
+
+
+class RawCache:
+    def __init__(self, path: Optional[Path] = None, ttl_days: int = TTL_DAYS, max_mb: int = MAX_MB):
+        self.path = Path(path or CACHE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_days, self.max_bytes = ttl_days, max_mb * 1024 * 1024
+        self.conn = get_conn(self.path, workload="ingest")
+        with self.conn:
+            for stmt in SCHEMA:
+                self.conn.execute(stmt)
+        self.stored = self.new_blobs = 0
+
+    def close(self):
+        self.conn.close()
+
+    def put(self, target: Target, page: int, payload: dict, fetched_on: Optional[str] = None):
+        country, query, where = target
+        digest, data = _encode(payload)
+        with self.conn:
+            cur = self.conn.execute("INSERT OR IGNORE INTO blobs (digest, size, data) VALUES (?,?,?)",
+                                    (digest, len(data), data))
+            self.new_blobs += cur.rowcount
+            self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?,?,?,?,?,?)",
+                              (country.lower(), query, where or "", page,
+                               fetched_on or date.today().isoformat(), digest))
+        self.stored += 1
+
+    def record(self, pages: Iterable[Tuple[Target, int, dict]]) -> Iterator[Tuple[Target, int, dict]]:
+        """Pass fetched pages through unchanged, storing each one."""
+        for target, page, payload in pages:
+            self.put(target, page, payload)
+            yield target, page, payload
+
+    @staticmethod
+    def _where(since: Optional[str], until: Optional[str], query: Optional[str]) -> Tuple[str, list]:
+        clauses, params = [], []
+        if since:
+            clauses.append("fetched_on >= ?"); params.append(since)
+        if until:
+            clauses.append("fetched_on <= ?"); params.append(until)
+        if query:
+            clauses.append("query = ?"); params.append(query)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def replay(self, since: Optional[str] = None, until: Optional[str] = None,
+               query: Optional[str] = None) -> Iterator[Tuple[Target, int, dict]]:
+        """Cached pages as (target, page, payload), newest fetch first so later data wins dedup."""
+        where, params = self._where(since, until, query)
+        rows = self.conn.execute(
+            f"""SELECT p.country, p.query, p.location, p.page, b.data FROM pages p
+                JOIN blobs b ON b.digest = p.digest{where}
+                ORDER BY {REPLAY_ORDER}""", params)
+        for country, q, loc, page, data in rows:
+            yield (country, q, loc or None), page, json.loads(zlib.decompress(data))
+
+    def index(self, since: Optional[str] = None, until: Optional[str] = None,
+              query: Optional[str] = None) -> List[Tuple[Target, int, str]]:
+        """(target, page, digest) in replay() order, without loading payloads; see payloads()."""
+        where, params = self._where(since, until, query)
+        rows = self.conn.execute(
+            f"SELECT p.country, p.query, p.location, p.page, p.digest FROM pages p{where} ORDER BY {REPLAY_ORDER}",
+            params)
+        return [((country, q, loc or None), page, digest) for country, q, loc, page, digest in rows]
+
+    def payloads(self, digests: Iterable[str]) -> Dict[str, dict]:
+        digests = list(set(digests))
+        out = {}
+        for lo in range(0, len(digests), 500):
+            chunk = digests[lo:lo + 500]
+            for digest, data in self.conn.execute(
+                    f"SELECT digest, data FROM blobs WHERE digest IN ({','.join('?' * len(chunk))})", chunk):
+                out[digest] = json.loads(zlib.decompress(data))
+        return out
+
+    def evict(self) -> Tuple[int, int]:
+        """Drop entries past the TTL, then the oldest fetch days until blobs fit max_mb.
+
+        Returns (pages removed, blobs removed).
+        """
+        before = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        blobs_before = self.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        with self.conn:
+            if self.ttl_days:
+                cutoff = (date.today() - timedelta(days=self.ttl_days)).isoformat()
+                self.conn.execute("DELETE FROM pages WHERE fetched_on < ?", (cutoff,))
+            self._drop_orphans()
+            days = [r[0] for r in self.conn.execute("SELECT DISTINCT fetched_on FROM pages ORDER BY 1")]
+            for day in days[:-1]:  # never evict the newest day
+                if self.size() <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM pages WHERE fetched_on = ?", (day,))
+                self._drop_orphans()
+        after = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        blobs_after = self.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        return before - after, blobs_before - blobs_after
+
+    def _drop_orphans(self):
+        self.conn.execute("DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM pages)")
+
+    def size(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def stats(self) -> dict:
+        pages, days, lo, hi = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT fetched_on), MIN(fetched_on), MAX(fetched_on) FROM pages").fetchone()
+        blobs = self.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        return {"pages": pages, "blobs": blobs, "days": days, "first": lo, "last": hi,
+                "mb": round(self.size() / 1024 / 1024, 2)}
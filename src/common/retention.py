@@ -0,0 +1,138 @@
+"""Retention for jobs.db: archive old postings to Parquet, compress descriptions, compact the file.
+
+archive() moves jobs posted before a cutoff to <dir>/jobs/posted_month=YYYY-MM/ (and their
+skills to skills/, same layout as columnar.export, zstd) and deletes them with their skills,
+signatures and FTS entries. What they added to rollup_weekly/rollup_salary stays there, and is
+also kept in archived_weekly/archived_salary so rebuild_rollups() adds it back; their ids go to
+archived_jobs so a re-fetch of an old posting isn't counted twice. Whole dedup groups and
+near-duplicate clusters move together: a cluster with any member inside the window stays.
+
+compress_descriptions() moves descriptions of older postings into job_descriptions (zlib);
+read them through db.DESCRIPTION_SQL. Those rows drop out of description full-text search
+(title/company/location still match). compact() merges the FTS index, vacuums, re-analyzes
+and truncates the WAL.
+"""
+import os
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict
+
+from src.common.clean import day_number
+from src.common.columnar import JOBS_SCHEMA, MONTH_SQL, SKILLS_SCHEMA, _table, _write
+from src.common.db import CHUNK_SIZE, DB_PATH, TEXT_SQL, _roll, _touch, deflate, job_columns
+from src.common.neardup import forget
+
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR") or DB_PATH.parent / "archive")  # next to jobs.db (JOBS_DB)
+RETAIN_DAYS = int(os.getenv("JOBS_RETAIN_DAYS", "365"))
+
+_OLD = "posted_day < :before"  # a day number; undated rows are never archived
+
+
+def cutoff(days: int = RETAIN_DAYS, today: date = None) -> str:
+    return ((today or date.today()) - timedelta(days=days)).isoformat()
+
+
+def sizes(conn: sqlite3.Connection) -> Dict[str, object]:
+    """Database and WAL file sizes plus the largest tables/indexes, in MB."""
+    path = Path(conn.execute("PRAGMA database_list").fetchone()[2])
+    wal = path.with_name(path.name + "-wal")
+    mb = lambda b: round(b / 2**20, 1)  # noqa: E731
+    top = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC LIMIT 6").fetchall()
+    return {"db_mb": mb(path.stat().st_size), "wal_mb": mb(wal.stat().st_size) if wal.exists() else 0.0,
+            "free_mb": mb(conn.execute("PRAGMA freelist_count").fetchone()[0]
+                          * conn.execute("PRAGMA page_size").fetchone()[0]),
+            "tables": {name: mb(size) for name, size in top}}
+
+
+def _select(conn: sqlite3.Connection, before: str) -> int:
+    """Fill temp.archive_ids with the jobs archive() would move."""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+    conn.execute("DELETE FROM archive_ids")
+    conn.execute(f"""INSERT INTO archive_ids SELECT id FROM jobs WHERE {_OLD}
+                     AND (cluster_id IS NULL OR cluster_id NOT IN (
+                         SELECT cluster_id FROM jobs WHERE cluster_id IS NOT NULL
+                         AND (posted_day IS NULL OR posted_day >= :before)))""", {"before": day_number(before)})
+    # dedup_key includes the date, so groups are old together; this only catches stale cluster ids
+    conn.execute("""DELETE FROM archive_ids WHERE id IN (
+                        SELECT a.id FROM archive_ids a JOIN jobs j ON j.id = a.id
+                        JOIN jobs other ON other.dedup_key = j.dedup_key
+                        WHERE other.id NOT IN (SELECT id FROM archive_ids))""")
+    return conn.execute("SELECT COUNT(*) FROM archive_ids").fetchone()[0]
+
+
+def archive(conn: sqlite3.Connection, before: str, out: Path = ARCHIVE_DIR, dry_run: bool = False) -> Dict[str, object]:
+    """Move jobs posted before `before` (YYYY-MM-DD) to Parquet under `out`; returns counts.
+
+    Files are named after the cutoff, so re-running an interrupted archive overwrites them.
+    """
+    out = Path(out)
+    n = _select(conn, before)
+    months = [m for m, in conn.execute(
+        f"SELECT DISTINCT {MONTH_SQL} FROM jobs WHERE id IN (SELECT id FROM archive_ids) ORDER BY 1")]
+    if dry_run or not n:
+        return {"jobs": n, "months": months}
+    cols = job_columns(f.name for f in JOBS_SCHEMA)
+    for m in months:
+        where = f"id IN (SELECT id FROM archive_ids) AND {MONTH_SQL} = ?"
+        jobs = _table(conn.execute(f"SELECT {cols} FROM jobs WHERE {where} ORDER BY posted_day, id", (m,)),
+                      JOBS_SCHEMA)
+        skills = _table(conn.execute(
+            f"""SELECT js.job_id, d.name FROM job_skills js JOIN skill_dict d ON d.id = js.skill_id
+                WHERE js.job_id IN (SELECT id FROM jobs WHERE {where}) ORDER BY js.job_id""", (m,)), SKILLS_SCHEMA)
+        _write(jobs, out / "jobs" / f"posted_month={m}" / f"before-{before}.parquet")
+        _write(skills, out / "skills" / f"posted_month={m}" / f"before-{before}.parquet")
+
+    keys = [k for k, in conn.execute("SELECT DISTINCT dedup_key FROM jobs WHERE id IN (SELECT id FROM archive_ids)")]
+    _roll(conn, 1, keys, prefix="archived")
+    conn.execute("INSERT OR IGNORE INTO archived_jobs (id, posted_date) "
+                 f"SELECT id, {TEXT_SQL['posted_date']} FROM jobs WHERE id IN (SELECT id FROM archive_ids)")
+    forget(conn, [r for r, in conn.execute("SELECT id FROM archive_ids")])  # their LSH buckets
+    for table in ("job_skills", "job_minhash", "job_descriptions"):
+        conn.execute(f"DELETE FROM {table} WHERE job_id IN (SELECT id FROM archive_ids)")
+        # and links left by re-fetches of already-archived jobs (db.upsert_rows skips the job itself)
+        conn.execute(f"DELETE FROM {table} WHERE job_id IN (SELECT id FROM archived_jobs)")
+    conn.execute("DELETE FROM jobs WHERE id IN (SELECT id FROM archive_ids)")  # FTS via jobs_fts_ad
+    conn.execute("DELETE FROM archive_ids")
+    _touch(conn)
+    return {"jobs": n, "months": months}
+
+
+def compress_descriptions(conn: sqlite3.Connection, before: str, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """Move descriptions of jobs posted before `before` into job_descriptions, zlib-compressed."""
+    n = raw = packed = 0
+    last = ""
+    while rows := conn.execute(f"""SELECT id, description FROM jobs WHERE id > :last AND {_OLD}
+                                   AND description IS NOT NULL ORDER BY id LIMIT :n""",
+                               {"last": last, "before": day_number(before), "n": chunk_size}).fetchall():
+        z = [(jid, deflate(d)) for jid, d in rows]
+        conn.executemany("INSERT OR REPLACE INTO job_descriptions (job_id, z) VALUES (?,?)", z)
+        conn.executemany("UPDATE jobs SET description = NULL WHERE id = ?", [(jid,) for jid, _ in rows])
+        n += len(rows)
+        raw += sum(len(d.encode()) for _, d in rows)
+        packed += sum(len(b) for _, b in z)
+        last = rows[-1][0]
+    if n:
+        _touch(conn)
+    return {"jobs": n, "raw_bytes": raw, "compressed_bytes": packed}
+
+
+def compact(conn: sqlite3.Connection, full: bool = False) -> str:
+    """Merge the FTS index, reclaim free pages, ANALYZE and truncate the WAL; returns what ran.
+
+    Incremental vacuum needs auto_vacuum=INCREMENTAL, which only a full VACUUM can switch on,
+    so the first run (or full=True) rewrites the whole file (needs that much free disk).
+    """
+    conn.commit()
+    conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('optimize')")
+    conn.execute("ANALYZE")
+    conn.commit()
+    if full or conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        how = "vacuum"
+    else:
+        conn.executescript("PRAGMA incremental_vacuum;")  # execute() would free only one page
+        how = "incremental_vacuum"
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return how
@@ -1,14 +1,95 @@
+import hashlib, json, re
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
 import yaml
-from typing import List
 
 SKILLS_YML = Path(__file__).resolve().parents[2] / "config" / "skills.yml"
 
+# a skill only counts when it isn't glued to other letters/digits ("sql" in "mysql", "excel" in "excellent")
+_BOUNDARY_L = r"(?<![a-z0-9])"
+_BOUNDARY_R = r"(?![a-z0-9])"
+
+
+def trie_pattern(terms: Iterable[str]) -> str:
+    """Build a prefix-factored alternation so thousands of terms stay a single cheap regex."""
+    trie: dict = {}
+    for t in terms:
+        node = trie
+        for ch in t:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def walk(node: dict) -> str:
+        end = node.get("") is True
+        branches = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            # greedy optional: the longer term is tried first, the shorter one is the fallback
+            return "(?:" + body + ")?"
+        return body
+
+    return walk(trie)
+
+
+class SkillMatcher:
+    """Skill taxonomy compiled into one regex; `match` is a single pass over the text."""
+
+    def __init__(self, skills: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self.skills: List[str] = []
+        for s in skills:
+            s = str(s).strip().lower()
+            if s and s not in self.skills:
+                self.skills.append(s)
+        self._canon: Dict[str, str] = {s: s for s in self.skills}
+        for alias, target in (aliases or {}).items():
+            alias, target = str(alias).strip().lower(), str(target).strip().lower()
+            if target not in self._canon:
+                raise ValueError(f"alias {alias!r} points at unknown skill {target!r}")
+            self._canon.setdefault(alias, target)
+        self._order = {s: i for i, s in enumerate(self.skills)}
+        # stored per job so re-extraction can tell which rows predate a taxonomy edit
+        self.version = hashlib.sha1(
+            json.dumps([self.skills, sorted(self._canon.items())]).encode()).hexdigest()[:12]
+        terms = sorted(self._canon, key=len, reverse=True)
+        self._rx = re.compile(_BOUNDARY_L + "(" + trie_pattern(terms) + ")" + _BOUNDARY_R) if terms else None
+
+    @classmethod
+    def from_yaml(cls, path: Path = SKILLS_YML) -> "SkillMatcher":
+        cfg = yaml.safe_load(Path(path).read_text()) or {}
+        return cls(cfg.get("skills") or [], cfg.get("aliases") or {})
+
+    def match(self, text: Optional[str]) -> List[str]:
+        """Distinct canonical skills found in `text`, in taxonomy order."""
+        if not text or self._rx is None:
+            return []
+        found = {self._canon[m] for m in self._rx.findall(text.lower())}
+        return sorted(found, key=self._order.__getitem__)
+
+    def match_many(self, texts: Iterable[Optional[str]]) -> List[List[str]]:
+        return [self.match(t) for t in texts]
+
+
+_cache: Dict[Path, tuple] = {}
+
+
+def get_matcher(path: Path = SKILLS_YML) -> SkillMatcher:
+    """Compiled matcher for `path`, rebuilt only when the file's mtime changes."""
+    path = Path(path)
+    mtime = path.stat().st_mtime_ns
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, SkillMatcher.from_yaml(path))
+        _cache[path] = cached
+    return cached[1]
+
+
 def extract_skills(text: str) -> List[str]:
-    text = (text or "").lower()
-    skills = yaml.safe_load(SKILLS_YML.read_text())["skills"]
-    hits = []
-    for s in skills:
-        if s.lower() in text:
-            hits.append(s.lower())
-    return hits
+    return get_matcher().match(text)
+
+
+def extract_skills_batch(texts: Iterable[Optional[str]]) -> List[List[str]]:
+    """One result list per input text; the taxonomy is checked/loaded once for the whole batch."""
+    return get_matcher().match_many(texts)
@@ -0,0 +1,21 @@
+import argparse
+import time
+from pathlib import Path
+from src.common.columnar import PARQUET_DIR, export
+from src.common.db import connect, init_db
+
+def main():
+    ap = argparse.ArgumentParser(description="Write month-partitioned Parquet snapshots of jobs and skills")
+    ap.add_argument("--out", type=Path, default=PARQUET_DIR)
+    ap.add_argument("--full", action="store_true", help="rewrite every month, not just new/changed ones")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    with connect("read") as conn:
+        init_db(conn)
+        res = export(conn, args.out, full=args.full)
+    print(f"Wrote {len(res['written'])} month(s), removed {len(res['removed'])}, "
+          f"{len(res['unchanged'])} unchanged → {args.out} in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,55 @@
-import os, argparse, requests
+import os, argparse
 from datetime import datetime
 from dotenv import load_dotenv
 from typing import List
-from src.common.models import Job
-from src.common.db import upsert_jobs, insert_skills, init_db, get_conn  # add insert_skills in db if missing
-from src.common.skills import extract_skills
-
-# --- if your db.py doesn't have insert_skills yet, use this fallback ---
-try:
-    insert_skills
-except NameError:
-    def insert_skills(hits):
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.executemany('INSERT INTO skills (job_id, skill) VALUES (?, ?)',
-                        [(h["job_id"], h["skill"]) for h in hits])
-        conn.commit(); conn.close()
-# ----------------------------------------------------------------------
+from src.common.models import Job, JobRecord, validate_page
+from src.common.db import connect
+from src.common.skills import get_matcher
+from src.common.fetch import AdzunaFetcher
+from src.common.metrics import Metrics, profiled
+from src.common.rawcache import RawCache
 
 load_dotenv()
 APP_ID = os.getenv("ADZUNA_APP_ID")
 APP_KEY = os.getenv("ADZUNA_APP_KEY")
-BASE = "https://api.adzuna.com/v1/api/jobs/{country}/search/{page}"
+_fetcher = None
+
+def fetcher() -> AdzunaFetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = AdzunaFetcher(APP_ID, APP_KEY)
+    return _fetcher
 
 def fetch(country: str, query: str, where: str, page: int) -> dict:
-    params = {
-        "app_id": APP_ID, "app_key": APP_KEY,
-        "what": query, "where": where,
-        "results_per_page": 50, "content-type": "application/json"
-    }
-    r = requests.get(BASE.format(country=country.lower(), page=page), params=params, timeout=20)
-    r.raise_for_status()
-    return r.json()
+    return fetcher().fetch_page(country, query, where, page)
 
-def parse(payload: dict) -> List[Job]:
-    jobs = []
+def _num(v):
+    return float(v) if type(v) is int else v  # JSON ints -> float, as Job would; anything else is validated
+
+def parse_records(payload: dict) -> List[JobRecord]:
+    """Results as JobRecords for the ingest pipeline (validated per page, not per row)."""
+    recs = []
     for it in payload.get("results", []):
-        jid = str(it.get("id"))
         posted = it.get("created")
         if posted:
             posted = datetime.fromisoformat(posted.replace("Z","+00:00")).date().isoformat()
-        smin, smax = it.get("salary_min"), it.get("salary_max")
-        savg = (smin + smax)/2 if smin and smax else None
-        jobs.append(Job(
-            id=jid,
-            title=it.get("title") or "",
-            company=(it.get("company") or {}).get("display_name"),
-            location=(it.get("location") or {}).get("display_name"),
-            source="adzuna",
-            posted_date=posted,
-            description=it.get("description"),
-            url=it.get("redirect_url"),
-            salary_min=smin, salary_max=smax, salary_avg=savg,
-            currency=it.get("salary_currency"),
-            raw=it
+        smin, smax = _num(it.get("salary_min")), _num(it.get("salary_max"))
+        recs.append(JobRecord(
+            str(it.get("id")),
+            it.get("title") or "",
+            (it.get("company") or {}).get("display_name"),
+            (it.get("location") or {}).get("display_name"),
+            "adzuna",
+            posted,
+            it.get("description"),
+            it.get("redirect_url"),
+            smin, smax, (smin + smax)/2 if smin and smax else None,
+            it.get("salary_currency"),
         ))
-    return jobs
+    return validate_page(recs)
+
+def parse(payload: dict) -> List[Job]:
+    return [r.to_job() for r in parse_records(payload)]
 
 def main():
     ap = argparse.ArgumentParser()
@@ -63,27 +57,43 @@ def main():
     ap.add_argument("--query", required=True)
     ap.add_argument("--where", required=True)
     ap.add_argument("--pages", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--incremental", action="store_true",
+                    help="newest-first, stop at already-seen postings, resume an interrupted run")
+    ap.add_argument("--full", action="store_true", help="with --incremental: ignore checkpoints for this run")
+    ap.add_argument("--no-cache", action="store_true", help="don't keep raw responses in the replay cache")
+    ap.add_argument("--metrics-out", help="write this run's stage timings as JSON (or Prometheus text for *.prom)")
+    ap.add_argument("--profile", help="dump a cProfile of the run to this file")
     args = ap.parse_args()
 
     if not (APP_ID and APP_KEY):
         raise SystemExit("Missing ADZUNA_APP_ID / ADZUNA_APP_KEY in .env")
 
-    init_db()
-    all_jobs = []
-    for p in range(1, args.pages+1):
-        all_jobs += parse(fetch(args.country, args.query, args.where, p))
-
-    if not all_jobs:
-        print("No jobs found."); return
+    from src.extractors import pipeline as pl  # imports parse_records() from this module
 
-    upsert_jobs(all_jobs)
-    hits = []
-    for j in all_jobs:
-        for s in set(extract_skills(f"{j.title} {j.description}")):
-            hits.append({"job_id": j.id, "skill": s})
-    if hits: insert_skills(hits)
+    f = AdzunaFetcher(APP_ID, APP_KEY, workers=args.workers, window=args.workers)
+    cache = None if args.no_cache else RawCache()
+    m = Metrics("etl", query=args.query, where=args.where, pages=args.pages, incremental=args.incremental)
+    with profiled(args.profile), connect() as conn:
+        n, sink, sync = pl.ingest(conn, f, [(args.country, args.query, args.where)], args.pages,
+                                  incremental=args.incremental, full=args.full, matcher=get_matcher(),
+                                  cache=cache, metrics=m)
+        m.record(conn)
+    if cache is not None:
+        cache.evict()
+        cache.close()
+    if args.metrics_out:
+        m.write(args.metrics_out)
+    print(f"Fetched {f.stats} • {f.stats.bytes / 1024:,.0f} KiB"
+          + (f" • stopped early on {sync.stopped_early} target(s)" if sync else ""))
+    for t, err in f.stats.failed.items():
+        print(f"  ! {t}: {err}")
+    print(m.summary())
 
-    print(f"Ingested {len(all_jobs)} jobs • Extracted {len(hits)} skill hits")
+    if not n:
+        print("No jobs found."); return
+    print(f"Ingested {n} jobs • Extracted {sink.skill_links} skill hits • "
+          f"{sink.near_dups['near_dups']} near-duplicate postings overall")
 
 if __name__ == "__main__":
     main()
@@ -1,38 +1,41 @@
 import json
 from pathlib import Path
-from src.common.db import get_conn, init_db
-from src.common.skills import extract_skills
+from src.common.db import connect, init_db, set_job_skills, upsert_jobs
+from src.common.neardup import recluster
+from src.common.models import Job
+from src.common.skills import get_matcher
 
 SAMPLE = Path(__file__).resolve().parents[2] / "data" / "sample_adzuna.json"
 
 def main():
-    init_db()
     payload = json.loads(SAMPLE.read_text())
-    conn = get_conn()
-    cur = conn.cursor()
 
-    jobs = payload.get("results", [])
-    for item in jobs:
-        jid = str(item["id"])
-        title = item.get("title","")
-        company = (item.get("company") or {}).get("display_name")
-        location = (item.get("location") or {}).get("display_name")
-        posted = (item.get("created") or "")[:10]
-        desc = item.get("description")
-        url = item.get("redirect_url")
+    jobs = []
+    for item in payload.get("results", []):
         smin = item.get("salary_min")
         smax = item.get("salary_max")
-        savg = (smin + smax)/2 if smin and smax else None
-        cur.execute('''INSERT OR REPLACE INTO jobs
-            (id,title,company,location,source,posted_date,description,url,salary_min,salary_max,salary_avg,currency)
-            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)''',
-            (jid,title,company,location,"sample",posted,desc,url,smin,smax,savg,item.get("salary_currency"))
-        )
-        for skill in extract_skills(f"{title} {desc}"):
-            cur.execute("INSERT INTO skills (job_id, skill) VALUES (?,?)", (jid, skill))
+        jobs.append(Job(
+            id=str(item["id"]),
+            title=item.get("title",""),
+            company=(item.get("company") or {}).get("display_name"),
+            location=(item.get("location") or {}).get("display_name"),
+            source="sample",
+            posted_date=(item.get("created") or "")[:10],
+            description=item.get("description"),
+            url=item.get("redirect_url"),
+            salary_min=smin, salary_max=smax,
+            salary_avg=(smin + smax)/2 if smin and smax else None,
+            currency=item.get("salary_currency"),
+        ))
 
-    conn.commit()
-    conn.close()
+    matcher = get_matcher()
+    found = matcher.match_many(f"{j.title} {j.description}" for j in jobs)
+
+    with connect() as conn:
+        init_db(conn)
+        upsert_jobs(jobs, conn)
+        set_job_skills(zip((j.id for j in jobs), found), matcher.version, conn)
+        recluster(conn)
     print(f"Loaded {len(jobs)} sample jobs.")
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+"""Process-parallel parse -> clean -> skill-extract for large backfills (src/backfill.py).
+
+Work is split into tasks (a run of cached raw pages, or a range of job ids). Each worker
+process turns its task into a compact Chunk: db.job_row tuples with the cleaned columns
+already derived, skill lists and MinHash signatures. Only the parent process writes to
+jobs.db, committing chunks in task order, one transaction each, so the result matches a
+single-process replay and SQLite never sees concurrent writers.
+"""
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.common import neardup
+from src.common.db import (DESCRIPTION_SQL, WRITE_COLUMNS, archived, get_conn, init_db, job_rows, reflag_all,
+                           resume_fts, set_job_skills, suspend_fts, upsert_rows)
+from src.common.fetch import Target
+from src.common.rawcache import RawCache
+from src.common.skills import get_matcher
+from src.extractors.pipeline import dedup, postings
+
+_HASH_AT = WRITE_COLUMNS.index("text_hash")
+
+
+@dataclass
+class Chunk:
+    ids: List[str]
+    skills: List[List[str]]
+    rows: Optional[List[tuple]] = None  # db.job_row tuples, same order as ids
+    signatures: Optional[np.ndarray] = None
+    seen: int = 0  # postings/jobs the worker read, before dedup/staleness filters
+
+
+# ---- worker side: one RawCache/read connection per process, opened by _init ----------------------
+
+_worker: Dict[str, object] = {}
+
+
+def _init(cache_path: Optional[str]):
+    _worker["matcher"] = get_matcher()
+    if cache_path:
+        _worker["cache"] = RawCache(Path(cache_path))
+    else:
+        _worker["conn"] = get_conn(workload="read")
+
+
+def parse_pages(keys: List[Tuple[Target, int, str]]) -> Chunk:
+    """Cached pages (RawCache.index entries) -> parsed, cleaned, skill-tagged, signed rows."""
+    blobs = _worker["cache"].payloads(d for _, _, d in keys)
+    pages = [(t, p, blobs[d]) for t, p, d in keys if d in blobs]
+    items = list(dedup(postings(pages)))
+    jobs = [p.job for p in items]
+    return Chunk([j.id for j in jobs],
+                 _worker["matcher"].match_many(f"{j.title} {j.description}" for j in jobs),
+                 list(job_rows(jobs)),
+                 neardup.signatures(neardup.job_text(j.title, j.description) for j in jobs),
+                 seen=sum(len(p.get("results") or []) for _, _, p in pages))
+
+
+def extract_skills(task: Tuple[str, str, Optional[str]]) -> Chunk:
+    """Skills for jobs with lo < id <= hi (only those not stamped with `stale_version`, if given)."""
+    lo, hi, stale_version = task
+    stale = "" if stale_version is None else "AND skills_version IS NOT :v"
+    rows = _worker["conn"].execute(
+        f"SELECT id, title, {DESCRIPTION_SQL} FROM jobs WHERE id > :lo AND id <= :hi {stale} ORDER BY id",
+        {"lo": lo, "hi": hi, "v": stale_version}).fetchall()
+    return Chunk([r[0] for r in rows], _worker["matcher"].match_many(f"{t} {d}" for _, t, d in rows),
+                 seen=len(rows))
+
+
+# ---- parent side ------------------------------------------------------------------------------
+
+def _ordered(pool: ProcessPoolExecutor, fn: Callable, tasks: Iterable, window: int) -> Iterator:
+    """pool.map that keeps at most `window` tasks in flight, so finished chunks never pile up
+    in memory while the writer is busy."""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class Progress:
+    def __init__(self, label: str, tasks: int, every: float = 5.0):
+        self.label, self.tasks, self.every = label, tasks, every
+        self.done = self.seen = self.written = 0
+        self.busy = 0.0  # seconds the single writer spent committing; caps the speed-up at elapsed/busy
+        self.t0 = self.last = time.perf_counter()
+
+    @property
+    def rate(self) -> float:
+        return self.seen / max(time.perf_counter() - self.t0, 1e-9)
+
+    def update(self, chunk: Chunk, written: int, busy: float):
+        self.done += 1
+        self.busy += busy
+        self.seen += chunk.seen
+        self.written += written
+        now = time.perf_counter()
+        if now - self.last >= self.every or self.done == self.tasks:
+            self.last = now
+            print(f"{self.label}: {self.done}/{self.tasks} tasks • {self.seen:,} read • "
+                  f"{self.written:,} written • {self.rate:,.0f}/s • writer busy "
+                  f"{self.busy / max(now - self.t0, 1e-9):.0%}", flush=True)
+
+
+def backfill_cache(conn: sqlite3.Connection, cache_path: Optional[Path] = None, *, since: Optional[str] = None,
+                   until: Optional[str] = None, query: Optional[str] = None, workers: int = 4,
+                   chunk_pages: int = 50, commit_jobs: int = 10_000) -> Dict[str, object]:
+    """Replay the raw cache into jobs.db like extractors/replay.py, with parsing, cleaning, skill
+    extraction and MinHash signatures spread over `workers` processes.
+
+    The writer commits every `commit_jobs` rows: bigger transactions rewrite fewer index pages
+    into the WAL, and a re-run after a crash simply upserts the same rows again.
+    """
+    cache = RawCache(cache_path)
+    try:
+        keys = cache.index(since, until, query)
+    finally:
+        cache.close()
+    tasks = [keys[i:i + chunk_pages] for i in range(0, len(keys), chunk_pages)]
+    version = get_matcher().version
+    init_db(conn)
+    # the FTS index, is_dup flags and rollups are rebuilt once at the end instead of per chunk:
+    # per-row upkeep would be most of the single writer's time, and the writer is what caps scaling
+    suspend_fts(conn)
+    conn.commit()
+    progress = Progress("backfill", len(tasks))
+    seen = set()  # ids already written this run: newer pages come first and win, as in replay
+    pending = 0
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init, initargs=(str(cache.path),)) as pool:
+            for chunk in _ordered(pool, parse_pages, tasks, 2 * workers):
+                gone = archived(conn, chunk.ids)  # moved out by retention.archive; the rollups keep them
+                keep = [i for i, jid in enumerate(chunk.ids) if jid not in seen and jid not in gone]
+                ids = [chunk.ids[i] for i in keep]
+                seen.update(ids)
+                t0 = time.perf_counter()
+                upsert_rows([chunk.rows[i] for i in keep], conn, bulk=True)
+                set_job_skills(zip(ids, [chunk.skills[i] for i in keep]), version, conn)
+                neardup.store_signatures(conn, ids, [chunk.rows[i][_HASH_AT] for i in keep],
+                                         chunk.signatures[keep])
+                pending += len(ids)
+                if pending >= commit_jobs:
+                    conn.commit()
+                    pending = 0
+                progress.update(chunk, len(ids), time.perf_counter() - t0)
+    finally:
+        with conn:
+            resume_fts(conn)
+            reflag_all(conn)
+    with conn:
+        near = neardup.recluster(conn)
+    return {"pages": len(keys), "read": progress.seen, "jobs": progress.written, "near_dups": near,
+            "rate": progress.rate, "write_s": progress.busy}
+
+
+def backfill_skills(conn: sqlite3.Connection, *, rescan_all: bool = False, workers: int = 4,
+                    chunk_jobs: int = 5000) -> Dict[str, object]:
+    """reextract_skills.py across `workers` processes: workers scan id ranges, the parent writes."""
+    init_db(conn)
+    conn.commit()
+    version = get_matcher().version
+    bounds, last = [""], ""
+    while (row := conn.execute("SELECT id FROM jobs WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?",
+                               (last, chunk_jobs - 1)).fetchone()):
+        bounds.append(last := row[0])
+    if (top := conn.execute("SELECT MAX(id) FROM jobs").fetchone()[0]) is not None and top > last:
+        bounds.append(top)
+    stale_version = None if rescan_all else version
+    tasks = [(lo, hi, stale_version) for lo, hi in zip(bounds, bounds[1:])]
+    progress = Progress("skills", len(tasks))
+    links = 0
+    with ProcessPoolExecutor(workers, initializer=_init, initargs=(None,)) as pool:
+        for chunk in _ordered(pool, extract_skills, tasks, 2 * workers):
+            t0 = time.perf_counter()
+            with conn:
+                links += set_job_skills(zip(chunk.ids, chunk.skills), version, conn)
+            progress.update(chunk, len(chunk.ids), time.perf_counter() - t0)
+    return {"jobs": progress.written, "links": links, "version": version, "rate": progress.rate,
+            "write_s": progress.busy}
@@ -0,0 +1,259 @@
+"""Streaming ingest stages: fetch -> parse -> dedup -> batch/normalise -> sinks.
+
+Every stage is a generator, so only one batch (plus the fetcher's in-flight pages) is
+held in memory, and each batch is committed before the next one is pulled.
+"""
+import csv, json, time
+import sqlite3
+from dataclasses import dataclass
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.common import neardup
+from src.common.clean import role_bucket
+from src.common.db import archived, init_db, set_job_skills, text_hash, upsert_jobs
+from src.common.fetch import AdzunaFetcher, Target
+from src.common.metrics import Metrics
+from src.common.models import JobRecord
+from src.common.rawcache import RawCache
+from src.common.skills import SkillMatcher, get_matcher
+from src.extractors.etl_adzuna import parse_records
+from src.extractors.sync import SORT_PARAMS, SyncState
+
+CSV_FIELDS = [
+    "id","title","company","location","created","category","contract_time",
+    "salary_is_predicted","salary_min","salary_max","redirect_url","search_term","role_bucket"
+]
+
+
+@dataclass
+class Posting:
+    term: str
+    raw: dict
+    job: JobRecord
+    target: Optional[Target] = None
+    page: Optional[int] = None
+
+
+@dataclass
+class Batch:
+    postings: List[Posting]
+    skills: List[List[str]]
+    signatures: Optional[np.ndarray] = None  # MinHash rows for near-duplicate clustering
+    page: Optional[Tuple[Target, int]] = None  # (target, page) when the batch is one fetched page (per_page=True)
+
+
+def postings(pages: Iterable[Tuple[Target, int, dict]], metrics: Optional[Metrics] = None) -> Iterator[Posting]:
+    """Parse fetched pages into Postings, keeping the raw item for export sinks."""
+    for target, page, payload in pages:
+        results = payload.get("results") or []
+        t0 = time.perf_counter()
+        jobs = parse_records(payload)
+        if metrics is not None:
+            metrics.add_time("parse", time.perf_counter() - t0, len(results))
+        for raw, job in zip(results, jobs):
+            yield Posting(target[1], raw, job, target, page)
+
+
+def deduper(max_per_term: Optional[int] = None) -> Callable[[Posting], bool]:
+    """dedup() as a predicate, for normalise(keep=...)."""
+    seen, per_term = set(), {}
+
+    def keep(p: Posting) -> bool:
+        if not p.raw.get("id") or p.job.id in seen:
+            return False
+        if max_per_term is not None and per_term.get(p.term, 0) >= max_per_term:
+            return False
+        seen.add(p.job.id)
+        per_term[p.term] = per_term.get(p.term, 0) + 1
+        return True
+    return keep
+
+
+def dedup(items: Iterable[Posting], max_per_term: Optional[int] = None) -> Iterator[Posting]:
+    """Drop repeated ids (across terms) and cap how many postings each term contributes."""
+    return filter(deduper(max_per_term), items)
+
+
+def normalise(items: Iterable[Posting], size: int, matcher: Optional[SkillMatcher] = None,
+              per_page: bool = False, metrics: Optional[Metrics] = None,
+              keep: Optional[Callable[[Posting], bool]] = None) -> Iterator[Batch]:
+    """Group into fixed-size batches (or one batch per fetched page); extract skills and MinHash
+    signatures once per batch.
+
+    keep: filter each page's postings (deduper()) after grouping, so with per_page=True a page
+    whose postings are all dropped still reaches the sinks, as an empty batch with its checkpoint.
+    Cleaned columns (city/state/role/salary/dedup key) are derived by db.upsert_jobs on write.
+    """
+    matcher = matcher or get_matcher()
+    if per_page:
+        pages = groupby(items, key=lambda p: (p.target, p.page))
+        chunks = ((key, [p for p in g if keep is None or keep(p)]) for key, g in pages)
+    else:
+        it = filter(keep, items) if keep else iter(items)
+        chunks = ((None, chunk) for chunk in iter(lambda: list(islice(it, size)), []))
+    metrics = metrics or Metrics("normalise")
+    for page, chunk in chunks:
+        if not chunk:
+            yield Batch([], [], None, page)
+            continue
+        with metrics.timer("skills", len(chunk)):
+            skills = matcher.match_many(f"{p.job.title} {p.job.description}" for p in chunk)
+        with metrics.timer("minhash", len(chunk)):
+            sigs = neardup.signatures(neardup.job_text(p.job.title, p.job.description) for p in chunk)
+        yield Batch(chunk, skills, sigs, page)
+
+
+def export_row(p: Posting) -> Dict:
+    j = p.raw
+    return {
+        "id": j.get("id"),
+        "title": j.get("title"),
+        "company": (j.get("company") or {}).get("display_name"),
+        "location": (j.get("location") or {}).get("display_name"),
+        "created": j.get("created"),
+        "category": (j.get("category") or {}).get("label"),
+        "contract_time": j.get("contract_time"),
+        "salary_is_predicted": j.get("salary_is_predicted"),
+        "salary_min": j.get("salary_min"),
+        "salary_max": j.get("salary_max"),
+        "redirect_url": j.get("redirect_url"),
+        "search_term": p.term,
+        "role_bucket": role_bucket(j.get("title")),
+    }
+
+
+class CsvSink:
+    stage = "csv_export"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.f = open(self.path, "w", newline="", encoding="utf-8")
+        self.w = csv.DictWriter(self.f, fieldnames=CSV_FIELDS)
+        self.w.writeheader()
+
+    def write(self, batch: Batch):
+        self.w.writerows(export_row(p) for p in batch.postings)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class JsonlSink:
+    stage = "jsonl_export"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.f = open(self.path, "w", encoding="utf-8")
+
+    def write(self, batch: Batch):
+        self.f.writelines(json.dumps(export_row(p)) + "\n" for p in batch.postings)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class DbSink:
+    """Upserts jobs + skills through src.common.db, one committed transaction per batch.
+
+    With a `checkpoint` (extractors.sync.SyncState) the page's checkpoint is written in the
+    same transaction, so a resumed run never skips rows that were not committed.
+    """
+    stage = "db_write"
+
+    def __init__(self, conn: sqlite3.Connection, taxonomy_version: Optional[str] = None, checkpoint=None):
+        self.conn = conn
+        self.version = taxonomy_version or get_matcher().version
+        self.checkpoint = checkpoint
+        self.jobs = self.skill_links = 0
+        self.near_dups = None
+        init_db(conn)
+        conn.commit()
+
+    def write(self, batch: Batch):
+        postings, skills, sigs = batch.postings, batch.skills, batch.signatures
+        gone = archived(self.conn, [p.job.id for p in postings])
+        if gone:  # old postings still listed, already archived (src/common/retention.py) and counted
+            keep = [i for i, p in enumerate(postings) if p.job.id not in gone]
+            postings, skills = [postings[i] for i in keep], [skills[i] for i in keep]
+            sigs = None if sigs is None else sigs[keep]
+        with self.conn:
+            self.jobs += upsert_jobs([p.job for p in postings], self.conn)
+            self.skill_links += set_job_skills(zip((p.job.id for p in postings), skills), self.version, self.conn)
+            if sigs is not None:
+                neardup.store_signatures(self.conn, [p.job.id for p in postings],
+                                         [text_hash(p.job.title, p.job.description) for p in postings], sigs)
+            if self.checkpoint is not None and batch.page:
+                self.checkpoint.record(self.conn, *batch.page)
+
+    def close(self):
+        pass
+
+    def settle(self, limit: Optional[int] = None):
+        """After a complete run: recluster near-duplicates, which span batches and earlier runs
+        (at most `limit` changed signatures at a time, see neardup.recluster)."""
+        with self.conn:
+            self.near_dups = neardup.recluster(self.conn, limit=limit)
+
+
+def run(batches: Iterable[Batch], sinks: List, metrics: Optional[Metrics] = None) -> int:
+    n = 0
+    metrics = metrics or Metrics("run")
+    try:
+        for batch in batches:
+            for s in sinks:
+                with metrics.timer(getattr(s, "stage", type(s).__name__), len(batch.postings)):
+                    s.write(batch)
+            n += len(batch.postings)
+            metrics.count("jobs", len(batch.postings))
+    finally:
+        for s in sinks:
+            s.close()
+    return n
+
+
+def ingest(conn: sqlite3.Connection, fetcher: AdzunaFetcher, targets: List[Target], max_pages: int, *,
+           batch_size: int = 500, max_per_term: Optional[int] = None, exports: Optional[List] = None,
+           incremental: bool = False, full: bool = False, matcher: Optional[SkillMatcher] = None,
+           cache: Optional[RawCache] = None, metrics: Optional[Metrics] = None):
+    """Fetch `targets` into jobs.db (plus any export sinks); returns (rows written, DbSink, SyncState|None).
+
+    metrics: stage timings/counters for the run (parse, skills, minhash, db_write, near_dups, fetch).
+
+    cache: store every fetched page's raw payload so it can be replayed offline (extractors/replay.py).
+
+    incremental: newest-first paging with per-target checkpoints, early stop and resume
+    (see extractors/sync.py); full=True ignores the checkpoints but still records them.
+    """
+    matcher = matcher or get_matcher()
+    db_sink = DbSink(conn, matcher.version)
+    sync = None
+    if incremental:
+        sync = SyncState(conn, targets, full=full)
+        sync.begin()
+        db_sink.checkpoint = sync
+        # one page at a time: speculative pages past an early stop would waste quota
+        pages = fetcher.fetch_all(targets, max_pages, start_pages=sync.start_pages(), window=1, **SORT_PARAMS)
+    else:
+        pages = fetcher.fetch_all(targets, max_pages)
+    if cache is not None:
+        pages = cache.record(pages)
+    if sync is not None:
+        pages = sync.watch(pages, fetcher)
+    metrics = metrics or Metrics("etl")
+    batches = normalise(postings(pages, metrics), batch_size, matcher, per_page=incremental, metrics=metrics,
+                        keep=deduper(max_per_term))
+    n = run(batches, [db_sink, *(exports or [])], metrics)
+    with metrics.timer("near_dups"):
+        db_sink.settle()
+    metrics.fetch(fetcher.stats)
+    metrics.set("skill_links", db_sink.skill_links)
+    metrics.set("near_dups", db_sink.near_dups["near_dups"])
+    if sync is not None:
+        sync.finish(fetcher.stats.failed)
+    return n, db_sink, sync
@@ -0,0 +1,59 @@
+"""Rebuild jobs/skills from cached raw Adzuna pages (src/common/rawcache.py), no network needed.
+
+    python -m src.extractors.replay                      # everything in the cache into jobs.db
+    JOBS_DB=/tmp/rebuilt.db python -m src.extractors.replay --since 2025-06-01
+    python -m src.extractors.replay --stats | --evict
+"""
+import argparse
+import time
+
+from src.common.db import connect
+from src.common.metrics import Metrics, profiled
+from src.common.rawcache import RawCache
+from src.common.skills import get_matcher
+from src.extractors import pipeline as pl
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cache", default=None, help="cache file (default: RAW_CACHE or data/raw_cache.db)")
+    ap.add_argument("--since", help="only pages fetched on/after this date (YYYY-MM-DD)")
+    ap.add_argument("--until", help="only pages fetched on/before this date (YYYY-MM-DD)")
+    ap.add_argument("--query", help="only this search term")
+    ap.add_argument("--batch", type=int, default=500)
+    ap.add_argument("--stats", action="store_true", help="print cache size and exit")
+    ap.add_argument("--evict", action="store_true", help="apply TTL/size eviction and exit")
+    ap.add_argument("--metrics-out", help="write stage timings as JSON (or Prometheus text for *.prom)")
+    ap.add_argument("--profile", help="dump a cProfile of the replay to this file")
+    args = ap.parse_args()
+
+    cache = RawCache(args.cache)
+    try:
+        if args.stats:
+            print(cache.stats()); return
+        if args.evict:
+            pages, blobs = cache.evict()
+            print(f"Evicted {pages} pages ({blobs} blobs) • now {cache.stats()}"); return
+
+        t0 = time.perf_counter()
+        matcher = get_matcher()
+        pages = cache.replay(args.since, args.until, args.query)
+        m = Metrics("replay", since=args.since, until=args.until, query=args.query)
+        with profiled(args.profile), connect() as conn:
+            sink = pl.DbSink(conn, matcher.version)
+            n = pl.run(pl.normalise(pl.dedup(pl.postings(pages, m)), args.batch, matcher, metrics=m), [sink], m)
+            with m.timer("near_dups"):
+                sink.settle()
+            m.set("skill_links", sink.skill_links)
+            m.record(conn)
+        if args.metrics_out:
+            m.write(args.metrics_out)
+        print(f"Replayed {n} jobs • {sink.skill_links} skill links • "
+              f"{sink.near_dups['near_dups']} near-duplicates in {time.perf_counter() - t0:.2f}s")
+        print(m.summary())
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
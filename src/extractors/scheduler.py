@@ -0,0 +1,371 @@
+"""Long-running ingest scheduler: keeps many (country, query, where) targets fresh, one writer.
+
+Targets come from config/targets.yml, each with its own interval. A due target runs as an
+asyncio task doing an incremental sync (extractors/sync.py: newest-first, stops at the first
+page with nothing new, resumes an interrupted run). Pages are fetched, parsed, skill-tagged and
+MinHash-signed on a thread pool through one shared, rate-limited AdzunaFetcher, then handed as
+per-page Batches through a bounded queue to a single writer thread. That thread owns the only
+jobs.db (and raw cache) connection, so targets never contend for SQLite locks. A target never
+overlaps itself: its next run is due `interval` after the last one started, or as soon as it
+finishes if it ran long.
+
+Near-duplicates are reclustered, and the period's stage timings recorded in the runs table, at
+most every `settle` seconds while new rows arrive. The recluster only revisits postings near the
+new ones, `settle_rows` signatures at a time, with pages waiting for the writer in between, for as
+long as the slices shrink the backlog; the rest waits for the next settle. Status (queue depth,
+per-target last success, lag and errors) is written to --status-out every few seconds: JSON, or
+Prometheus text for *.prom.
+
+    python -m src.extractors.scheduler [--config config/targets.yml] [--workers 8]
+    python -m src.extractors.scheduler --once      # every target once, then exit
+    python -m src.extractors.scheduler --status    # print the running scheduler's status file
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from src.common.db import DB_PATH, get_conn
+from src.common.fetch import AdzunaFetcher, FetchStats, Target
+from src.common.metrics import Metrics
+from src.common.rawcache import RawCache
+from src.common.skills import get_matcher
+from src.extractors.etl_adzuna import APP_ID, APP_KEY
+from src.extractors.pipeline import Batch, DbSink, deduper, normalise, postings
+from src.extractors.sync import SORT_PARAMS, SyncState, _key
+
+CONFIG = Path(os.getenv("SCHEDULE_CONFIG") or Path(__file__).resolve().parents[2] / "config" / "targets.yml")
+STATUS_OUT = DB_PATH.parent / "scheduler_status.json"
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return None if ts is None else datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass
+class Scheduled:
+    target: Target
+    interval: float  # seconds
+    pages: int
+    next_due: float = 0.0  # time.time()
+    running: bool = False
+    runs: int = 0
+    jobs: int = 0
+    pages_fetched: int = 0
+    errors: int = 0
+    last_started: Optional[float] = None
+    last_success: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+def load_targets(path: Path = CONFIG) -> List[Scheduled]:
+    """Expand config entries into targets; list-valued fields give every combination."""
+    cfg = yaml.safe_load(Path(path).read_text()) or {}
+    defaults = {"country": "au", "where": "", "interval": 60, "pages": 4, **(cfg.get("defaults") or {})}
+    out: Dict[Target, Scheduled] = {}
+    for entry in cfg.get("targets") or []:
+        e = {**defaults, **entry}
+        values = [v if isinstance(v, list) else [v] for v in (e["country"], e["query"], e["where"])]
+        for country, query, where in itertools.product(*values):
+            t = (str(country).lower(), str(query), str(where) if where else None)
+            out.setdefault(t, Scheduled(t, float(e["interval"]) * 60, int(e["pages"])))  # first entry wins
+    return list(out.values())
+
+
+class Scheduler:
+    def __init__(self, targets: List[Scheduled], fetcher: AdzunaFetcher, *, db_path: Optional[Path] = None,
+                 cache_path: Optional[Path] = None, use_cache: bool = True, max_running: Optional[int] = None,
+                 queue_size: int = 64, settle: float = 600, settle_rows: int = 2000,
+                 status_out: Optional[Path] = STATUS_OUT, status_every: float = 10):
+        self.targets = targets
+        self.fetcher = fetcher
+        self.db_path, self.cache_path, self.use_cache = db_path, cache_path, use_cache
+        self.max_running = max_running or fetcher.workers
+        self.queue_size, self.settle, self.status_every = queue_size, settle, status_every
+        self.settle_rows = settle_rows
+        self.status_out = Path(status_out) if status_out else None
+        self.matcher = get_matcher()
+        self.metrics = Metrics("scheduler")
+        self.dirty = False  # rows written since the last settle
+        self.started = time.time()
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="writer")
+        self._fetch = ThreadPoolExecutor(fetcher.workers, thread_name_prefix="fetch")
+        self.conn = self.sink = self.cache = self.queue = self._wake = None
+        self.stopping = False
+
+    # ---- writer thread: the only code that touches jobs.db / the raw cache ----------------------
+
+    async def _db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, fn, *args)
+
+    def _open(self) -> Dict[Tuple[str, str, str], Tuple[str, Optional[str]]]:
+        self.conn = get_conn(self.db_path, workload="ingest")
+        self.sink = DbSink(self.conn, self.matcher.version)  # runs migrations
+        self.cache = RawCache(self.cache_path) if self.use_cache else None
+        return {tuple(r[:3]): (r[3], r[4]) for r in self.conn.execute(
+            "SELECT country, query, location, status, last_run FROM sync_state")}
+
+    def _close(self):
+        if self.cache is not None:
+            self.cache.evict()
+            self.cache.close()
+        self.conn.close()
+
+    def _begin(self, t: Target) -> SyncState:
+        sync = SyncState(self.conn, [t])
+        sync.begin()
+        return sync
+
+    def _write(self, t: Target, page: int, payload: dict, batch: Optional[Batch], sync: SyncState) -> Tuple[int, float]:
+        t0 = time.perf_counter()
+        if self.cache is not None:
+            self.cache.put(t, page, payload)
+        if batch is None:
+            return 0, time.perf_counter() - t0
+        self.sink.checkpoint = sync  # the page's checkpoint commits with its rows
+        self.sink.write(batch)
+        return len(batch.postings), time.perf_counter() - t0
+
+    def _settle(self) -> float:
+        t0 = time.perf_counter()
+        self.sink.settle(self.settle_rows)
+        return time.perf_counter() - t0
+
+    # ---- fetch threads ------------------------------------------------------------------------
+
+    def _page(self, t: Target, page: int) -> Tuple[dict, Optional[Batch], Metrics]:
+        m = Metrics("page")
+        payload = self.fetcher.fetch_page(*t, page, **SORT_PARAMS)
+        batches = list(normalise(postings([(t, page, payload)], m), 0, self.matcher, per_page=True, metrics=m,
+                                 keep=deduper()))
+        return payload, (batches[0] if batches else None), m
+
+    # ---- event loop ---------------------------------------------------------------------------
+
+    async def _write_loop(self):
+        while True:
+            t, page, payload, batch, sync, done = await self.queue.get()
+            try:
+                n, secs = await self._db(self._write, t, page, payload, batch, sync)
+                self.metrics.add_time("db_write", secs, n)
+                self.metrics.count("jobs", n)
+                self.dirty = self.dirty or n > 0
+                if not done.cancelled():  # else its run was stopped; the page is written all the same
+                    done.set_result(n)
+            except Exception as e:  # the target's run fails; the writer carries on
+                if not done.cancelled():
+                    done.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def run_target(self, s: Scheduled):
+        loop = asyncio.get_running_loop()
+        s.last_started = time.time()
+        t = s.target
+        try:
+            sync = await self._db(self._begin, t)
+            written = []
+            for page in range(sync.start_pages()[t], s.pages + 1):
+                payload, batch, m = await loop.run_in_executor(self._fetch, self._page, t, page)
+                self.metrics.merge(m)
+                s.pages_fetched += 1
+                stop = await self._db(sync.check, t, page, payload)
+                written.append(loop.create_future())
+                await self.queue.put((t, page, payload, batch, sync, written[-1]))
+                if stop or len(payload.get("results") or []) < self.fetcher.results_per_page:
+                    break
+            s.jobs += sum(await asyncio.gather(*written))
+            await self._db(sync.finish)
+            s.last_success, s.last_error = time.time(), None
+            self.metrics.count("target_runs")
+        except Exception as e:  # an interrupted sync resumes from its last written page next time
+            s.errors += 1
+            s.last_error = f"{type(e).__name__}: {e}"
+            self.metrics.count("target_errors")
+            print(f"{_iso(time.time())} {t}: {s.last_error}", flush=True)
+        finally:
+            s.runs += 1
+            s.running = False
+            s.next_due = max(s.last_started + s.interval, time.time())
+
+    async def settle_now(self):
+        """Recluster near-duplicates and record the period's metrics, if anything was written."""
+        if not self.dirty:
+            return
+        self.dirty = False
+        secs, left = 0.0, None
+        while True:
+            secs += await self._db(self._settle)
+            pending = self.sink.near_dups["pending"]
+            # slices go on while they shrink the backlog; if new pages keep it growing, the rest
+            # waits for the next tick
+            if not pending or (left is not None and pending >= left):
+                break
+            left = pending
+            await asyncio.sleep(0)  # pages already handed to the writer go first
+        self.dirty = self.dirty or pending > 0
+        m, self.metrics = self.metrics, Metrics("scheduler")
+        m.add_time("near_dups", secs)
+        m.set("near_dups", self.sink.near_dups["near_dups"])
+        stats, self.fetcher.stats = self.fetcher.stats, FetchStats()
+        stats.finished = time.perf_counter()
+        m.fetch(stats)
+        await self._db(m.record, self.conn)
+        print(f"{_iso(time.time())} {m.summary()}", flush=True)
+
+    def status(self) -> dict:
+        now = time.time()
+        rows = [{"country": s.target[0], "query": s.target[1], "where": s.target[2] or "",
+                 "interval_min": round(s.interval / 60, 1), "running": s.running, "runs": s.runs,
+                 "jobs": s.jobs, "pages": s.pages_fetched, "errors": s.errors,
+                 "last_success": _iso(s.last_success),
+                 # seconds since the last successful sync (since startup if there never was one)
+                 "lag_s": round(now - (s.last_success or self.started)),
+                 "next_in_s": max(0, round(s.next_due - now)) if not s.running else 0,
+                 "last_error": s.last_error} for s in self.targets]
+        return {"at": _iso(now), "uptime_s": round(now - self.started), "targets": len(rows),
+                "running": sum(r["running"] for r in rows), "queue_depth": self.queue.qsize() if self.queue else 0,
+                "queue_max": self.queue_size, "overdue": sum(s.next_due < now and not s.running for s in self.targets),
+                "max_lag_s": max((r["lag_s"] for r in rows), default=0), "per_target": rows}
+
+    def write_status(self):
+        if not self.status_out:
+            return
+        st = self.status()
+        body = _prometheus(st) if self.status_out.suffix == ".prom" else json.dumps(st, indent=2)
+        self.status_out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.status_out.with_suffix(self.status_out.suffix + ".tmp")
+        tmp.write_text(body)
+        tmp.replace(self.status_out)
+
+    async def _every(self, seconds: float, fn):
+        while True:
+            await asyncio.sleep(seconds)
+            if asyncio.iscoroutinefunction(fn):
+                await fn()
+            else:
+                fn()
+
+    def stop(self):
+        self.stopping = True
+        self._wake.set()
+
+    async def run(self, once: bool = False):
+        """Dispatch due targets until stop() (SIGINT/SIGTERM from main), or one pass with once=True."""
+        self.queue = asyncio.Queue(self.queue_size)
+        self._wake = asyncio.Event()  # a run finished, or stop()
+        state = await self._db(self._open)
+        for s in self.targets:
+            status, last_run = state.get(_key(s.target), (None, None))
+            if status == "done" and last_run and not once:  # carry on where the last process left off
+                s.last_success = datetime.fromisoformat(last_run).timestamp()
+                s.next_due = s.last_success + s.interval
+        helpers = [asyncio.create_task(self._write_loop()),
+                   asyncio.create_task(self._every(self.settle, self.settle_now)),
+                   asyncio.create_task(self._every(self.status_every, self.write_status))]
+        tasks = set()
+        print(f"{_iso(time.time())} scheduling {len(self.targets)} target(s), "
+              f"{self.max_running} at a time", flush=True)
+        try:
+            while not self.stopping:
+                now = time.time()
+                for s in sorted(self.targets, key=lambda s: s.next_due):
+                    if len(tasks) >= self.max_running or s.next_due > now:
+                        break
+                    if s.running or (once and s.runs):
+                        continue
+                    s.running = True
+                    task = asyncio.create_task(self.run_target(s))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    task.add_done_callback(lambda _: self._wake.set())
+                if once and not tasks and all(s.runs for s in self.targets):
+                    break
+                pending = [s.next_due for s in self.targets if not s.running and not (once and s.runs)]
+                try:
+                    await asyncio.wait_for(self._wake.wait(), min(max(min(pending, default=now + 60) - now, 0.05), 60))
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+        finally:
+            for task in list(tasks):
+                task.cancel()  # their sync_state rows stay 'running' and resume next start
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.queue.join()  # pages already fetched are still written
+            for h in helpers:
+                h.cancel()
+            await self.settle_now()
+            self.write_status()
+            await self._db(self._close)
+            self._writer.shutdown()
+            self._fetch.shutdown(cancel_futures=True)
+
+
+def _prometheus(st: dict, prefix: str = "jobs_scheduler") -> str:
+    lines = [f"# TYPE {prefix}_{k} gauge\n{prefix}_{k} {st[k]}"
+             for k in ("targets", "running", "queue_depth", "queue_max", "overdue", "max_lag_s")]
+    for name in ("lag_s", "jobs", "errors"):
+        lines.append(f"# TYPE {prefix}_target_{name} gauge")
+        lines += [f'{prefix}_target_{name}{{country={json.dumps(r["country"])},query={json.dumps(r["query"])},'
+                  f'where={json.dumps(r["where"])}}} {r[name]}' for r in st["per_target"]]
+    return "\n".join(lines) + "\n"
+
+
+def print_status(path: Path):
+    st = json.loads(Path(path).read_text())
+    print(f"{st['at']} • up {st['uptime_s']}s • {st['running']}/{st['targets']} running • queue "
+          f"{st['queue_depth']}/{st['queue_max']} • {st['overdue']} overdue • max lag {st['max_lag_s']}s")
+    for r in sorted(st["per_target"], key=lambda r: -r["lag_s"]):
+        err = f"  ! {r['last_error']}" if r["last_error"] else ""
+        print(f"  {r['country']} {r['query'][:28]:<28} {r['where'][:14]:<14} lag {r['lag_s']:>7}s  "
+              f"next {r['next_in_s']:>6}s  runs {r['runs']:>4}  jobs {r['jobs']:>7}  errors {r['errors']}{err}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Keep the targets in a config file synced, one SQLite writer")
+    ap.add_argument("--config", type=Path, default=CONFIG)
+    ap.add_argument("--workers", type=int, default=8, help="concurrent page fetches")
+    ap.add_argument("--max-running", type=int, help="targets synced at once (default: --workers)")
+    ap.add_argument("--queue", type=int, default=64, help="fetched pages waiting for the writer, at most")
+    ap.add_argument("--settle", type=float, default=600,
+                    help="seconds between near-duplicate reclusters / runs rows while data arrives")
+    ap.add_argument("--settle-rows", type=int, default=2000,
+                    help="changed signatures reclustered per writer slice (pages are written in between)")
+    ap.add_argument("--status-out", type=Path, default=STATUS_OUT, help="status file (JSON, or *.prom)")
+    ap.add_argument("--once", action="store_true", help="sync every target once and exit")
+    ap.add_argument("--no-cache", action="store_true", help="don't keep raw responses in the replay cache")
+    ap.add_argument("--status", action="store_true", help="print the status file of a running scheduler")
+    args = ap.parse_args()
+
+    if args.status:
+        return print_status(args.status_out)
+    if not (APP_ID and APP_KEY):
+        raise SystemExit("Missing ADZUNA_APP_ID / ADZUNA_APP_KEY in .env")
+    fetcher = AdzunaFetcher(APP_ID, APP_KEY, workers=args.workers, window=1)
+    sched = Scheduler(load_targets(args.config), fetcher, use_cache=not args.no_cache,
+                      max_running=args.max_running, queue_size=args.queue, settle=args.settle,
+                      settle_rows=args.settle_rows, status_out=args.status_out)
+
+    async def go():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, sched.stop)
+        await sched.run(once=args.once)
+
+    asyncio.run(go())
+    print(f"Stopped • {sum(s.jobs for s in sched.targets):,} jobs written from "
+          f"{sum(s.pages_fetched for s in sched.targets):,} pages • {sum(s.errors for s in sched.targets)} failed run(s)")
+
+
+if __name__ == "__main__":
+    main()
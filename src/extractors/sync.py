@@ -0,0 +1,103 @@
+"""Incremental Adzuna sync: per-(country, query, where) checkpoints with early stop and resume.
+
+Pages are requested newest-first (sort_by=date). Paging a target stops at the first page
+on which every posting is already in jobs.db or no newer than the newest posting seen by
+the last completed run. A run that dies part-way leaves its target 'running' and the next
+run resumes after the last committed page.
+"""
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from src.common.fetch import AdzunaFetcher, Target
+
+SORT_PARAMS = {"sort_by": "date"}
+
+
+def _key(t: Target) -> Tuple[str, str, str]:
+    country, query, where = t
+    return country.lower(), query, where or ""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class SyncState:
+    def __init__(self, conn: sqlite3.Connection, targets: Iterable[Target], full: bool = False):
+        self.conn, self.full = conn, full
+        self.targets = list(targets)
+        self.state: Dict[Target, sqlite3.Row] = {}
+        for t in self.targets:
+            row = conn.execute(
+                "SELECT status, last_page, newest_created, run_newest_created FROM sync_state "
+                "WHERE country=? AND query=? AND location=?", _key(t)).fetchone()
+            self.state[t] = row
+        self._page_newest: Dict[Tuple[Target, int], Optional[str]] = {}
+        self.stopped_early = 0
+
+    def start_pages(self) -> Dict[Target, int]:
+        """Page to start each target from: after the last committed page of an interrupted run, else 1."""
+        return {t: (row[1] + 1 if row and row[0] == "running" and not self.full else 1)
+                for t, row in self.state.items()}
+
+    def begin(self):
+        with self.conn:
+            for t in self.targets:
+                row = self.state[t]
+                if row and row[0] == "running" and not self.full:
+                    continue  # resuming; keep the interrupted run's progress
+                self.conn.execute(
+                    """INSERT INTO sync_state (country, query, location, status, last_page, started_at)
+                       VALUES (?,?,?,'running',0,?)
+                       ON CONFLICT(country, query, location) DO UPDATE SET
+                           status='running', last_page=0, run_newest_created=NULL, started_at=excluded.started_at""",
+                    (*_key(t), _now()))
+
+    def check(self, t: Target, p: int, payload: dict) -> bool:
+        """Note a fetched page (before it is written); True when it holds nothing new, so paging
+        `t` can stop after it."""
+        results = payload.get("results") or []
+        created = [r.get("created") for r in results if r.get("created")]
+        self._page_newest[(t, p)] = max(created) if created else None
+        if results and not self.full and self._all_seen(t, results):
+            self.stopped_early += 1
+            return True
+        return False
+
+    def watch(self, pages: Iterable[Tuple[Target, int, dict]], fetcher: AdzunaFetcher) -> Iterator[Tuple[Target, int, dict]]:
+        """Pass pages through, halting a target once a page holds nothing new."""
+        for t, p, payload in pages:
+            if self.check(t, p, payload):
+                fetcher.halt(t)
+            yield t, p, payload
+
+    def _all_seen(self, t: Target, results) -> bool:
+        baseline = self.state[t][2] if self.state[t] else None
+        ids = [str(r.get("id")) for r in results]
+        known = {r[0] for r in self.conn.execute(
+            f"SELECT id FROM jobs WHERE id IN ({','.join('?' * len(ids))})", ids)}
+        return all(str(r.get("id")) in known or (baseline and (r.get("created") or "") <= baseline)
+                   for r in results)
+
+    def record(self, conn: sqlite3.Connection, t: Target, page: int):
+        """Mark `page` committed; runs inside the caller's transaction."""
+        conn.execute(
+            """UPDATE sync_state SET last_page = MAX(last_page, ?),
+                   run_newest_created = MAX(COALESCE(run_newest_created, ''), COALESCE(?, ''))
+               WHERE country=? AND query=? AND location=?""",
+            (page, self._page_newest.get((t, page)), *_key(t)))
+
+    def finish(self, failed: Iterable[Target] = ()):
+        """Targets paged to completion: promote this run's newest posting to the baseline. `failed`
+        ones stay 'running', so the next run resumes after their last committed page."""
+        failed = set(failed)
+        with self.conn:
+            for t in self.targets:
+                if t in failed:
+                    continue
+                self.conn.execute(
+                    """UPDATE sync_state SET status='done', last_page=0, last_run=?,
+                           newest_created = MAX(COALESCE(newest_created, ''), COALESCE(run_newest_created, '')),
+                           run_newest_created = NULL
+                       WHERE country=? AND query=? AND location=?""", (_now(), *_key(t)))
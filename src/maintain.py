@@ -0,0 +1,52 @@
+import argparse
+import time
+from pathlib import Path
+from src.common import retention
+from src.common.db import connect, init_db
+
+def main():
+    ap = argparse.ArgumentParser(description="Archive old postings to Parquet, compress old descriptions "
+                                             "and compact jobs.db (vacuum, ANALYZE, WAL checkpoint)")
+    ap.add_argument("--retain-days", type=int, default=retention.RETAIN_DAYS,
+                    help="keep postings from the last N days in jobs.db (JOBS_RETAIN_DAYS, default 365)")
+    ap.add_argument("--archive-dir", type=Path, default=retention.ARCHIVE_DIR)
+    ap.add_argument("--no-archive", action="store_true", help="keep every posting; only compress/compact")
+    ap.add_argument("--compress-after", type=int, metavar="DAYS",
+                    help="also move descriptions of postings older than DAYS into compressed storage")
+    ap.add_argument("--no-compact", action="store_true", help="skip FTS optimize/vacuum/ANALYZE/checkpoint")
+    ap.add_argument("--full-vacuum", action="store_true", help="VACUUM the whole file, not just free pages")
+    ap.add_argument("--dry-run", action="store_true", help="report what would be archived and exit")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    before = retention.cutoff(args.retain_days)
+    with connect() as conn:
+        init_db(conn)
+        conn.commit()
+        size0 = retention.sizes(conn)
+        if args.dry_run:
+            res = retention.archive(conn, before, args.archive_dir, dry_run=True)
+            print(f"Would archive {res['jobs']:,} jobs posted before {before} "
+                  f"({', '.join(res['months']) or 'none'}) • jobs.db {size0['db_mb']} MB")
+            return
+        if not args.no_archive:
+            res = retention.archive(conn, before, args.archive_dir)
+            conn.commit()
+            print(f"Archived {res['jobs']:,} jobs posted before {before} ({len(res['months'])} month(s)) "
+                  f"→ {args.archive_dir}")
+        if args.compress_after is not None:
+            res = retention.compress_descriptions(conn, retention.cutoff(args.compress_after))
+            conn.commit()
+            print(f"Compressed {res['jobs']:,} descriptions: {res['raw_bytes'] / 2**20:,.1f} MB → "
+                  f"{res['compressed_bytes'] / 2**20:,.1f} MB")
+        if not args.no_compact:
+            print(f"Compacted ({retention.compact(conn, full=args.full_vacuum)}, ANALYZE, wal_checkpoint)")
+        size1 = retention.sizes(conn)
+    print(f"jobs.db {size0['db_mb']} MB (+{size0['wal_mb']} MB WAL, {size0['free_mb']} MB free) → "
+          f"{size1['db_mb']} MB (+{size1['wal_mb']} MB WAL, {size1['free_mb']} MB free) "
+          f"in {time.perf_counter() - t0:.1f}s")
+    for name, mb in size1["tables"].items():
+        print(f"  {name:<28} {size0['tables'].get(name, 0.0):>8} MB → {mb:>8} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import argparse
+import time
+from src.common.db import connect, init_db
+from src.common.neardup import THRESHOLD, recluster
+
+def main():
+    ap = argparse.ArgumentParser(description="(Re)compute MinHash signatures and near-duplicate clusters")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD, help="estimated Jaccard to count as a repost")
+    ap.add_argument("--full", action="store_true",
+                    help="recluster every job, not just around new/changed signatures (implied by --threshold)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    with connect() as conn:
+        init_db(conn)
+        res = recluster(conn, args.threshold, full=args.full or args.threshold != THRESHOLD)
+    print(f"{res['signed']} signatures computed • {res['jobs']} jobs → {res['clusters']} clusters "
+          f"({res['near_dups']} near-duplicates, {res['candidates']} candidate pairs) • "
+          f"{res['changed']} rows updated in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+from src.common.db import DESCRIPTION_SQL, connect, init_db, set_job_skills
+from src.common.skills import get_matcher
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-scan jobs whose text changed or whose skills predate skills.yml")
+    ap.add_argument("--all", action="store_true", help="re-scan every job, not just stale ones")
+    ap.add_argument("--batch", type=int, default=2000)
+    args = ap.parse_args()
+
+    matcher = get_matcher()
+    scanned = links = 0
+    with connect() as conn:
+        init_db(conn)
+        stale = "" if args.all else "AND skills_version IS NOT :v"
+        last = ""
+        while True:
+            # keyset batches so memory stays flat; rows we just stamped drop out of the stale filter
+            rows = conn.execute(
+                f"SELECT id, title, {DESCRIPTION_SQL} FROM jobs WHERE id > :last {stale} ORDER BY id LIMIT :n",
+                {"last": last, "v": matcher.version, "n": args.batch}).fetchall()
+            if not rows:
+                break
+            found = matcher.match_many(f"{t} {d}" for _, t, d in rows)
+            links += set_job_skills(((jid, s) for (jid, _, _), s in zip(rows, found)), matcher.version, conn)
+            conn.commit()
+            scanned += len(rows)
+            last = rows[-1][0]
+    print(f"Re-extracted {scanned} jobs • {links} skill links (taxonomy {matcher.version})")
+
+if __name__ == "__main__":
+    main()
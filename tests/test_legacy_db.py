@@ -0,0 +1,45 @@
+"""A jobs.db written by the old sqlite_utils update_data.py (raw Adzuna fields as columns, no
+posted_date/url/source) lists its postings with a date and a link once migrated."""
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.common import db, queries as q  # noqa: E402
+
+# one record as the old update_data.py upserted it, Database(...)["jobs"].upsert_all(pk="id", alter=True)
+LEGACY = {"id": "4242", "title": "Data Analyst", "company": "Acme", "location": "Perth, Western Australia",
+          "created": "2025-03-04T05:06:07Z", "category": "IT Jobs", "contract_time": "full_time",
+          "salary_is_predicted": "0", "salary_min": 90000.0, "salary_max": 110000.0,
+          "redirect_url": "https://www.adzuna.com.au/land/ad/4242", "search_term": "data analyst",
+          "role_bucket": "Analyst"}
+
+
+def legacy_db(path: Path):
+    conn = sqlite3.connect(path)
+    cols = ", ".join(f"[{k}] {'FLOAT' if isinstance(v, float) else 'TEXT'}" + (" PRIMARY KEY" if k == "id" else "")
+                     for k, v in LEGACY.items())
+    conn.execute(f"CREATE TABLE [jobs] ({cols})")
+    conn.execute(f"INSERT INTO jobs VALUES ({','.join('?' * len(LEGACY))})", list(LEGACY.values()))
+    conn.execute("CREATE INDEX [idx_jobs_created] ON [jobs] ([created])")
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_rows_get_date_link_and_source(tmp_path):
+    path = tmp_path / "jobs.db"
+    legacy_db(path)
+    with db.connect(path=path) as conn:
+        db.init_db(conn)
+    conn = q.connect(path)
+    assert not set(db.LEGACY_COLUMNS) & {r[1] for r in conn.execute("PRAGMA table_info(jobs)")}
+
+    page = q.job_page(conn, q.Filters())
+    assert page[["id", "posted_date", "city_clean", "state"]].to_dict("records") == [
+        {"id": "4242", "posted_date": "2025-03-04", "city_clean": "Perth", "state": "Western Australia"}]
+    details = q.job_details(conn, tuple(page["id"]), ("id", "url", "source", "salary_avg"))
+    assert details.to_dict("records") == [
+        {"id": "4242", "url": LEGACY["redirect_url"], "source": "adzuna", "salary_avg": 100000.0}]
+    # the rollups count it in its week, like any other posting
+    assert q.row_count(conn, q.Filters()) == 1
+    assert q.weekly_trend(conn, q.Filters())["listings"].tolist() == [1]
@@ -0,0 +1,62 @@
+"""recluster(limit=...) run in slices after each write leaves the same near_dup flags and cluster
+ids as reclustering every job at once."""
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from scripts.synth_adzuna import Synth, SynthConfig  # noqa: E402
+from src.common import db, neardup  # noqa: E402
+from src.extractors.etl_adzuna import parse_records  # noqa: E402
+
+
+def clustering(conn):
+    return conn.execute("SELECT id, cluster_id, near_dup, is_dup FROM jobs ORDER BY id").fetchall()
+
+
+def settle(conn, limit=40) -> int:
+    slices = 1
+    while neardup.recluster(conn, limit=limit)["pending"]:
+        slices += 1
+    return slices
+
+
+def test_sliced_recluster_matches_full(tmp_path):
+    synth = Synth(SynthConfig(seed=3, dup_share=0.08, near_dup_share=0.15))
+    jobs = parse_records({"results": [synth.posting(n) for n in range(1200)]})
+    rng = random.Random(3)
+
+    with db.connect(path=tmp_path / "jobs.db") as conn:
+        db.init_db(conn)
+
+        def check():
+            sliced = clustering(conn)
+            neardup.recluster(conn, full=True)
+            assert clustering(conn) == sliced
+            return sliced
+
+        for lo in range(0, len(jobs), 300):
+            db.upsert_jobs(jobs[lo:lo + 300], conn)
+            assert settle(conn) > 1
+            before = check()
+        assert sum(near for _, _, near, _ in before) > 20
+
+        # retitled reposts, postings rewritten as copies of others, and ones rewritten from scratch
+        old = rng.sample(jobs, 90)
+        edits = [j._replace(title=f"Lead {j.title} (Contract)") for j in old[:30]]
+        edits += [j._replace(title=src.title, description=src.description + " apply today")
+                  for j, src in zip(old[30:60], rng.sample(jobs, 30))]
+        edits += [j._replace(description=f"posting {n} rewritten: " + " ".join(rng.sample(jobs, 1)[0].title.split() * 8))
+                  for n, j in enumerate(old[60:])]
+        db.upsert_jobs(edits, conn)
+        assert settle(conn) > 1
+        after = check()
+        assert after != before
+
+        # same text, new dedup_key: exact reposts become the first of their own group, and vice versa
+        dups = {jid for jid, _, _, is_dup in after if is_dup}
+        moved = [j._replace(company=f"{j.company} Recruitment") for j in jobs if j.id in dups][:40]
+        moved += [j._replace(posted_date="2025-01-02") for j in rng.sample(jobs, 40)]
+        db.upsert_jobs(moved, conn)
+        settle(conn)
+        assert check() != after